@@ -11,13 +11,28 @@ Zero Tokenizer vs HuggingFace Tokenizers 完整性能对比基准测试
     python benchmarks/compare_with_hf.py --algorithm bpe --iterations 10
 """
 
+import collections
+import contextlib
+import gc
+import itertools
+import os
 import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
 import argparse
 import sys
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import json
 
+import numpy as np
+
+# orjson为可选依赖，未安装时退回标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 添加项目路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "python"))
@@ -38,13 +53,99 @@ except ImportError as e:
 
 # 导入HuggingFace Tokenizers
 try:
-    from tokenizers import Tokenizer, models, trainers, pre_tokenizers
+    from tokenizers import Regex, Tokenizer, models, trainers, pre_tokenizers
     HF_AVAILABLE = True
 except ImportError:
     print("⚠️  HuggingFace tokenizers未安装，将跳过HF测试")
     print("   安装命令: pip install tokenizers")
     HF_AVAILABLE = False
 
+# 与Rust端 GPT4_PATTERN 一致的预分词正则，用于让HF与Zero按相同方式切分
+GPT4_PATTERN = (
+    r"'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}"
+    r"| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"
+)
+
+
+def measure_per_call(func, repeat: int = 5) -> float:
+    """测量单次调用耗时（秒）
+
+    先用 autorange 确定循环次数，再按 timeit 惯例取多轮中的最小值，
+    避免逐次调用 perf_counter 的开销干扰微秒级测量。
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+@contextlib.contextmanager
+def gc_disabled():
+    """计时期间关闭垃圾回收，结束后恢复原状态
+
+    timeit 已默认关闭GC，这里用于手动 perf_counter 计时的循环
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@contextlib.contextmanager
+def pinned_to_single_cpu():
+    """将当前线程绑定到单个CPU（仅Linux），结束后恢复原亲和性
+
+    只影响调用线程，已创建的rayon线程池不受限制，因此只用于单线程微基准测试
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        yield
+        return
+
+    original = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, {min(original)})
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, original)
+
+
+def print_iterations(label: str, times: np.ndarray) -> None:
+    """在计时循环结束后一次性输出每次迭代的耗时（秒）"""
+    print("\n".join(f"  {label} 第{i+1}次: {t*1000:.2f}ms" for i, t in enumerate(times)))
+
+
+def summarize_times(times: np.ndarray) -> Dict[str, float]:
+    """汇总耗时样本（秒），返回以毫秒为单位的统计值"""
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {
+        'avg_ms': float(times.mean()) * 1000,
+        'min_ms': float(times.min()) * 1000,
+        'max_ms': float(times.max()) * 1000,
+        'p50_ms': float(p50) * 1000,
+        'p95_ms': float(p95) * 1000,
+        'p99_ms': float(p99) * 1000,
+    }
+
+
+def _with_pre_tokenizer(tokenizer, pre_tokenizer):
+    """设置HF Tokenizer的预分词器并返回该Tokenizer"""
+    tokenizer.pre_tokenizer = pre_tokenizer
+    return tokenizer
+
+
+def batch_throughput(elapsed: float, num_texts: int, num_bytes: int) -> Dict[str, float]:
+    """根据单次批量调用耗时（秒）计算吞吐量
+
+    MB/秒按输入的UTF-8字节数计算，不受批内文本长度分布影响
+    """
+    return {
+        'elapsed_ms': elapsed * 1000,
+        'texts_per_sec': num_texts / elapsed,
+        'mb_per_sec': num_bytes / elapsed / 1e6,
+    }
+
 
 class ComprehensiveBenchmark:
     """完整的性能基准测试类"""
@@ -57,20 +158,60 @@ class ComprehensiveBenchmark:
         'wordpiece': 'WordPiece',
     }
 
-    def __init__(self, algorithm: str = 'bpe', vocab_size: int = 1000, iterations: int = 5):
+    # HuggingFace (Tokenizer, Trainer) 构造函数表，按算法名索引，参数为词汇表大小
+    _HF_FACTORIES: Dict[str, Callable[[int], Tuple['Tokenizer', object]]] = {
+        'bpe': lambda vocab_size: (
+            _with_pre_tokenizer(Tokenizer(models.BPE()), pre_tokenizers.Whitespace()),
+            trainers.BpeTrainer(vocab_size=vocab_size, special_tokens=["[UNK]"]),
+        ),
+        'bbpe': lambda vocab_size: (
+            _with_pre_tokenizer(Tokenizer(models.BPE()), pre_tokenizers.ByteLevel()),
+            trainers.BpeTrainer(vocab_size=vocab_size, special_tokens=["[UNK]"]),
+        ),
+        'unigram': lambda vocab_size: (
+            _with_pre_tokenizer(Tokenizer(models.Unigram()), pre_tokenizers.Whitespace()),
+            trainers.UnigramTrainer(vocab_size=vocab_size, special_tokens=["[UNK]"]),
+        ),
+        'wordpiece': lambda vocab_size: (
+            _with_pre_tokenizer(
+                Tokenizer(models.WordPiece(unk_token="[UNK]")), pre_tokenizers.Whitespace()
+            ),
+            trainers.WordPieceTrainer(vocab_size=vocab_size, special_tokens=["[UNK]"]),
+        ),
+    }
+
+    # 预热训练使用的语料条数和词汇表大小（BBPE要求至少256）
+    WARMUP_CORPUS_SIZE = 10
+    WARMUP_VOCAB_SIZE = 300
+
+    # 训练语料和测试文本的条数
+    TRAIN_CORPUS_SIZE = 500
+    TEST_CORPUS_SIZE = 100
+
+    def __init__(self, algorithm: str = 'bpe', vocab_size: int = 1000, iterations: int = 5,
+                 unique_corpus: bool = False, pre_tokenizer: str = 'default',
+                 train_corpus: Optional[List[str]] = None,
+                 test_texts: Optional[List[str]] = None):
         self.algorithm = algorithm
+        self.pre_tokenizer = pre_tokenizer
         self.vocab_size = vocab_size
         self.iterations = iterations
         self.results = {}
 
-        # 测试数据集
-        self.train_corpus = self._generate_corpus(500)
-        self.test_texts = self._generate_corpus(100)
+        # 测试数据集（可由调用方传入，使多个算法共享同一份语料）
+        if train_corpus is None:
+            train_corpus = self._generate_corpus(self.TRAIN_CORPUS_SIZE)
+        if test_texts is None:
+            test_texts = self._generate_corpus(self.TEST_CORPUS_SIZE)
+        self.train_corpus = train_corpus
+        self.train_counts = collections.Counter(train_corpus) if unique_corpus else None
+        self.test_texts = test_texts
 
         # 字典路径
         self.dict_path = project_root / "dict" / "常用汉字字表.txt"
 
-    def _generate_corpus(self, size: int) -> List[str]:
+    @staticmethod
+    def _generate_corpus(size: int) -> List[str]:
         """生成测试语料（包含英文和中文）"""
         texts = [
             "The quick brown fox jumps over the lazy dog.",
@@ -87,10 +228,7 @@ class ComprehensiveBenchmark:
             "分词是文本处理的第一步。",
         ]
 
-        corpus = []
-        for i in range(size):
-            corpus.append(texts[i % len(texts)])
-        return corpus
+        return list(itertools.islice(itertools.cycle(texts), size))
 
     def _create_zero_tokenizer(self):
         """创建Zero Tokenizer实例"""
@@ -108,44 +246,40 @@ class ComprehensiveBenchmark:
         else:
             raise ValueError(f"未知算法: {self.algorithm}")
 
-    def _create_hf_tokenizer(self):
+    def _gpt4_pre_tokenizer(self):
+        """返回与Zero相同的GPT-4正则预分词器
+
+        避免两侧切分方式不同影响对比；字节级算法在正则切分后再做不带正则的ByteLevel映射
+        """
+        split = pre_tokenizers.Split(Regex(GPT4_PATTERN), behavior="isolated")
+        if self.algorithm == 'bbpe':
+            return pre_tokenizers.Sequence([split, pre_tokenizers.ByteLevel(use_regex=False)])
+        return split
+
+    def _create_hf_tokenizer(self, vocab_size: Optional[int] = None):
         """创建HuggingFace Tokenizer实例"""
         if not HF_AVAILABLE:
             return None, None
 
-        if self.algorithm == 'bpe':
-            tokenizer = Tokenizer(models.BPE())
-            tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
-            trainer = trainers.BpeTrainer(
-                vocab_size=self.vocab_size,
-                special_tokens=["[UNK]"]
-            )
-        elif self.algorithm == 'bbpe':
-            tokenizer = Tokenizer(models.BPE())
-            tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel()
-            trainer = trainers.BpeTrainer(
-                vocab_size=self.vocab_size,
-                special_tokens=["[UNK]"]
-            )
-        elif self.algorithm == 'unigram':
-            tokenizer = Tokenizer(models.Unigram())
-            tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
-            trainer = trainers.UnigramTrainer(
-                vocab_size=self.vocab_size,
-                special_tokens=["[UNK]"]
-            )
-        elif self.algorithm == 'wordpiece':
-            tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
-            tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
-            trainer = trainers.WordPieceTrainer(
-                vocab_size=self.vocab_size,
-                special_tokens=["[UNK]"]
-            )
-        else:
-            raise ValueError(f"未知算法: {self.algorithm}")
+        if vocab_size is None:
+            vocab_size = self.vocab_size
 
+        tokenizer, trainer = self._HF_FACTORIES[self.algorithm](vocab_size)
+        if self.pre_tokenizer == 'gpt4':
+            tokenizer.pre_tokenizer = self._gpt4_pre_tokenizer()
         return tokenizer, trainer
 
+    def _train_zero(self, tokenizer) -> None:
+        """训练Zero Tokenizer，支持时使用去重后的文本计数"""
+        if self.train_counts is not None and hasattr(tokenizer, 'train_from_counts'):
+            tokenizer.train_from_counts(
+                list(self.train_counts.keys()),
+                list(self.train_counts.values()),
+                self.vocab_size,
+            )
+        else:
+            tokenizer.train(self.train_corpus, self.vocab_size)
+
     def benchmark_training(self) -> tuple:
         """基准测试：训练速度"""
         print("\n" + "="*70)
@@ -155,55 +289,64 @@ class ComprehensiveBenchmark:
         tokenizer_zero = None
         tokenizer_hf = None
 
+        warmup_corpus = self.train_corpus[:self.WARMUP_CORPUS_SIZE]
+
         # Zero Tokenizer 训练
         if ZERO_AVAILABLE:
-            times = []
-            for i in range(self.iterations):
-                tokenizer = self._create_zero_tokenizer()
+            # 预热一次（不计时），排除首次调用的冷启动开销
+            warmup = self._create_zero_tokenizer()
+            warmup.train(warmup_corpus, self.WARMUP_VOCAB_SIZE)
+            del warmup
 
-                start = time.perf_counter()
-                tokenizer.train(self.train_corpus, self.vocab_size)
-                elapsed = time.perf_counter() - start
+            times = np.empty(self.iterations)
+            with gc_disabled():
+                for i in range(self.iterations):
+                    tokenizer = self._create_zero_tokenizer()
 
-                times.append(elapsed)
-                print(f"  Zero Tokenizer 第{i+1}次: {elapsed*1000:.2f}ms")
+                    start = time.perf_counter()
+                    self._train_zero(tokenizer)
+                    times[i] = time.perf_counter() - start
 
-            avg_time = sum(times) / len(times)
-            self.results['zero_training'] = {
-                'avg_ms': avg_time * 1000,
-                'min_ms': min(times) * 1000,
-                'max_ms': max(times) * 1000,
-            }
-            print(f"  ✅ Zero Tokenizer 平均: {avg_time*1000:.2f}ms")
+                    # 保留最后一次训练好的tokenizer供后续测试使用
+                    tokenizer_zero = tokenizer
 
-            # 保留训练好的tokenizer
-            tokenizer_zero = self._create_zero_tokenizer()
-            tokenizer_zero.train(self.train_corpus, self.vocab_size)
+            # 训练完成后编译为完美哈希合并表和按ID连续存放的标记表，
+            # 后续编码、解码测试使用编译结果（不计入训练时间）
+            if hasattr(tokenizer_zero, 'compile'):
+                tokenizer_zero.compile()
+
+            # 循环结束后再统一输出，避免终端输出干扰计时
+            print_iterations("Zero Tokenizer", times)
+
+            stats = summarize_times(times)
+            self.results['zero_training'] = stats
+            print(f"  ✅ Zero Tokenizer 平均: {stats['avg_ms']:.2f}ms (p95: {stats['p95_ms']:.2f}ms)")
 
         # HuggingFace Tokenizer 训练
         if HF_AVAILABLE:
-            times = []
-            for i in range(self.iterations):
-                tokenizer, trainer = self._create_hf_tokenizer()
+            # 预热一次（不计时）
+            warmup, trainer = self._create_hf_tokenizer(self.WARMUP_VOCAB_SIZE)
+            warmup.train_from_iterator(warmup_corpus, trainer=trainer)
+            del warmup
 
-                start = time.perf_counter()
-                tokenizer.train_from_iterator(self.train_corpus, trainer=trainer)
-                elapsed = time.perf_counter() - start
+            times = np.empty(self.iterations)
+            with gc_disabled():
+                for i in range(self.iterations):
+                    tokenizer, trainer = self._create_hf_tokenizer()
+
+                    start = time.perf_counter()
+                    tokenizer.train_from_iterator(self.train_corpus, trainer=trainer)
+                    times[i] = time.perf_counter() - start
 
-                times.append(elapsed)
-                print(f"  HF Tokenizer 第{i+1}次: {elapsed*1000:.2f}ms")
+                    # 保留最后一次训练好的tokenizer供后续测试使用
+                    tokenizer_hf = tokenizer
 
-            avg_time = sum(times) / len(times)
-            self.results['hf_training'] = {
-                'avg_ms': avg_time * 1000,
-                'min_ms': min(times) * 1000,
-                'max_ms': max(times) * 1000,
-            }
-            print(f"  ✅ HF Tokenizer 平均: {avg_time*1000:.2f}ms")
+            # 循环结束后再统一输出，避免终端输出干扰计时
+            print_iterations("HF Tokenizer", times)
 
-            # 保留训练好的tokenizer
-            tokenizer_hf, trainer = self._create_hf_tokenizer()
-            tokenizer_hf.train_from_iterator(self.train_corpus, trainer=trainer)
+            stats = summarize_times(times)
+            self.results['hf_training'] = stats
+            print(f"  ✅ HF Tokenizer 平均: {stats['avg_ms']:.2f}ms (p95: {stats['p95_ms']:.2f}ms)")
 
         return tokenizer_zero, tokenizer_hf
 
@@ -221,23 +364,20 @@ class ComprehensiveBenchmark:
         print("="*70)
 
         if ZERO_AVAILABLE:
-            times = []
-            for i in range(self.iterations):
-                start = time.perf_counter()
-                tokenizer = self._create_zero_tokenizer()
-                elapsed = time.perf_counter() - start
-
-                times.append(elapsed)
-                print(f"  Zero Tokenizer 第{i+1}次: {elapsed*1000:.2f}ms")
-
-            avg_time = sum(times) / len(times)
-            self.results['zero_dict_init'] = {
-                'avg_ms': avg_time * 1000,
-                'min_ms': min(times) * 1000,
-                'max_ms': max(times) * 1000,
-            }
-            print(f"  ✅ Zero Tokenizer 平均: {avg_time*1000:.2f}ms")
-            return avg_time
+            times = np.empty(self.iterations)
+            with gc_disabled():
+                for i in range(self.iterations):
+                    start = time.perf_counter()
+                    tokenizer = self._create_zero_tokenizer()
+                    times[i] = time.perf_counter() - start
+
+            # 循环结束后再统一输出，避免终端输出干扰计时
+            print_iterations("Zero Tokenizer", times)
+
+            stats = summarize_times(times)
+            self.results['zero_dict_init'] = stats
+            print(f"  ✅ Zero Tokenizer 平均: {stats['avg_ms']:.2f}ms (p95: {stats['p95_ms']:.2f}ms)")
+            return stats['avg_ms'] / 1000
 
         return None
 
@@ -257,26 +397,24 @@ class ComprehensiveBenchmark:
             print(f"\n  测试文本: '{test_text[:50]}...'")
 
             if ZERO_AVAILABLE and tokenizer_zero:
-                times = []
-                for _ in range(100):
-                    start = time.perf_counter()
-                    _ = tokenizer_zero.encode(test_text)
-                    elapsed = time.perf_counter() - start
-                    times.append(elapsed)
+                if hasattr(tokenizer_zero, 'encode_bytes'):
+                    # 预先编码为UTF-8字节，避免每次调用跨FFI转换str
+                    payload = test_text.encode('utf-8')
+                    per_call = measure_per_call(lambda: tokenizer_zero.encode_bytes(payload))
+                else:
+                    per_call = measure_per_call(lambda: tokenizer_zero.encode(test_text))
+                print(f"    Zero Tokenizer: {per_call*1000:.4f}ms")
 
-                avg_time = sum(times) / len(times)
-                print(f"    Zero Tokenizer: {avg_time*1000:.4f}ms")
+                if hasattr(tokenizer_zero, 'encode_packed'):
+                    # 返回打包的u32字节，frombuffer零拷贝得到数组，避免逐个装箱int
+                    per_call = measure_per_call(
+                        lambda: np.frombuffer(tokenizer_zero.encode_packed(test_text), dtype='<u4')
+                    )
+                    print(f"    Zero Tokenizer (packed): {per_call*1000:.4f}ms")
 
             if HF_AVAILABLE and tokenizer_hf:
-                times = []
-                for _ in range(100):
-                    start = time.perf_counter()
-                    _ = tokenizer_hf.encode(test_text)
-                    elapsed = time.perf_counter() - start
-                    times.append(elapsed)
-
-                avg_time = sum(times) / len(times)
-                print(f"    HF Tokenizer: {avg_time*1000:.4f}ms")
+                per_call = measure_per_call(lambda: tokenizer_hf.encode(test_text))
+                print(f"    HF Tokenizer: {per_call*1000:.4f}ms")
 
     def benchmark_encoding_batch(self, tokenizer_zero=None, tokenizer_hf=None) -> None:
         """基准测试：批量编码速度"""
@@ -287,32 +425,26 @@ class ComprehensiveBenchmark:
         batch_sizes = [10, 100, 1000]
 
         for batch_size in batch_sizes:
-            print(f"\n  批量大小: {batch_size}")
             test_batch = self.test_texts[:batch_size]
+            # 测试语料可能少于批量大小，按实际条数和UTF-8字节数计算吞吐量
+            num_texts = len(test_batch)
+            num_bytes = sum(len(t.encode('utf-8')) for t in test_batch)
+            print(f"\n  批量大小: {num_texts} 条 ({num_bytes} 字节)")
 
             if ZERO_AVAILABLE and tokenizer_zero:
-                # 检查是否有encode_batch方法
-                if hasattr(tokenizer_zero, 'encode_batch'):
-                    start = time.perf_counter()
-                    _ = tokenizer_zero.encode_batch(test_batch)
-                    elapsed = time.perf_counter() - start
-                    throughput = batch_size / elapsed
-                    print(f"    Zero Tokenizer (并行): {throughput:.0f} 条/秒 ({elapsed*1000:.2f}ms)")
-                else:
-                    # 串行处理
-                    start = time.perf_counter()
-                    for text in test_batch:
-                        _ = tokenizer_zero.encode(text)
-                    elapsed = time.perf_counter() - start
-                    throughput = batch_size / elapsed
-                    print(f"    Zero Tokenizer (串行): {throughput:.0f} 条/秒 ({elapsed*1000:.2f}ms)")
+                # 所有Zero分词器的encode_batch都会释放GIL并使用rayon并行处理
+                elapsed = measure_per_call(lambda: tokenizer_zero.encode_batch(test_batch))
+                stats = batch_throughput(elapsed, num_texts, num_bytes)
+                self.results[f'zero_batch_{batch_size}'] = stats
+                print(f"    Zero Tokenizer (并行): {stats['mb_per_sec']:.2f} MB/秒, "
+                      f"{stats['texts_per_sec']:.0f} 条/秒 ({stats['elapsed_ms']:.2f}ms)")
 
             if HF_AVAILABLE and tokenizer_hf:
-                start = time.perf_counter()
-                _ = tokenizer_hf.encode_batch(test_batch)
-                elapsed = time.perf_counter() - start
-                throughput = batch_size / elapsed
-                print(f"    HF Tokenizer: {throughput:.0f} 条/秒 ({elapsed*1000:.2f}ms)")
+                elapsed = measure_per_call(lambda: tokenizer_hf.encode_batch(test_batch))
+                stats = batch_throughput(elapsed, num_texts, num_bytes)
+                self.results[f'hf_batch_{batch_size}'] = stats
+                print(f"    HF Tokenizer: {stats['mb_per_sec']:.2f} MB/秒, "
+                      f"{stats['texts_per_sec']:.0f} 条/秒 ({stats['elapsed_ms']:.2f}ms)")
 
     def benchmark_decoding(self, tokenizer_zero=None, tokenizer_hf=None) -> None:
         """基准测试：解码速度"""
@@ -324,30 +456,33 @@ class ComprehensiveBenchmark:
 
         if ZERO_AVAILABLE and tokenizer_zero:
             tokens = tokenizer_zero.encode(test_text)
+            per_call = measure_per_call(lambda: tokenizer_zero.decode(tokens))
+            print(f"  ✅ Zero Tokenizer: {per_call*1000:.4f}ms (最小)")
 
-            times = []
-            for _ in range(100):
-                start = time.perf_counter()
-                _ = tokenizer_zero.decode(tokens)
-                elapsed = time.perf_counter() - start
-                times.append(elapsed)
+        if HF_AVAILABLE and tokenizer_hf:
+            tokens_hf = tokenizer_hf.encode(test_text).ids
+            per_call = measure_per_call(lambda: tokenizer_hf.decode(tokens_hf))
+            print(f"  ✅ HF Tokenizer: {per_call*1000:.4f}ms (最小)")
 
-            avg_time = sum(times) / len(times)
-            print(f"  ✅ Zero Tokenizer: {avg_time*1000:.4f}ms (平均)")
+    def benchmark_decoding_batch(self, tokenizer_zero=None, tokenizer_hf=None) -> None:
+        """基准测试：批量解码速度（按单条摊销）"""
+        print("\n" + "="*70)
+        print(f"📊 批量解码速度测试 - {self.ALGORITHMS[self.algorithm]}")
+        print("="*70)
 
-        if HF_AVAILABLE and tokenizer_hf:
-            encoding = tokenizer_hf.encode(test_text)
-            tokens = encoding.ids
+        test_text = "The quick brown fox jumps over the lazy dog."
+        batch_size = 100
 
-            times = []
-            for _ in range(100):
-                start = time.perf_counter()
-                _ = tokenizer_hf.decode(tokens)
-                elapsed = time.perf_counter() - start
-                times.append(elapsed)
+        if ZERO_AVAILABLE and tokenizer_zero:
+            # 批量只构建一次，一次跨FFI调用内释放GIL并行解码
+            batch = [tokenizer_zero.encode(test_text)] * batch_size
+            per_call = measure_per_call(lambda: tokenizer_zero.decode_batch(batch)) / batch_size
+            print(f"  ✅ Zero Tokenizer (并行): {per_call*1000:.4f}ms/条 (最小)")
 
-            avg_time = sum(times) / len(times)
-            print(f"  ✅ HF Tokenizer: {avg_time*1000:.4f}ms (平均)")
+        if HF_AVAILABLE and tokenizer_hf:
+            batch_hf = [tokenizer_hf.encode(test_text).ids] * batch_size
+            per_call = measure_per_call(lambda: tokenizer_hf.decode_batch(batch_hf)) / batch_size
+            print(f"  ✅ HF Tokenizer: {per_call*1000:.4f}ms/条 (最小)")
 
     def run_all_benchmarks(self) -> None:
         """运行所有基准测试"""
@@ -358,6 +493,8 @@ class ComprehensiveBenchmark:
         print(f"词汇表大小: {self.vocab_size}")
         print(f"迭代次数: {self.iterations}")
         print(f"训练语料: {len(self.train_corpus)} 条")
+        if self.train_counts is not None:
+            print(f"去重训练语料: {len(self.train_counts)} 条")
         print(f"测试文本: {len(self.test_texts)} 条")
 
         # 1. 字典初始化测试（如果适用）
@@ -366,25 +503,50 @@ class ComprehensiveBenchmark:
         # 2. 训练测试
         tokenizer_zero, tokenizer_hf = self.benchmark_training()
 
-        # 3. 单条编码测试
-        self.benchmark_encoding_single(tokenizer_zero, tokenizer_hf)
+        # 3. 单条编码测试（绑定单个CPU，减少线程迁移带来的抖动）
+        with pinned_to_single_cpu():
+            self.benchmark_encoding_single(tokenizer_zero, tokenizer_hf)
 
-        # 4. 批量编码测试
+        # 4. 批量编码测试（并行，不绑定CPU）
         self.benchmark_encoding_batch(tokenizer_zero, tokenizer_hf)
 
         # 5. 解码测试
-        self.benchmark_decoding(tokenizer_zero, tokenizer_hf)
+        with pinned_to_single_cpu():
+            self.benchmark_decoding(tokenizer_zero, tokenizer_hf)
+
+        # 6. 批量解码测试（并行，不绑定CPU）
+        self.benchmark_decoding_batch(tokenizer_zero, tokenizer_hf)
 
     def save_results(self, output_file: str) -> None:
         """保存结果到JSON文件"""
         output_path = Path(__file__).parent / output_file
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            # orjson直接输出UTF-8字节，非ASCII字符不转义
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f, indent=2, ensure_ascii=False)
 
         print(f"\n💾 结果已保存到: {output_path}")
 
 
+def _run_one_algo(algo: str, options: Dict) -> None:
+    """运行单个算法的完整基准测试并保存结果（顶层函数，便于多进程调用）"""
+    print("\n" + "█"*70)
+    print(f"  开始测试: {ComprehensiveBenchmark.ALGORITHMS[algo]}")
+    print("█"*70)
+
+    benchmark = ComprehensiveBenchmark(algorithm=algo, **options)
+    benchmark.run_all_benchmarks()
+    benchmark.save_results(f"benchmark_{algo}_results.json")
+
+    print("\n" + "="*70)
+    print(f"✅ {ComprehensiveBenchmark.ALGORITHMS[algo]} 测试完成！")
+    print("="*70 + "\n")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Zero Tokenizer vs HuggingFace Tokenizers 完整性能对比"
@@ -408,9 +570,31 @@ def main():
         default=5,
         help='训练迭代次数 (默认: 5)'
     )
+    parser.add_argument(
+        '--unique-corpus',
+        action='store_true',
+        help='去重训练语料并按出现次数训练（需要train_from_counts支持）'
+    )
+    parser.add_argument(
+        '--pre-tokenizer',
+        type=str,
+        choices=['default', 'gpt4'],
+        default='default',
+        help='HF使用的预分词器 (默认: default；gpt4表示与Zero使用相同的GPT-4正则)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='--algorithm all 时并行运行的进程数 (默认: 1，即顺序运行；并行会相互争用CPU，影响计时)'
+    )
 
     args = parser.parse_args()
 
+    # 固定子进程的哈希种子（本进程的种子在解释器启动时已确定，
+    # 需要完全可复现时请以 PYTHONHASHSEED=0 启动）
+    os.environ.setdefault('PYTHONHASHSEED', '0')
+
     if not ZERO_AVAILABLE:
         print("\n❌ 错误: Zero Tokenizer未安装")
         print("   请先运行: maturin develop")
@@ -425,23 +609,29 @@ def main():
     # 测试所有算法或单个算法
     algorithms_to_test = ['bpe', 'bbpe', 'unigram', 'wordpiece'] if args.algorithm == 'all' else [args.algorithm]
 
-    for algo in algorithms_to_test:
-        print("\n" + "█"*70)
-        print(f"  开始测试: {ComprehensiveBenchmark.ALGORITHMS[algo]}")
-        print("█"*70)
-
-        benchmark = ComprehensiveBenchmark(
-            algorithm=algo,
-            vocab_size=args.vocab_size,
-            iterations=args.iterations
-        )
-        benchmark.run_all_benchmarks()
-        benchmark.save_results(f"benchmark_{algo}_results.json")
-
-        print("\n" + "="*70)
-        print(f"✅ {ComprehensiveBenchmark.ALGORITHMS[algo]} 测试完成！")
-        print("="*70 + "\n")
+    # 语料只生成一次，所有算法共享，保证跨算法结果可比
+    options = {
+        'train_corpus': ComprehensiveBenchmark._generate_corpus(
+            ComprehensiveBenchmark.TRAIN_CORPUS_SIZE
+        ),
+        'test_texts': ComprehensiveBenchmark._generate_corpus(
+            ComprehensiveBenchmark.TEST_CORPUS_SIZE
+        ),
+        'vocab_size': args.vocab_size,
+        'iterations': args.iterations,
+        'unique_corpus': args.unique_corpus,
+        'pre_tokenizer': args.pre_tokenizer,
+    }
 
+    if args.jobs > 1 and len(algorithms_to_test) > 1:
+        # 各算法之间没有共享状态，使用多进程并行运行（输出可能交错）
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            list(executor.map(
+                _run_one_algo, algorithms_to_test, itertools.repeat(options)
+            ))
+    else:
+        for algo in algorithms_to_test:
+            _run_one_algo(algo, options)
 
 if __name__ == "__main__":
     main()
@@ -8,8 +8,6 @@ BBPE在字节级别上进行操作，可以处理任意Unicode字符，包括表
 
 import sys
 import os
-import tempfile
-import random
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -60,9 +58,8 @@ def generate_sample_text():
         "特殊Unicode: 𐍈𐍉𐍊𐍋𐍌𐍍𐍎𐍏𐍐𐍑"
     ]
     
-    # 混合所有句子，并添加一些随机变化
+    # 混合所有句子（训练只依赖语料统计，与顺序无关，无需打乱）
     all_sentences = chinese_sentences + english_sentences + special_char_sentences
-    random.shuffle(all_sentences)
     
     return all_sentences
 
@@ -76,11 +73,7 @@ def main():
     sentences = generate_sample_text()
     print(f"✓ 生成了 {len(sentences)} 个训练句子")
     
-    # 创建临时文件保存训练数据
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        for sentence in sentences:
-            f.write(sentence + '\n')
-        training_file = f.name
+    model_file = "bbpe_tokenizer.json"
     
     try:
         # 创建空的BBPE分词器
@@ -90,19 +83,13 @@ def main():
         
         # 设置训练参数
         vocab_size = 1000  # 词汇表大小
-        special_tokens = ["<pad>", "<unk>", "<s>", "</s>"]  # 特殊token
         
         print(f"\n3. 开始训练分词器...")
         print(f"   词汇表大小: {vocab_size}")
-        print(f"   特殊tokens: {special_tokens}")
-        print(f"   训练文件: {training_file}")
+        print(f"   训练句子: {len(sentences)} 条")
         
-        # 训练分词器
-        tokenizer.train(
-            files=[training_file],
-            vocab_size=vocab_size,
-            special_tokens=special_tokens
-        )
+        # 直接用内存中的句子训练，无需写入临时文件
+        tokenizer.train(sentences, vocab_size)
         
         print("✓ 分词器训练完成")
         
@@ -127,8 +114,10 @@ def main():
         
         # 显示一些词汇表内容
         print("\n5. 词汇表示例 (前20个):")
-        for i in range(min(20, tokenizer.get_vocab_size())):
-            token = tokenizer.id_to_token(i)
+        # 一次性获取词汇表快照，避免逐个ID跨越FFI边界
+        vocab = tokenizer.get_vocab()
+        for i in range(min(20, len(vocab))):
+            token = bytes(vocab[i]).decode('utf-8', errors='replace') if i in vocab else None
             print(f"  ID {i}: '{token}'")
         
         # BBPE的特点是能够处理任意Unicode字符
@@ -145,7 +134,6 @@ def main():
             print("✗ 特殊字符编码解码不一致")
         
         # 保存训练好的分词器
-        model_file = "bbpe_tokenizer.json"
         print(f"\n7. 保存训练好的分词器到 {model_file}...")
         tokenizer.save(model_file)
         print("✓ 分词器保存成功")
@@ -164,8 +152,7 @@ def main():
             print("✗ 加载的分词器与原始分词器不一致")
         
     finally:
-        # 清理临时文件
-        os.unlink(training_file)
+        # 清理模型文件
         if os.path.exists(model_file):
             os.unlink(model_file)
     
@@ -56,8 +56,10 @@ def main():
     
     # 展示token到单词的映射
     print("\n6. Token到单词的映射:")
+    # 一次性获取词汇表快照，避免逐个ID跨越FFI边界
+    vocab = tokenizer.get_vocab()
     for i, token_id in enumerate(tokens[:10]):  # 只显示前10个token
-        token = tokenizer.id_to_token(token_id)
+        token = bytes(vocab[token_id]).decode('utf-8', errors='replace')
         print(f"  Token {i+1}: ID={token_id}, Token='{token}'")
     
     # 统计信息
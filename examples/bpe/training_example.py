@@ -8,7 +8,6 @@ BPE (Byte Pair Encoding) 分词器训练示例
 import sys
 import os
 import tempfile
-import random
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -49,9 +48,8 @@ def generate_sample_text():
         "Language models can predict the probability distribution of the next word."
     ]
     
-    # 混合中英文句子，并添加一些随机变化
+    # 混合中英文句子（训练只依赖语料统计，与顺序无关，无需打乱）
     all_sentences = chinese_sentences + english_sentences
-    random.shuffle(all_sentences)
     
     return all_sentences
 
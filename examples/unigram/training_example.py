@@ -8,8 +8,6 @@ Unigram语言模型是一种基于概率的分词方法，它通过EM算法学
 
 import sys
 import os
-import tempfile
-import random
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -50,9 +48,8 @@ def generate_sample_text():
         "Language models can predict the probability distribution of the next word."
     ]
     
-    # 混合中英文句子，并添加一些随机变化
+    # 混合中英文句子（训练只依赖语料统计，与顺序无关，无需打乱）
     all_sentences = chinese_sentences + english_sentences
-    random.shuffle(all_sentences)
     
     return all_sentences
 
@@ -66,11 +63,7 @@ def main():
     sentences = generate_sample_text()
     print(f"✓ 生成了 {len(sentences)} 个训练句子")
     
-    # 创建临时文件保存训练数据
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        for sentence in sentences:
-            f.write(sentence + '\n')
-        training_file = f.name
+    model_file = "unigram_tokenizer.json"
     
     try:
         # 创建空的Unigram分词器
@@ -80,19 +73,13 @@ def main():
         
         # 设置训练参数
         vocab_size = 1000  # 词汇表大小
-        special_tokens = ["<pad>", "<unk>", "<s>", "</s>"]  # 特殊token
         
         print(f"\n3. 开始训练分词器...")
         print(f"   词汇表大小: {vocab_size}")
-        print(f"   特殊tokens: {special_tokens}")
-        print(f"   训练文件: {training_file}")
+        print(f"   训练句子: {len(sentences)} 条")
         
-        # 训练分词器
-        tokenizer.train(
-            files=[training_file],
-            vocab_size=vocab_size,
-            special_tokens=special_tokens
-        )
+        # 直接用内存中的句子训练，无需写入临时文件
+        tokenizer.train(sentences, vocab_size)
         
         print("✓ 分词器训练完成")
         
@@ -115,11 +102,15 @@ def main():
         else:
             print("✗ 编码解码不一致")
         
+        # 一次性获取词汇表和分数快照，避免逐个ID跨越FFI边界
+        vocab = tokenizer.get_vocab()
+        scores = tokenizer.get_scores()
+        
         # 显示一些词汇表内容
         print("\n5. 词汇表示例 (前20个):")
-        for i in range(min(20, tokenizer.get_vocab_size())):
-            token = tokenizer.id_to_token(i)
-            score = tokenizer.get_score(i) if hasattr(tokenizer, 'get_score') else None
+        for i in range(min(20, len(vocab))):
+            token = vocab.get(i)
+            score = scores[i] if i < len(scores) else None
             if score is not None:
                 print(f"  ID {i}: '{token}' (概率: {score:.4f})")
             else:
@@ -133,15 +124,14 @@ def main():
             word_tokens = tokenizer.encode(word)
             if word_tokens:
                 token_id = word_tokens[0]
-                token = tokenizer.id_to_token(token_id)
-                score = tokenizer.get_score(token_id) if hasattr(tokenizer, 'get_score') else None
+                token = vocab.get(token_id)
+                score = scores[token_id] if token_id < len(scores) else None
                 if score is not None:
                     print(f"  '{token}': {score:.4f}")
                 else:
                     print(f"  '{token}': 分数不可用")
         
         # 保存训练好的分词器
-        model_file = "unigram_tokenizer.json"
         print(f"\n7. 保存训练好的分词器到 {model_file}...")
         tokenizer.save(model_file)
         print("✓ 分词器保存成功")
@@ -160,8 +150,7 @@ def main():
             print("✗ 加载的分词器与原始分词器不一致")
         
     finally:
-        # 清理临时文件
-        os.unlink(training_file)
+        # 清理模型文件
         if os.path.exists(model_file):
             os.unlink(model_file)
     
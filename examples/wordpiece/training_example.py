@@ -9,7 +9,6 @@ WordPiece是一种基于子词的分词方法，它通过最大化训练数据
 import sys
 import os
 import tempfile
-import random
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -59,9 +58,8 @@ def generate_sample_text():
         "The unbelievable performance of the model surprised everyone."
     ]
     
-    # 混合所有句子，并添加一些随机变化
+    # 混合所有句子（训练只依赖语料统计，与顺序无关，无需打乱）
     all_sentences = chinese_sentences + english_sentences + compound_sentences
-    random.shuffle(all_sentences)
     
     return all_sentences
 
@@ -42,6 +42,10 @@ def main():
     vocab_size = tokenizer.get_vocab_size()
     print(f"当前词汇表大小: {vocab_size}")
     
+    # 词汇表已固定，生成稠密转移表加速编码
+    if tokenizer.compile():
+        print("✓ 已为固定词汇表生成稠密转移表")
+    
     # 测试编码化学元素
     test_texts = ["氢", "Li", "氢Li", "氢氧化锂"]
     
@@ -6,12 +6,63 @@ This package provides various tokenization algorithms including:
 - BBPE (Byte-level BPE)
 - Unigram Language Model
 - WordPiece
+
+BBPETokenizer.encode accepts either ``str`` or UTF-8 encoded bytes-like
+objects (``bytes``, ``bytearray``, ``memoryview``). Passing bytes directly
+skips the ``.decode('utf-8')`` round trip when the data already comes from
+a binary source such as a file::
+
+    with open("corpus.txt", "rb") as f:
+        ids = tokenizer.encode(f.read())
+
+The BPE ``Tokenizer`` takes the same bytes-like inputs through
+``Tokenizer.encode_bytes``.
+
+``get_tokenizer`` returns a process-wide BPE tokenizer with the given
+``dict/`` vocabularies already loaded and compiled. Repeated calls with the
+same files reuse that instance instead of re-reading the dictionaries::
+
+    tokenizer = get_tokenizer(["常用汉字字表.txt"])
 """
 
+import functools
+import os
+
 from ._zero_tokenizer import Tokenizer, BBPETokenizer, UnigramTokenizer, WordPieceTokenizer
 
 __version__ = "0.1.0"
-__all__ = ["Tokenizer", "BBPETokenizer", "UnigramTokenizer", "WordPieceTokenizer"]
+__all__ = [
+    "Tokenizer",
+    "BBPETokenizer",
+    "UnigramTokenizer",
+    "WordPieceTokenizer",
+    "get_tokenizer",
+]
+
+
+@functools.lru_cache(maxsize=4)
+def _build_tokenizer(dict_dir, dict_files):
+    # dict_dir only keys the cache; the files are read from dict/ under the
+    # current working directory, which resolves to dict_dir at call time.
+    tokenizer = Tokenizer()
+    tokenizer.load_vocab_from_dicts(list(dict_files))
+    tokenizer.compile()
+    return tokenizer
+
+
+def get_tokenizer(dict_files=()):
+    """Return a shared BPE tokenizer with all of ``dict_files`` loaded.
+
+    The vocabularies are merged, with ids assigned in file order.
+
+    The files are read from ``dict/`` under the current working directory.
+    The instance is cached per resolved ``dict/`` directory and sequence of
+    file names, so changing directory never returns a tokenizer built from
+    another ``dict/``. It is shared by every caller and must be treated as
+    read-only: train or load into a fresh ``Tokenizer()`` instead. A failed
+    load is not cached.
+    """
+    return _build_tokenizer(os.path.abspath("dict"), tuple(dict_files))
 
 # 为了向后兼容，创建别名
 BPETokenizer = Tokenizer
\ No newline at end of file
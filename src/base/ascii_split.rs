@@ -0,0 +1,212 @@
+//! 纯ASCII文本的GPT-4预分词快速路径
+//!
+//! 对纯ASCII输入按 [`GPT4_PATTERN`](crate::base::tokenizer_base::GPT4_PATTERN)
+//! 的语义直接切分，不经过正则引擎。字符分类使用SWAR（单寄存器内SIMD）：
+//! 一次读取8个字节到 `u64`，用加法进位把每个字节的比较结果放到该字节的最高位，
+//! 连续同类字节（字母、空白、标点）的长度由第一个不匹配字节的位置直接得出。
+//!
+//! 中文文本中的CJK统一表意文字在模式中只会落在 `\p{L}+` 分支，
+//! 把它们的每个字节替换为ASCII字母后即可复用同一套切分逻辑。
+
+/// 每个字节均为 0x01
+const LO: u64 = 0x0101_0101_0101_0101;
+/// 每个字节的最高位
+const HI: u64 = 0x8080_8080_8080_8080;
+
+/// 每个字节加上 `n`；字节均小于0x80且 `n <= 0x80` 时不会向相邻字节进位
+#[inline(always)]
+fn add(word: u64, n: u8) -> u64 {
+    word.wrapping_add(LO * n as u64)
+}
+
+/// 字节 `>= n` 的位置最高位置1（`1 <= n <= 0x80`）
+#[inline(always)]
+fn ge(word: u64, n: u8) -> u64 {
+    add(word, 0x80 - n) & HI
+}
+
+/// 字节等于 `c` 的位置最高位置1
+#[inline(always)]
+fn eq(word: u64, c: u8) -> u64 {
+    !add(word ^ (LO * c as u64), 0x7f) & HI
+}
+
+/// ASCII字母：先 `| 0x20` 统一为小写，再判断是否落在 `a..=z`
+#[inline(always)]
+fn letter_mask(word: u64) -> u64 {
+    let lower = word | (LO * 0x20);
+    ge(lower, b'a') & !ge(lower, b'z' + 1)
+}
+
+#[inline(always)]
+fn digit_mask(word: u64) -> u64 {
+    ge(word, b'0') & !ge(word, b'9' + 1)
+}
+
+/// 空白字符：`\t \n \v \f \r` 和空格，与正则中的 `\s` 在ASCII范围内一致
+#[inline(always)]
+fn space_mask(word: u64) -> u64 {
+    (ge(word, b'\t') & !ge(word, b'\r' + 1)) | eq(word, b' ')
+}
+
+/// 标点及其他字符：既不是字母、数字，也不是空白
+#[inline(always)]
+fn punct_mask(word: u64) -> u64 {
+    !(letter_mask(word) | digit_mask(word) | space_mask(word)) & HI
+}
+
+#[inline(always)]
+fn is_letter(b: u8) -> bool {
+    b.is_ascii_alphabetic()
+}
+
+#[inline(always)]
+fn is_digit(b: u8) -> bool {
+    b.is_ascii_digit()
+}
+
+#[inline(always)]
+fn is_space(b: u8) -> bool {
+    matches!(b, b'\t'..=b'\r' | b' ')
+}
+
+#[inline(always)]
+fn is_punct(b: u8) -> bool {
+    !is_letter(b) && !is_digit(b) && !is_space(b)
+}
+
+#[inline(always)]
+fn is_newline(b: u8) -> bool {
+    b == b'\r' || b == b'\n'
+}
+
+/// 从 `start` 开始连续属于同一类的字节数，每次比较8个字节，末尾不足8个时逐字节处理
+#[inline(always)]
+fn run_len(bytes: &[u8], start: usize, mask: fn(u64) -> u64, class: fn(u8) -> bool) -> usize {
+    let mut i = start;
+    while let Some(chunk) = bytes.get(i..i + 8) {
+        let word = u64::from_le_bytes(chunk.try_into().unwrap());
+        let miss = !mask(word) & HI;
+        if miss != 0 {
+            return i + (miss.trailing_zeros() / 8) as usize - start;
+        }
+        i += 8;
+    }
+    while i < bytes.len() && class(bytes[i]) {
+        i += 1;
+    }
+    i - start
+}
+
+/// 从 `i` 开始的片段结束位置，依次对应 GPT-4 模式中的各个分支
+#[inline]
+fn piece_end(bytes: &[u8], i: usize) -> usize {
+    let n = bytes.len();
+    let c = bytes[i];
+
+    // '(?i:[sdmt]|ll|ve|re)
+    if c == b'\'' && i + 1 < n {
+        let next = bytes[i + 1] | 0x20;
+        if matches!(next, b's' | b'd' | b'm' | b't') {
+            return i + 2;
+        }
+        if i + 2 < n {
+            let pair = (next, bytes[i + 2] | 0x20);
+            if matches!(pair, (b'l', b'l') | (b'v', b'e') | (b'r', b'e')) {
+                return i + 3;
+            }
+        }
+    }
+
+    // [^\r\n\p{L}\p{N}]?+\p{L}+
+    if is_letter(c) {
+        return i + run_len(bytes, i, letter_mask, is_letter);
+    }
+    if !is_newline(c) && !is_digit(c) && i + 1 < n && is_letter(bytes[i + 1]) {
+        return i + 1 + run_len(bytes, i + 1, letter_mask, is_letter);
+    }
+
+    // \p{N}{1,3}
+    if is_digit(c) {
+        let mut end = i + 1;
+        while end < n && end < i + 3 && is_digit(bytes[end]) {
+            end += 1;
+        }
+        return end;
+    }
+
+    // ' ?[^\s\p{L}\p{N}]++[\r\n]*'
+    let start = if c == b' ' { i + 1 } else { i };
+    if start < n && is_punct(bytes[start]) {
+        let mut end = start + run_len(bytes, start, punct_mask, is_punct);
+        while end < n && is_newline(bytes[end]) {
+            end += 1;
+        }
+        return end;
+    }
+
+    // 剩下的情况 `c` 一定是空白
+    let space_end = i + run_len(bytes, i, space_mask, is_space);
+
+    // \s*[\r\n]：到空白串中最后一个换行为止
+    if let Some(pos) = bytes[i..space_end].iter().rposition(|&b| is_newline(b)) {
+        return i + pos + 1;
+    }
+    // \s+(?!\S)：位于末尾时取整串，否则留下最后一个空白给后面的片段
+    if space_end == n {
+        return n;
+    }
+    if space_end - i >= 2 {
+        return space_end - 1;
+    }
+    // \s+
+    space_end
+}
+
+/// 按片段切分ASCII字节序列，`text` 与 `bytes` 等长且片段边界处为字符边界
+fn split_bytes<'t>(text: &'t str, bytes: &[u8]) -> Vec<&'t str> {
+    let mut pieces = Vec::with_capacity(bytes.len() / 4 + 1);
+    let mut i = 0;
+    while i < bytes.len() {
+        let end = piece_end(bytes, i);
+        pieces.push(&text[i..end]);
+        i = end;
+    }
+    pieces
+}
+
+/// 按GPT-4模式切分纯ASCII文本，结果与正则表达式 `find_iter` 一致
+///
+/// 调用方需保证 `text` 只包含ASCII字符
+pub fn split_gpt4_ascii(text: &str) -> Vec<&str> {
+    debug_assert!(text.is_ascii());
+    split_bytes(text, text.as_bytes())
+}
+
+/// CJK统一表意文字基本区，其中的字符均属于 `\p{L}`（Lo），UTF-8编码均为3字节
+const CJK_IDEOGRAPHS: std::ops::RangeInclusive<char> = '\u{4E00}'..='\u{9FFF}';
+
+/// 按GPT-4模式切分只含ASCII和CJK统一表意文字的文本，结果与正则表达式 `find_iter` 一致
+///
+/// 每个表意文字的3个字节都替换为 `a`：它们总是整体落在同一个字母片段中，
+/// 也不会与 `'s` 等缩写分支匹配，因此替换后的切分位置与原文完全相同。
+/// 含其他非ASCII字符（全角标点、假名、其他文种等）时返回 `None`，由调用方回到正则表达式
+pub fn split_gpt4_cjk(text: &str) -> Option<Vec<&str>> {
+    let bytes = text.as_bytes();
+    let mut mapped = Vec::with_capacity(bytes.len());
+    let mut i = 0;
+    while i < bytes.len() {
+        if bytes[i] < 0x80 {
+            mapped.push(bytes[i]);
+            i += 1;
+            continue;
+        }
+        let ch = text[i..].chars().next()?;
+        if !CJK_IDEOGRAPHS.contains(&ch) {
+            return None;
+        }
+        mapped.extend_from_slice(b"aaa");
+        i += 3;
+    }
+    Some(split_bytes(text, &mapped))
+}
@@ -0,0 +1,242 @@
+use ahash::AHashMap;
+use smallvec::SmallVec;
+
+/// 稠密转移表的默认大小上限（字节）
+pub const DENSE_TABLE_MAX_BYTES: usize = 8 << 20;
+
+/// 单个预分词片段的分段结果，16个标记以内内联存放，不单独分配堆内存
+pub type Segment = SmallVec<[u32; 16]>;
+
+/// 字节前缀树，用于词汇表的最长匹配查找
+///
+/// 从某个位置开始只需沿树向下走一次即可找到最长匹配的标记，
+/// 代价与匹配长度成正比，而与词汇表大小无关。
+/// 根节点按首字节切分为256个子树，首字节直接查表分派，其余层级在有序子节点中二分查找。
+/// 词汇表固定后可调用 [`compile`](Self::compile) 生成稠密转移表，查找时每个字节只需一次查表
+#[derive(Debug, Clone)]
+pub struct ByteTrie {
+    /// 节点数组，下标0为根节点
+    nodes: Vec<TrieNode>,
+    /// 首字节 -> 子树根节点下标，0表示该首字节没有标记
+    root: [u32; 256],
+    /// 已插入的标记数量
+    len: usize,
+    /// 稠密转移表（未编译时为 `None`），插入新标记后失效
+    dense: Option<DenseTable>,
+}
+
+/// 稠密转移表
+///
+/// 在所有节点上转移完全相同的字节归为同一字节类，
+/// 每个节点占一行、每个字节类占一列，单元格为子节点下标（0表示无转移）
+#[derive(Debug, Clone)]
+struct DenseTable {
+    /// 字节 -> 字节类
+    classes: [u8; 256],
+    /// 每行的列数（字节类数量）
+    stride: usize,
+    /// 按行存放的转移表
+    transitions: Vec<u32>,
+}
+
+#[derive(Debug, Clone, Default)]
+struct TrieNode {
+    /// 子节点：(字节, 节点下标)，按字节升序排列
+    children: Vec<(u8, u32)>,
+    /// 以该节点结尾的标记ID
+    token_id: Option<u32>,
+}
+
+impl ByteTrie {
+    /// 创建空的前缀树
+    pub fn new() -> Self {
+        Self {
+            nodes: vec![TrieNode::default()],
+            root: [0; 256],
+            len: 0,
+            dense: None,
+        }
+    }
+
+    /// 查找子节点
+    #[inline]
+    fn child(&self, node: usize, byte: u8) -> Option<usize> {
+        if node == 0 {
+            return match self.root[byte as usize] {
+                0 => None,
+                child => Some(child as usize),
+            };
+        }
+        let children = &self.nodes[node].children;
+        children
+            .binary_search_by_key(&byte, |&(b, _)| b)
+            .ok()
+            .map(|pos| children[pos].1 as usize)
+    }
+
+    /// 插入标记的字节序列，相同字节序列保留较小的ID
+    pub fn insert(&mut self, bytes: &[u8], token_id: u32) {
+        if bytes.is_empty() {
+            return;
+        }
+        self.dense = None;
+
+        let mut node = 0usize;
+        for &byte in bytes {
+            node = match self.child(node, byte) {
+                Some(child) => child,
+                None => {
+                    let child = self.nodes.len();
+                    self.nodes.push(TrieNode::default());
+                    if node == 0 {
+                        self.root[byte as usize] = child as u32;
+                    } else {
+                        let children = &mut self.nodes[node].children;
+                        let pos = children.partition_point(|&(b, _)| b < byte);
+                        children.insert(pos, (byte, child as u32));
+                    }
+                    child
+                }
+            };
+        }
+
+        let slot = &mut self.nodes[node].token_id;
+        match slot {
+            Some(existing) if *existing <= token_id => {}
+            Some(existing) => *existing = token_id,
+            None => {
+                *slot = Some(token_id);
+                self.len += 1;
+            }
+        }
+    }
+
+    /// 查找 `bytes` 开头的最长匹配，返回 (标记ID, 匹配长度)
+    #[inline]
+    pub fn longest_match(&self, bytes: &[u8]) -> Option<(u32, usize)> {
+        let mut best = None;
+        self.for_each_prefix_match(bytes, |token_id, len| best = Some((token_id, len)));
+        best
+    }
+
+    /// 依次回调 `bytes` 开头的所有匹配（按匹配长度升序），参数为 (标记ID, 匹配长度)
+    #[inline]
+    pub fn for_each_prefix_match(&self, bytes: &[u8], mut f: impl FnMut(u32, usize)) {
+        if let Some(dense) = &self.dense {
+            let mut row = 0usize;
+            for (i, &byte) in bytes.iter().enumerate() {
+                let child =
+                    dense.transitions[row * dense.stride + dense.classes[byte as usize] as usize];
+                if child == 0 {
+                    break;
+                }
+                row = child as usize;
+                if let Some(token_id) = self.nodes[row].token_id {
+                    f(token_id, i + 1);
+                }
+            }
+            return;
+        }
+
+        let mut node = 0usize;
+
+        for (i, &byte) in bytes.iter().enumerate() {
+            match self.child(node, byte) {
+                Some(child) => node = child,
+                None => break,
+            }
+            if let Some(token_id) = self.nodes[node].token_id {
+                f(token_id, i + 1);
+            }
+        }
+    }
+
+    /// 为固定的词汇表生成稠密转移表
+    ///
+    /// 转移表大小为 节点数 × 字节类数，超过 `max_bytes` 时不编译并返回 `false`。
+    /// 小词汇表（如只含几百个字符）的整张表可以放进L1缓存，查找时不再二分查找子节点
+    pub fn compile(&mut self, max_bytes: usize) -> bool {
+        // 逐节点细分字节类：两个字节只有在每个节点上都转移到同一子节点时才属于同一类
+        let mut classes = [0u8; 256];
+        let mut num_classes = 1usize;
+        let mut refine = |targets: &dyn Fn(u8) -> u32| {
+            let mut remap: AHashMap<(u8, u32), u8> = AHashMap::new();
+            let mut next = [0u8; 256];
+            for byte in 0..=255u8 {
+                let key = (classes[byte as usize], targets(byte));
+                let len = remap.len();
+                next[byte as usize] = *remap.entry(key).or_insert(len as u8);
+            }
+            classes = next;
+            num_classes = remap.len();
+        };
+        refine(&|byte| self.root[byte as usize]);
+        for node in self.nodes.iter().filter(|node| !node.children.is_empty()) {
+            refine(&|byte| {
+                node.children
+                    .binary_search_by_key(&byte, |&(b, _)| b)
+                    .map_or(0, |pos| node.children[pos].1)
+            });
+        }
+
+        let stride = num_classes;
+        if self.nodes.len() * stride * std::mem::size_of::<u32>() > max_bytes {
+            self.dense = None;
+            return false;
+        }
+
+        let mut transitions = vec![0u32; self.nodes.len() * stride];
+        for byte in 0..=255usize {
+            transitions[classes[byte] as usize] = self.root[byte];
+        }
+        for (node, trie_node) in self.nodes.iter().enumerate().skip(1) {
+            for &(byte, child) in &trie_node.children {
+                transitions[node * stride + classes[byte as usize] as usize] = child;
+            }
+        }
+
+        self.dense = Some(DenseTable {
+            classes,
+            stride,
+            transitions,
+        });
+        true
+    }
+
+    /// 是否已生成稠密转移表
+    pub fn is_compiled(&self) -> bool {
+        self.dense.is_some()
+    }
+
+    /// 不同字节序列的标记数量
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    /// 前缀树是否为空
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+}
+
+/// 将标记字符串转换为字节序列，`<0xNN>` 表示单个字节
+///
+/// 无法解析的字节表示返回 `None`
+pub fn token_to_bytes(token_str: &str) -> Option<Vec<u8>> {
+    if token_str.starts_with("<0x") && token_str.ends_with(">") {
+        // 特殊字节表示
+        let hex_str = token_str.strip_prefix("<0x")?.strip_suffix(">")?;
+        u8::from_str_radix(hex_str, 16)
+            .ok()
+            .map(|byte_val| vec![byte_val])
+    } else {
+        // 普通字符串
+        Some(token_str.as_bytes().to_vec())
+    }
+}
+
+impl Default for ByteTrie {
+    fn default() -> Self {
+        Self::new()
+    }
+}
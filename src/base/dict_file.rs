@@ -0,0 +1,53 @@
+use std::fs::File;
+
+use memmap2::Mmap;
+
+use crate::base::utf8::str_from_utf8;
+
+/// 以内存映射方式打开的词表文件（每行一个标记）
+///
+/// 文件内容不复制到堆上，打开时即完成UTF-8校验，
+/// 调用方可以在确认文件可用之后再修改词汇表
+pub struct DictFile {
+    /// 文件映射，空文件无法映射时为 `None`
+    mmap: Option<Mmap>,
+}
+
+impl DictFile {
+    /// 打开并映射词表文件，校验其内容为合法UTF-8
+    ///
+    /// # Errors
+    ///
+    /// 当文件无法打开、映射失败或内容不是合法UTF-8时返回错误
+    pub fn open(path: &str) -> Result<Self, String> {
+        let file = File::open(path).map_err(|e| format!("无法打开词表文件: {}", e))?;
+        let len = file
+            .metadata()
+            .map_err(|e| format!("读取词表文件失败: {}", e))?
+            .len();
+
+        let mmap = if len == 0 {
+            None
+        } else {
+            // SAFETY: 映射只在加载期间只读访问，词表文件在此期间不应被截断或改写
+            let mmap =
+                unsafe { Mmap::map(&file) }.map_err(|e| format!("读取词表文件失败: {}", e))?;
+            str_from_utf8(&mmap).map_err(|e| format!("读取词表文件失败: {}", e))?;
+            Some(mmap)
+        };
+
+        Ok(Self { mmap })
+    }
+
+    /// 依次返回每行去除首尾空白后的非空标记，直接借用映射的文件内容
+    pub fn tokens(&self) -> impl Iterator<Item = &str> {
+        let text = match &self.mmap {
+            // SAFETY: `open` 中已校验映射内容为合法UTF-8
+            Some(mmap) => unsafe { std::str::from_utf8_unchecked(mmap) },
+            None => "",
+        };
+        text.lines()
+            .map(str::trim)
+            .filter(|token| !token.is_empty())
+    }
+}
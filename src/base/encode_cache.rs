@@ -0,0 +1,171 @@
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::RwLock;
+
+use compact_str::CompactString;
+use indexmap::IndexMap;
+use smallvec::SmallVec;
+
+/// 默认缓存容量（片段数）
+pub const DEFAULT_CACHE_CAPACITY: usize = 65536;
+
+/// 分片数，按片段哈希选择分片，并行写入不同分片时互不阻塞
+const SHARD_COUNT: usize = 16;
+
+/// 缓存的token ID序列，绝大多数片段只有几个token，直接内联存放而不单独分配
+type CachedIds = SmallVec<[u32; 4]>;
+
+/// 预分词片段到token ID序列的编码缓存
+///
+/// 重复出现的片段直接返回缓存结果，跳过合并循环。
+/// 缓存按片段哈希分为多个分片，每个分片各自加读写锁：
+/// 命中时只在读锁下设置访问标记，`encode_batch` 的并行任务可同时读取；
+/// 插入时只尝试获取写锁，分片正被其他线程占用时直接放弃缓存，不等待。
+/// 分片达到容量后按CLOCK算法（近似LRU）淘汰：时钟指针跳过并清除带标记的条目，
+/// 淘汰第一个未被再次访问的条目
+#[derive(Debug)]
+pub struct EncodeCache {
+    /// 缓存分片
+    shards: Box<[RwLock<CacheShard>]>,
+    /// 选择分片的哈希
+    hasher: ahash::RandomState,
+    /// 最大条目数
+    capacity: usize,
+    /// 每个分片的最大条目数
+    shard_capacity: usize,
+}
+
+#[derive(Debug, Default)]
+struct CacheShard {
+    /// 片段 -> 缓存条目，条目下标即时钟指针循环的槽位，片段只存放一份
+    entries: IndexMap<CompactString, CacheEntry, ahash::RandomState>,
+    /// 时钟指针：下一个淘汰候选的槽位下标
+    hand: usize,
+}
+
+#[derive(Debug)]
+struct CacheEntry {
+    /// 片段的token ID序列
+    ids: CachedIds,
+    /// 插入或上次扫描后是否被命中过
+    referenced: AtomicBool,
+}
+
+impl EncodeCache {
+    /// 创建指定容量的缓存，容量为0时禁用缓存
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            shards: (0..SHARD_COUNT)
+                .map(|_| RwLock::new(CacheShard::default()))
+                .collect(),
+            hasher: ahash::RandomState::new(),
+            capacity,
+            shard_capacity: capacity.div_ceil(SHARD_COUNT),
+        }
+    }
+
+    /// 片段所在的分片
+    #[inline]
+    fn shard(&self, chunk: &str) -> &RwLock<CacheShard> {
+        &self.shards[self.hasher.hash_one(chunk) as usize % SHARD_COUNT]
+    }
+
+    /// 命中时将缓存的token ID追加到 `out` 并返回 `true`
+    #[inline]
+    pub fn extend_into(&self, chunk: &str, out: &mut Vec<u32>) -> bool {
+        if self.capacity == 0 {
+            return false;
+        }
+        match self.shard(chunk).read() {
+            Ok(shard) => match shard.entries.get(chunk) {
+                Some(entry) => {
+                    // 已有标记时不再写入，避免并行读取时反复写同一缓存行
+                    if !entry.referenced.load(Ordering::Relaxed) {
+                        entry.referenced.store(true, Ordering::Relaxed);
+                    }
+                    out.extend_from_slice(&entry.ids);
+                    true
+                }
+                None => false,
+            },
+            Err(_) => false,
+        }
+    }
+
+    /// 缓存片段的编码结果，分片已满时淘汰一个最近未被访问的条目
+    ///
+    /// 分片的写锁被占用时直接返回，缓存只是加速手段，漏掉一次插入不影响结果
+    pub fn insert(&self, chunk: &str, ids: &[u32]) {
+        if self.capacity == 0 {
+            return;
+        }
+        let Ok(mut shard) = self.shard(chunk).try_write() else {
+            return;
+        };
+        if shard.entries.contains_key(chunk) {
+            return;
+        }
+
+        let key = CompactString::from(chunk);
+        let entry = CacheEntry {
+            ids: CachedIds::from_slice(ids),
+            referenced: AtomicBool::new(false),
+        };
+
+        if shard.entries.len() < self.shard_capacity {
+            shard.entries.insert(key, entry);
+            return;
+        }
+
+        // 跳过并清除带访问标记的条目，直到找到可淘汰的槽位
+        let len = shard.entries.len();
+        let mut hand = shard.hand;
+        loop {
+            let (_, slot) = shard.entries.get_index_mut(hand).unwrap();
+            if !*slot.referenced.get_mut() {
+                *slot = entry;
+                break;
+            }
+            *slot.referenced.get_mut() = false;
+            hand = (hand + 1) % len;
+        }
+        shard.hand = (hand + 1) % len;
+        // 片段不在分片中，原地替换键不会失败，也不改变其他条目的下标
+        let _ = shard.entries.replace_index(hand, key);
+    }
+
+    /// 清空缓存（合并规则或词汇表变化时调用）
+    pub fn clear(&self) {
+        for shard in self.shards.iter() {
+            if let Ok(mut shard) = shard.write() {
+                shard.entries.clear();
+                shard.hand = 0;
+            }
+        }
+    }
+
+    /// 当前缓存的片段数
+    pub fn len(&self) -> usize {
+        self.shards
+            .iter()
+            .map(|shard| shard.read().map(|shard| shard.entries.len()).unwrap_or(0))
+            .sum()
+    }
+
+    /// 缓存是否为空
+    pub fn is_empty(&self) -> bool {
+        self.len() == 0
+    }
+}
+
+impl Default for EncodeCache {
+    fn default() -> Self {
+        Self::new(DEFAULT_CACHE_CAPACITY)
+    }
+}
+
+impl Clone for EncodeCache {
+    /// 克隆时只保留容量，不复制缓存内容
+    fn clone(&self) -> Self {
+        Self::new(self.capacity)
+    }
+}
@@ -1,7 +1,8 @@
 use std::cmp::Ordering;
-use std::collections::HashSet;
 use std::hash::Hash;
 
+use ahash::AHashSet;
+
 /// 表示一个合并任务
 #[derive(Debug, Clone)]
 pub struct MergeJob<Id: Ord> {
@@ -10,7 +11,7 @@ pub struct MergeJob<Id: Ord> {
     /// 词对出现的次数
     pub count: u64,
     /// 需要处理此配对的词索引集合
-    pub pos: HashSet<usize>,
+    pub pos: AHashSet<usize>,
 }
 
 impl<Id: PartialEq + Ord> PartialEq for MergeJob<Id> {
@@ -45,7 +46,7 @@ impl<Id: Clone + Hash + Eq + Ord> MergeJob<Id> {
         Self {
             pair,
             count,
-            pos: HashSet::new(),
+            pos: AHashSet::new(),
         }
     }
 
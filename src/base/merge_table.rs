@@ -0,0 +1,287 @@
+use std::cmp::Reverse;
+use std::collections::HashMap as StdHashMap;
+
+use dary_heap::OctonaryHeap;
+
+/// 空槽位标记；键恰好等于该值的规则单独存放
+const EMPTY: u64 = u64::MAX;
+
+/// 斐波那契散列乘数（2^64 / 黄金分割比）
+const HASH_MUL: u64 = 0x9E37_79B9_7F4A_7C15;
+
+/// 位移量的散列乘数
+const PILOT_MUL: u64 = 0xC2B2_AE3D_27D4_EB4F;
+
+/// 平均每个桶的键数
+const KEYS_PER_BUCKET: usize = 4;
+
+/// 每个桶尝试的位移量上限，超过后换种子重建
+const MAX_PILOT: u32 = u16::MAX as u32;
+
+/// 将合并对打包为单个 `u64` 键：左token在高32位，右token在低32位
+#[inline(always)]
+pub fn pack_pair(pair: &(u32, u32)) -> u64 {
+    ((pair.0 as u64) << 32) | pair.1 as u64
+}
+
+/// 把64位散列值均匀映射到 `0..n`（取乘积的高64位，避免取模）
+#[inline(always)]
+fn reduce(hash: u64, n: usize) -> usize {
+    ((hash as u128 * n as u128) >> 64) as usize
+}
+
+/// 只读合并表：以打包后的 `u64` 为键的最小完美哈希表
+///
+/// 训练或加载完成后由合并规则一次性构建（hash-and-displace）：
+/// 键先按散列值分到若干个桶，再为每个桶找一个位移量，使桶内所有键落到互不冲突的空槽位。
+/// 查找时读一次桶的位移量、算出唯一的槽位、比较一次键即可，没有探测；
+/// 槽位数只比规则数多约10%，表更容易留在缓存中
+#[derive(Debug, Clone, Default)]
+pub struct MergeTable {
+    /// 每个桶的位移量
+    pilots: Vec<u16>,
+    /// (打包后的合并对, 新token ID)，空槽位的键为 [`EMPTY`]
+    slots: Vec<(u64, u32)>,
+    /// 散列种子，构建失败换种子重试
+    seed: u64,
+    /// 键等于 [`EMPTY`] 的规则（合并对为 `(u32::MAX, u32::MAX)`）
+    overflow: Option<u32>,
+    /// 规则数量
+    len: usize,
+}
+
+impl MergeTable {
+    /// 从合并规则构建合并表
+    pub fn from_merges(merges: &StdHashMap<(u32, u32), u32>) -> Self {
+        let mut overflow = None;
+        let mut entries: Vec<(u64, u32)> = Vec::with_capacity(merges.len());
+        for (pair, &id) in merges {
+            let key = pack_pair(pair);
+            if key == EMPTY {
+                overflow = Some(id);
+            } else {
+                entries.push((key, id));
+            }
+        }
+
+        let mut seed = 0u64;
+        loop {
+            if let Some(mut table) = Self::build(&entries, seed) {
+                table.overflow = overflow;
+                table.len = merges.len();
+                return table;
+            }
+            seed += 1;
+        }
+    }
+
+    /// 以给定种子构建，某个桶找不到可用位移量时返回 `None`
+    fn build(entries: &[(u64, u32)], seed: u64) -> Option<Self> {
+        let num_buckets = entries.len().div_ceil(KEYS_PER_BUCKET).max(1);
+        // 重试时逐步增加空槽位，保证构建总能结束
+        let num_slots = (entries.len() + entries.len() / 10 + seed as usize).max(1);
+        let mut table = Self {
+            pilots: vec![0; num_buckets],
+            slots: vec![(EMPTY, 0); num_slots],
+            seed,
+            overflow: None,
+            len: 0,
+        };
+
+        // 按桶分组，键多的桶先放，此时空槽位最多
+        let mut buckets: Vec<Vec<(u64, u64, u32)>> = vec![Vec::new(); num_buckets];
+        for &(key, id) in entries {
+            let hash = table.hash(key);
+            buckets[reduce(hash, num_buckets)].push((hash, key, id));
+        }
+        let mut order: Vec<usize> = (0..num_buckets).collect();
+        order.sort_unstable_by_key(|&bucket| Reverse(buckets[bucket].len()));
+
+        let mut taken: Vec<usize> = Vec::with_capacity(KEYS_PER_BUCKET * 2);
+        for bucket in order {
+            let keys = &buckets[bucket];
+            if keys.is_empty() {
+                break;
+            }
+            let pilot = (0..=MAX_PILOT).find(|&pilot| {
+                taken.clear();
+                keys.iter().all(|&(hash, _, _)| {
+                    let slot = table.slot(hash, pilot as u16);
+                    let free = table.slots[slot].0 == EMPTY && !taken.contains(&slot);
+                    taken.push(slot);
+                    free
+                })
+            })?;
+
+            table.pilots[bucket] = pilot as u16;
+            for &(hash, key, id) in keys {
+                let slot = table.slot(hash, pilot as u16);
+                table.slots[slot] = (key, id);
+            }
+        }
+        Some(table)
+    }
+
+    /// 键的散列值
+    #[inline(always)]
+    fn hash(&self, key: u64) -> u64 {
+        let x = (key ^ self.seed).wrapping_mul(HASH_MUL);
+        x ^ (x >> 32)
+    }
+
+    /// 散列值在给定位移量下的槽位
+    #[inline(always)]
+    fn slot(&self, hash: u64, pilot: u16) -> usize {
+        let x = (hash ^ (pilot as u64).wrapping_mul(PILOT_MUL)).wrapping_mul(HASH_MUL);
+        reduce(x, self.slots.len())
+    }
+
+    /// 查找合并对对应的新token ID
+    #[inline]
+    pub fn get(&self, pair: &(u32, u32)) -> Option<u32> {
+        let key = pack_pair(pair);
+        if key == EMPTY {
+            return self.overflow;
+        }
+        if self.pilots.is_empty() {
+            return None;
+        }
+        let hash = self.hash(key);
+        let pilot = self.pilots[reduce(hash, self.pilots.len())];
+        let (slot_key, id) = self.slots[self.slot(hash, pilot)];
+        (slot_key == key).then_some(id)
+    }
+
+    /// 合并表中的规则数量
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    /// 合并表是否为空
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    /// 清空合并表
+    pub fn clear(&mut self) {
+        *self = Self::default();
+    }
+}
+
+/// 片段长度不超过该值时直接线性扫描，避免为短片段分配链表和堆
+const LINEAR_MERGE_MAX_LEN: usize = 16;
+
+/// 按合并等级应用合并规则
+///
+/// `lookup` 返回合并对对应的新token ID，新ID即合并等级（训练时越早学到的合并ID越小），
+/// 每次合并当前序列中等级最低的相邻对，等级相同时取最左侧的一对。
+/// 短序列每轮线性扫描；长序列使用双向链表维护存活的token，
+/// 小顶堆维护候选合并对，弹出时校验两端token以跳过过期条目，整体为 O(n log n)
+pub fn merge_by_rank(ids: &mut Vec<u32>, lookup: impl Fn(&(u32, u32)) -> Option<u32>) {
+    if ids.len() < 2 {
+        return;
+    }
+    if ids.len() <= LINEAR_MERGE_MAX_LEN {
+        merge_by_rank_linear(ids, lookup);
+    } else {
+        merge_by_rank_heap(ids, lookup);
+    }
+}
+
+/// 短序列：每个相邻对的等级缓存在栈上数组中
+///
+/// 每轮只在等级数组中找最小值，合并后只重新查找与新token相邻的两对，
+/// 其余相邻对不再重复查表
+fn merge_by_rank_linear(ids: &mut Vec<u32>, lookup: impl Fn(&(u32, u32)) -> Option<u32>) {
+    // 没有合并规则的相邻对记为 `u32::MAX`，合并产生的token ID不会达到该值
+    let rank_of = |left: u32, right: u32| lookup(&(left, right)).unwrap_or(u32::MAX);
+
+    // ranks[i] 为 (ids[i], ids[i + 1]) 的等级
+    let mut ranks = [u32::MAX; LINEAR_MERGE_MAX_LEN];
+    for i in 0..ids.len() - 1 {
+        ranks[i] = rank_of(ids[i], ids[i + 1]);
+    }
+
+    while ids.len() >= 2 {
+        let num_pairs = ids.len() - 1;
+        // 等级相同时 `min_by_key` 返回最左侧的一对
+        let (i, rank) = ranks[..num_pairs]
+            .iter()
+            .copied()
+            .enumerate()
+            .min_by_key(|&(_, rank)| rank)
+            .unwrap();
+        if rank == u32::MAX {
+            break;
+        }
+
+        ids[i] = rank;
+        ids.remove(i + 1);
+        // 以被合并掉的token开头的一对消失，其后各对前移一位
+        if i + 2 < num_pairs {
+            ranks.copy_within(i + 2..num_pairs, i + 1);
+        }
+        if i > 0 {
+            ranks[i - 1] = rank_of(ids[i - 1], ids[i]);
+        }
+        if i + 1 < ids.len() {
+            ranks[i] = rank_of(ids[i], ids[i + 1]);
+        }
+    }
+}
+
+/// 长序列：双向链表 + 小顶堆
+fn merge_by_rank_heap(ids: &mut Vec<u32>, lookup: impl Fn(&(u32, u32)) -> Option<u32>) {
+    const NONE: usize = usize::MAX;
+
+    let n = ids.len();
+    let mut prev: Vec<usize> = (0..n).map(|i| i.wrapping_sub(1)).collect();
+    let mut next: Vec<usize> = (1..=n).map(|i| if i < n { i } else { NONE }).collect();
+    let mut alive = vec![true; n];
+
+    // 堆元素：(等级, 左端位置, 左token, 右token)，按等级和位置取最小
+    let mut heap = OctonaryHeap::with_capacity(n);
+    for i in 0..n - 1 {
+        if let Some(rank) = lookup(&(ids[i], ids[i + 1])) {
+            heap.push(Reverse((rank, i, ids[i], ids[i + 1])));
+        }
+    }
+
+    while let Some(Reverse((rank, i, left, right))) = heap.pop() {
+        let j = next[i];
+        // 左端已被合并掉，或两端token已变化：条目过期
+        if !alive[i] || j == NONE || ids[i] != left || ids[j] != right {
+            continue;
+        }
+
+        ids[i] = rank;
+        alive[j] = false;
+        next[i] = next[j];
+        if next[j] != NONE {
+            prev[next[j]] = i;
+        }
+
+        // 与左右邻居形成的新合并对
+        let p = prev[i];
+        if p != NONE {
+            if let Some(rank) = lookup(&(ids[p], ids[i])) {
+                heap.push(Reverse((rank, p, ids[p], ids[i])));
+            }
+        }
+        let q = next[i];
+        if q != NONE {
+            if let Some(rank) = lookup(&(ids[i], ids[q])) {
+                heap.push(Reverse((rank, i, ids[i], ids[q])));
+            }
+        }
+    }
+
+    let mut write = 0;
+    for read in 0..n {
+        if alive[read] {
+            ids[write] = ids[read];
+            write += 1;
+        }
+    }
+    ids.truncate(write);
+}
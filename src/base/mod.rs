@@ -1,5 +1,18 @@
+pub mod ascii_split;
+pub mod byte_trie;
+pub mod dict_file;
+pub mod encode_cache;
 pub mod merge_job;
+pub mod merge_table;
+pub mod packed;
+#[cfg(feature = "pcre2")]
+pub mod pcre2_jit;
+#[cfg(feature = "python")]
+pub mod py_input;
+pub mod scratch;
+pub mod token_table;
 pub mod tokenizer_base;
 pub mod traits;
+pub mod utf8;
 pub mod vocab_manager;
 pub mod word;
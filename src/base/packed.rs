@@ -0,0 +1,82 @@
+#[cfg(feature = "python")]
+use pyo3::prelude::*;
+#[cfg(feature = "python")]
+use pyo3::types::PyBytes;
+
+/// 将token IDs按小端u32写入 `out`，`out` 的长度必须为 `ids.len() * 4`
+///
+/// Python端可用 `np.frombuffer(data, dtype="<u4")` 零拷贝得到数组
+#[inline]
+pub fn write_ids(ids: &[u32], out: &mut [u8]) {
+    debug_assert_eq!(out.len(), ids.len() * 4);
+    for (chunk, id) in out.chunks_exact_mut(4).zip(ids) {
+        chunk.copy_from_slice(&id.to_le_bytes());
+    }
+}
+
+/// 将小端u32打包的字节序列还原为token IDs
+pub fn unpack_ids(data: &[u8]) -> Result<Vec<u32>, String> {
+    if data.len() % 4 != 0 {
+        return Err(format!("打包数据长度 {} 不是4的倍数", data.len()));
+    }
+    Ok(data
+        .chunks_exact(4)
+        .map(|b| u32::from_le_bytes([b[0], b[1], b[2], b[3]]))
+        .collect())
+}
+
+/// 将多组token IDs的Arrow `ListArray` 偏移按小端u64写入 `out`
+///
+/// 共 组数+1 个元素，第i组为 `values[offsets[i]..offsets[i + 1]]`（按元素计）；
+/// `out` 的长度必须为 `(batches.len() + 1) * 8`
+pub fn write_flat_offsets(batches: &[Vec<u32>], out: &mut [u8]) {
+    debug_assert_eq!(out.len(), (batches.len() + 1) * 8);
+    let mut offset = 0u64;
+    let mut chunks = out.chunks_exact_mut(8);
+    for ids in batches {
+        chunks
+            .next()
+            .unwrap()
+            .copy_from_slice(&offset.to_le_bytes());
+        offset += ids.len() as u64;
+    }
+    chunks
+        .next()
+        .unwrap()
+        .copy_from_slice(&offset.to_le_bytes());
+}
+
+/// 将token IDs直接写入新建的 `bytes` 对象，不经过中间缓冲区
+#[cfg(feature = "python")]
+pub fn ids_to_pybytes<'py>(py: Python<'py>, ids: &[u32]) -> PyResult<Bound<'py, PyBytes>> {
+    PyBytes::new_with(py, ids.len() * 4, |buf| {
+        write_ids(ids, buf);
+        Ok(())
+    })
+}
+
+/// 将多组token IDs展平为Arrow `ListArray` 布局的 `(values, offsets)` 两个 `bytes` 对象
+///
+/// `values` 为所有ID依次拼接后的小端u32字节序列，`offsets` 为小端u64字节序列，
+/// 两者都直接写入 `bytes` 对象的缓冲区。Python端可分别用 `np.frombuffer` 零拷贝得到两个数组
+#[cfg(feature = "python")]
+pub fn flat_to_pybytes<'py>(
+    py: Python<'py>,
+    batches: &[Vec<u32>],
+) -> PyResult<(Bound<'py, PyBytes>, Bound<'py, PyBytes>)> {
+    let total: usize = batches.iter().map(Vec::len).sum();
+    let values = PyBytes::new_with(py, total * 4, |buf| {
+        let mut start = 0;
+        for ids in batches {
+            let end = start + ids.len() * 4;
+            write_ids(ids, &mut buf[start..end]);
+            start = end;
+        }
+        Ok(())
+    })?;
+    let offsets = PyBytes::new_with(py, (batches.len() + 1) * 8, |buf| {
+        write_flat_offsets(batches, buf);
+        Ok(())
+    })?;
+    Ok((values, offsets))
+}
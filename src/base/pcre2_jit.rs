@@ -0,0 +1,57 @@
+//! PCRE2 JIT预分词后端（需启用 `pcre2` 特性）
+//!
+//! fancy-regex 对 GPT-4 模式中的占有量词和前瞻需要回溯求值，
+//! PCRE2 的JIT会把整个模式编译为机器码，非ASCII文本的预分词因此更快。
+//! 模式按字符串在进程内只编译一次；PCRE2 不支持的模式缓存为 `None`，调用方退回到 fancy-regex
+
+use ahash::AHashMap;
+use pcre2::bytes::{Regex, RegexBuilder};
+use std::sync::{Arc, OnceLock, RwLock};
+
+/// 进程内共享的JIT正则缓存（模式字符串 -> 已编译正则，编译失败为 `None`）
+static JIT_CACHE: OnceLock<RwLock<AHashMap<String, Option<Arc<Regex>>>>> = OnceLock::new();
+
+/// JIT正则缓存的模式数量上限
+const JIT_CACHE_CAPACITY: usize = 64;
+
+/// 获取模式对应的JIT正则，PCRE2 无法编译该模式时返回 `None`
+pub fn jit_regex(pattern: &str) -> Option<Arc<Regex>> {
+    let cache = JIT_CACHE.get_or_init(|| RwLock::new(AHashMap::new()));
+    if let Ok(map) = cache.read() {
+        if let Some(regex) = map.get(pattern) {
+            return regex.clone();
+        }
+    }
+
+    // utf + ucp：按码点匹配，`\s`、`\p{L}` 等使用Unicode语义，与 fancy-regex 保持一致
+    let regex = RegexBuilder::new()
+        .utf(true)
+        .ucp(true)
+        .jit_if_available(true)
+        .build(pattern)
+        .ok()
+        .map(Arc::new);
+    if let Ok(mut map) = cache.write() {
+        if map.len() < JIT_CACHE_CAPACITY {
+            map.entry(pattern.to_string())
+                .or_insert_with(|| regex.clone());
+        }
+    }
+    regex
+}
+
+/// 用JIT正则切分文本，返回借用原文本的片段
+///
+/// # Errors
+///
+/// 当匹配过程出错（如超出匹配限制）时返回错误
+pub fn find_pieces<'t>(regex: &Regex, text: &'t str) -> Result<Vec<&'t str>, String> {
+    regex
+        .find_iter(text.as_bytes())
+        // utf 模式下匹配边界一定落在字符边界上
+        .map(|mat| {
+            mat.map(|m| &text[m.start()..m.end()])
+                .map_err(|e| format!("正则表达式匹配失败: {}", e))
+        })
+        .collect()
+}
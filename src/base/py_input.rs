@@ -0,0 +1,132 @@
+use std::ffi::{c_char, c_int};
+
+use pyo3::ffi;
+use pyo3::prelude::*;
+use pyo3::pybacked::{PyBackedBytes, PyBackedStr};
+use pyo3::types::{PyList, PyMemoryView, PySlice, PyString, PyTuple};
+
+use crate::base::utf8::str_from_utf8;
+
+/// Python端的字节输入：`bytes`、`bytearray` 或 `memoryview`
+///
+/// `bytes` 直接借用其缓冲区，`bytearray` 复制一次，`memoryview` 通过 `tobytes()` 取得连续字节
+#[derive(FromPyObject)]
+pub enum BytesInput<'py> {
+    Bytes(PyBackedBytes),
+    View(Bound<'py, PyMemoryView>),
+}
+
+impl BytesInput<'_> {
+    /// 取得输入的字节内容
+    pub fn to_bytes(&self) -> PyResult<PyBackedBytes> {
+        match self {
+            BytesInput::Bytes(data) => Ok(data.clone()),
+            BytesInput::View(view) => view.call_method0("tobytes")?.extract(),
+        }
+    }
+
+    /// 校验字节内容为UTF-8后以 `&str` 调用 `f`
+    ///
+    /// 字节来自Python端，不能假定其合法，校验使用SIMD实现，代价远小于编码本身
+    pub fn with_text<R>(&self, f: impl FnOnce(&str) -> PyResult<R>) -> PyResult<R> {
+        let data = self.to_bytes()?;
+        let text =
+            str_from_utf8(&data).map_err(|e| crate::error::TokenizerError::EncodingError {
+                message: format!("无效的UTF-8字节: {}", e),
+            })?;
+        f(text)
+    }
+}
+
+/// Python端的编码输入：`str` 或字节类对象
+#[derive(FromPyObject)]
+pub enum EncodeInput<'py> {
+    Text(PyBackedStr),
+    Bytes(BytesInput<'py>),
+}
+
+/// Python端的token ID输入：`list[int]` 等整数序列，或元素为u32的数组
+///
+/// 数组指支持缓冲区协议、C连续、元素为本机字节序u32的对象，
+/// 如 `numpy.ndarray`（`dtype=np.uint32`）、`array.array("I")` 及其 `memoryview`。
+/// 数组由CPython直接整体拷贝到结果中，不再逐个元素提取为 `int`；
+/// 其他对象（包括元素类型不是u32的数组）按整数序列提取
+pub enum TokenIds {
+    Array(Vec<u32>),
+    List(Vec<u32>),
+}
+
+impl TokenIds {
+    /// 取得token ID序列
+    pub fn into_vec(self) -> Vec<u32> {
+        match self {
+            TokenIds::Array(ids) | TokenIds::List(ids) => ids,
+        }
+    }
+}
+
+impl<'py> FromPyObject<'py> for TokenIds {
+    fn extract_bound(ob: &Bound<'py, PyAny>) -> PyResult<Self> {
+        // 列表和元组是最常见的输入，直接按序列提取，不尝试缓冲区协议
+        if ob.is_instance_of::<PyList>()
+            || ob.is_instance_of::<PyTuple>()
+            || ob.is_instance_of::<PyString>()
+        {
+            return ob.extract().map(TokenIds::List);
+        }
+        if let Some(ids) = extract_u32_array(ob)? {
+            return Ok(TokenIds::Array(ids));
+        }
+        ob.extract().map(TokenIds::List)
+    }
+}
+
+/// `PyBUF_WRITE`：创建可写的memoryview
+const PYBUF_WRITE: c_int = 0x200;
+
+/// 按u32数组读取对象的缓冲区，不支持缓冲区协议、元素类型不是u32或内存不连续时返回 `None`
+///
+/// abi3（Python 3.11以下）不能直接访问 `Py_buffer`，因此把结果 `Vec` 包装为可写的memoryview，
+/// 由CPython把源缓冲区直接拷贝进来，整个数组只拷贝一次
+fn extract_u32_array(ob: &Bound<'_, PyAny>) -> PyResult<Option<Vec<u32>>> {
+    let Ok(view) = PyMemoryView::from(ob) else {
+        return Ok(None);
+    };
+    let itemsize: usize = view.getattr("itemsize")?.extract()?;
+    let format: String = view.getattr("format")?.extract()?;
+    let contiguous: bool = view.getattr("c_contiguous")?.extract()?;
+    if itemsize != 4
+        || !contiguous
+        || !matches!(format.as_str(), "I" | "@I" | "=I" | "L" | "@L" | "=L")
+    {
+        return Ok(None);
+    }
+
+    let nbytes: usize = view.getattr("nbytes")?.extract()?;
+    let mut ids = vec![0u32; nbytes / 4];
+    if ids.is_empty() {
+        return Ok(Some(ids));
+    }
+    let source = view.call_method1("cast", ("B",))?;
+
+    let py = ob.py();
+    // SAFETY: `ids` 在视图释放之前保持存活且不被移动；视图长度与 `ids` 的字节数相同
+    let target = unsafe {
+        Bound::from_owned_ptr_or_err(
+            py,
+            ffi::PyMemoryView_FromMemory(
+                ids.as_mut_ptr().cast::<c_char>(),
+                nbytes as ffi::Py_ssize_t,
+                PYBUF_WRITE,
+            ),
+        )?
+    };
+    let copied = target.set_item(PySlice::full(py), source);
+    if let Err(e) = target.call_method0("release") {
+        // 视图未能释放时Python端仍可能引用这块内存，宁可泄漏也不释放
+        std::mem::forget(ids);
+        return Err(e);
+    }
+    copied?;
+    Ok(Some(ids))
+}
@@ -0,0 +1,30 @@
+use std::cell::RefCell;
+
+/// 缓冲区初始容量（token数）
+const INITIAL_CAPACITY: usize = 1024;
+
+/// 归还后允许保留的最大容量（token数），约64 KiB，避免超长片段使缓冲区无限增长
+const MAX_RETAINED_CAPACITY: usize = 64 * 1024 / std::mem::size_of::<u32>();
+
+thread_local! {
+    /// 每个线程一个可复用的token ID缓冲区
+    static ID_BUFFER: RefCell<Vec<u32>> = RefCell::new(Vec::with_capacity(INITIAL_CAPACITY));
+}
+
+/// 借用当前线程的token ID缓冲区执行 `f`
+///
+/// 缓冲区在传入前已清空，编码热路径中每个片段复用同一块内存而不必重新分配。
+/// 重入（`f` 内部再次调用）时退回到临时分配的缓冲区
+pub fn with_id_buffer<R>(f: impl FnOnce(&mut Vec<u32>) -> R) -> R {
+    ID_BUFFER.with(|buffer| match buffer.try_borrow_mut() {
+        Ok(mut buffer) => {
+            buffer.clear();
+            let result = f(&mut buffer);
+            if buffer.capacity() > MAX_RETAINED_CAPACITY {
+                *buffer = Vec::with_capacity(INITIAL_CAPACITY);
+            }
+            result
+        }
+        Err(_) => f(&mut Vec::new()),
+    })
+}
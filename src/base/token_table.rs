@@ -0,0 +1,96 @@
+/// ID不存在时 `offsets` 中的标记位，文本偏移本身不会超过 `u32::MAX >> 1`
+const ABSENT: u32 = 1 << 31;
+
+/// ID范围不超过此值时总是建表（偏移数组最多512KB，覆盖整个基本多文种平面的码点ID）
+const DENSE_ID_LIMIT: usize = 1 << 17;
+
+/// ID范围超过 [`DENSE_ID_LIMIT`] 且超过标记数量的这个倍数时不建表，调用方退回到哈希表查找
+///
+/// `offsets` 按最大ID分配，每个ID占4字节；单字符标记以Unicode码点为ID，
+/// 词汇表含辅助平面字符时ID极度稀疏，连续表反而比哈希表大得多
+const MAX_SPARSITY: usize = 8;
+
+/// 按ID连续存放的只读标记表
+///
+/// 所有标记文本首尾相接存放在同一个字符串中，第i个标记为 `text[offsets[i]..offsets[i + 1]]`。
+/// 解码时按ID直接切片后顺序拷贝，不再逐个查哈希表、追随分散在堆上的字符串指针
+#[derive(Debug, Clone, Default)]
+pub struct TokenTable {
+    /// 按ID顺序拼接的标记文本
+    text: String,
+    /// 每个ID在 `text` 中的起始偏移，末尾多一项作为最后一个标记的结束位置；
+    /// 词汇表中的ID可能不连续，不存在的ID在起始偏移上带 [`ABSENT`] 标记
+    offsets: Vec<u32>,
+    /// 标记数量
+    len: usize,
+}
+
+impl TokenTable {
+    /// 从 (ID, 标记) 对构建标记表，ID不要求有序或连续
+    ///
+    /// 表的大小取决于最大ID而不是标记数量：ID范围超过 [`DENSE_ID_LIMIT`]
+    /// 且超过标记数量的 [`MAX_SPARSITY`] 倍，或文本总长度超出偏移范围时返回空表，
+    /// 调用方应退回到哈希表查找
+    pub fn from_tokens<'a>(tokens: impl IntoIterator<Item = (u32, &'a str)>) -> Self {
+        let mut entries: Vec<(u32, &str)> = tokens.into_iter().collect();
+        entries.sort_unstable_by_key(|&(id, _)| id);
+
+        let num_ids = entries.last().map_or(0, |&(id, _)| id as usize + 1);
+        let total_len: usize = entries.iter().map(|(_, token)| token.len()).sum();
+        let too_sparse =
+            num_ids > DENSE_ID_LIMIT && num_ids > entries.len().saturating_mul(MAX_SPARSITY);
+        if too_sparse || total_len >= ABSENT as usize {
+            return Self::default();
+        }
+
+        let mut text = String::with_capacity(total_len);
+        let mut offsets = Vec::with_capacity(num_ids + 1);
+
+        let mut entries_iter = entries.iter().peekable();
+        for id in 0..num_ids {
+            let start = text.len() as u32;
+            if let Some(&(_, token)) =
+                entries_iter.next_if(|&&(entry_id, _)| entry_id as usize == id)
+            {
+                text.push_str(token);
+                offsets.push(start);
+            } else {
+                offsets.push(start | ABSENT);
+            }
+        }
+        offsets.push(text.len() as u32);
+
+        Self {
+            text,
+            offsets,
+            len: entries.len(),
+        }
+    }
+
+    /// 获取ID对应的标记
+    #[inline]
+    pub fn get(&self, id: u32) -> Option<&str> {
+        let idx = id as usize;
+        let start = *self.offsets.get(idx)?;
+        if start & ABSENT != 0 || idx + 1 >= self.offsets.len() {
+            return None;
+        }
+        let end = self.offsets[idx + 1] & !ABSENT;
+        Some(&self.text[start as usize..end as usize])
+    }
+
+    /// 标记数量
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    /// 标记表是否为空
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    /// 清空标记表
+    pub fn clear(&mut self) {
+        *self = Self::default();
+    }
+}
@@ -1,17 +1,134 @@
+use ahash::AHashMap;
+use compact_str::CompactString;
 use fancy_regex::Regex;
 use serde::{Deserialize, Serialize};
-use std::collections::HashMap;
 use std::fs::File;
 use std::hash::Hash;
 use std::io::{self, BufRead, BufReader, Write};
 use std::path::Path;
+use std::sync::{OnceLock, RwLock};
 
+use crate::base::ascii_split::{split_gpt4_ascii, split_gpt4_cjk};
 use crate::base::vocab_manager::VocabManager;
 use crate::base::word::Word;
 
 /// 默认的GPT-4风格正则表达式模式，用于分割文本
 pub const GPT4_PATTERN: &str = r"'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+";
 
+/// 进程内共享的已编译正则表达式缓存（模式字符串 -> 已编译正则）
+static PATTERN_CACHE: OnceLock<RwLock<AHashMap<String, Regex>>> = OnceLock::new();
+
+/// 正则表达式缓存的模式数量上限
+const PATTERN_CACHE_CAPACITY: usize = 64;
+
+/// 编译正则表达式模式
+///
+/// 每个模式在进程内只编译一次，之后返回缓存的克隆；
+/// 新建分词器、加载模型或流式训练时不再重复构建正则。
+///
+/// # Errors
+///
+/// 当正则表达式模式无效或编译失败时返回错误
+pub fn compile_pattern(pattern: &str) -> Result<Regex, String> {
+    let cache = PATTERN_CACHE.get_or_init(|| RwLock::new(AHashMap::new()));
+    if let Ok(map) = cache.read() {
+        if let Some(regex) = map.get(pattern) {
+            return Ok(regex.clone());
+        }
+    }
+
+    let regex = Regex::new(pattern).map_err(|e| format!("无效的正则表达式: {}", e))?;
+    if let Ok(mut map) = cache.write() {
+        if map.len() < PATTERN_CACHE_CAPACITY {
+            map.entry(pattern.to_string())
+                .or_insert_with(|| regex.clone());
+        }
+    }
+    Ok(regex)
+}
+
+/// 纯ASCII文本的预分词快速路径
+///
+/// 模式为默认的 [`GPT4_PATTERN`] 且文本只含ASCII字符时，跳过正则引擎直接切分，
+/// 结果与 `find_iter` 一致；其他情况返回 `None`，由调用方回到正则表达式
+#[inline]
+pub fn split_ascii_fast<'t>(pattern: &Regex, text: &'t str) -> Option<Vec<&'t str>> {
+    if pattern.as_str() == GPT4_PATTERN && text.is_ascii() {
+        Some(split_gpt4_ascii(text))
+    } else {
+        None
+    }
+}
+
+/// 中文文本的预分词快速路径
+///
+/// 模式为默认的 [`GPT4_PATTERN`] 且文本只含ASCII字符和CJK统一表意文字时，
+/// 跳过正则引擎直接切分；其他情况返回 `None`
+#[inline]
+pub fn split_cjk_fast<'t>(pattern: &Regex, text: &'t str) -> Option<Vec<&'t str>> {
+    if pattern.as_str() == GPT4_PATTERN {
+        split_gpt4_cjk(text)
+    } else {
+        None
+    }
+}
+
+/// 按预分词模式切分文本，返回借用原文本的片段
+///
+/// 依次尝试纯ASCII快速路径、中文快速路径、PCRE2 JIT（启用 `pcre2` 特性且模式可由PCRE2编译时），
+/// 最后回到 fancy-regex
+///
+/// # Errors
+///
+/// 当正则表达式匹配失败时返回错误
+pub fn find_pieces<'t>(pattern: &Regex, text: &'t str) -> Result<Vec<&'t str>, String> {
+    if let Some(pieces) = split_fast(pattern, text) {
+        return Ok(pieces);
+    }
+
+    #[cfg(feature = "pcre2")]
+    if let Some(regex) = crate::base::pcre2_jit::jit_regex(pattern.as_str()) {
+        return crate::base::pcre2_jit::find_pieces(&regex, text);
+    }
+
+    pattern
+        .find_iter(text)
+        .map(|mat| {
+            mat.map(|m| m.as_str())
+                .map_err(|e| format!("正则表达式匹配失败: {}", e))
+        })
+        .collect()
+}
+
+/// 按预分词模式切分文本，跳过匹配失败的片段
+///
+/// 与 [`find_pieces`] 相同，但某次匹配出错（如超出回溯限制）时只丢弃这一次匹配，
+/// 其余片段照常返回；PCRE2出错时改用 fancy-regex 逐个匹配。
+/// 用于不向调用方报告匹配错误的编码和训练路径
+pub fn find_pieces_lossy<'t>(pattern: &Regex, text: &'t str) -> Vec<&'t str> {
+    if let Some(pieces) = split_fast(pattern, text) {
+        return pieces;
+    }
+
+    #[cfg(feature = "pcre2")]
+    if let Some(regex) = crate::base::pcre2_jit::jit_regex(pattern.as_str()) {
+        if let Ok(pieces) = crate::base::pcre2_jit::find_pieces(&regex, text) {
+            return pieces;
+        }
+    }
+
+    pattern
+        .find_iter(text)
+        .filter_map(|mat| mat.ok())
+        .map(|m| m.as_str())
+        .collect()
+}
+
+/// 纯ASCII和中文快速路径，模式不是GPT-4模式或文本含其他字符时返回 `None`
+fn split_fast<'t>(pattern: &Regex, text: &'t str) -> Option<Vec<&'t str>> {
+    split_ascii_fast(pattern, text).or_else(|| split_cjk_fast(pattern, text))
+}
+
 /// 分词器基础实现，提供通用功能
 #[derive(Clone)]
 pub struct TokenizerBase<Id>
@@ -36,8 +153,7 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
     /// 当默认正则表达式模式编译失败时返回错误（这种情况极少发生）
     pub fn new() -> Result<Self, String> {
         let pattern = GPT4_PATTERN.to_string();
-        let compiled_pattern =
-            Regex::new(&pattern).map_err(|e| format!("无效的正则表达式: {}", e))?;
+        let compiled_pattern = compile_pattern(&pattern)?;
 
         Ok(Self {
             vocab: VocabManager::new(),
@@ -52,8 +168,7 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
     ///
     /// 当提供的正则表达式模式无效或编译失败时返回错误
     pub fn with_pattern(pattern: String) -> Result<Self, String> {
-        let compiled_pattern =
-            Regex::new(&pattern).map_err(|e| format!("无效的正则表达式: {}", e))?;
+        let compiled_pattern = compile_pattern(&pattern)?;
 
         Ok(Self {
             vocab: VocabManager::new(),
@@ -68,7 +183,7 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
     ///
     /// 当标记已存在于词汇表中或ID已被使用时返回错误
     pub fn add_token(&mut self, token: &str, id: Id) -> Result<(), String> {
-        if self.vocab.contains_value(&token.to_string()) {
+        if self.vocab.contains_value(token) {
             return Err(format!("标记 '{}' 已存在于词汇表中", token));
         }
 
@@ -83,7 +198,7 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
     /// 获取标记的ID
     #[must_use]
     pub fn get_token_id(&self, token: &str) -> Option<&Id> {
-        self.vocab.get_by_value(&token.to_string())
+        self.vocab.get_by_value(token)
     }
 
     /// 获取ID对应的标记
@@ -105,21 +220,67 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
     /// 当正则表达式匹配失败时返回错误。如果正则表达式无法匹配任何内容，
     /// 将使用空格分割作为后备方案
     pub fn split_text(&self, text: &str) -> Result<Vec<String>, String> {
-        let parts: Vec<String> = self
-            .compiled_pattern
-            .find_iter(text)
-            .filter_map(|m| m.ok())
-            .map(|m| m.as_str().to_string())
-            .collect();
+        Ok(self
+            .split_pieces(text)
+            .into_iter()
+            .map(str::to_string)
+            .collect())
+    }
+
+    /// 使用正则表达式分割文本，返回借用原文本的片段
+    ///
+    /// 与 [`split_text`](Self::split_text) 行为相同，但不为每个片段分配新的字符串，
+    /// 编码路径应优先使用此方法
+    pub fn split_pieces<'t>(&self, text: &'t str) -> Vec<&'t str> {
+        // 单次匹配失败只丢弃该片段，不会因此退回到空格分割
+        let parts = find_pieces_lossy(&self.compiled_pattern, text);
 
         if parts.is_empty() && !text.is_empty() {
             // 如果正则表达式没有匹配任何内容，使用空格分割作为后备
-            Ok(text.split_whitespace().map(|s| s.to_string()).collect())
+            text.split_whitespace().collect()
         } else {
-            Ok(parts)
+            parts
         }
     }
 
+    /// 并行分割文本并聚合片段计数
+    ///
+    /// 每个文本只分割一次，片段计数按 `counts` 中对应的出现次数加权。
+    /// 与 [`split_text`](Self::split_text) 一样，正则表达式没有匹配任何内容时退回到空格分割。
+    pub fn count_chunks_parallel(
+        &self,
+        texts: &[String],
+        counts: &[i32],
+    ) -> AHashMap<CompactString, i32> {
+        use rayon::prelude::*;
+
+        let pattern = &self.compiled_pattern;
+        texts
+            .par_iter()
+            .zip(counts.par_iter())
+            .map(|(text, &count)| {
+                let mut local: AHashMap<CompactString, i32> = AHashMap::new();
+                for piece in find_pieces_lossy(pattern, text) {
+                    if !piece.is_empty() {
+                        *local.entry(CompactString::from(piece)).or_default() += count;
+                    }
+                }
+
+                if local.is_empty() {
+                    for piece in text.split_whitespace() {
+                        *local.entry(CompactString::from(piece)).or_default() += count;
+                    }
+                }
+                local
+            })
+            .reduce(AHashMap::new, |mut acc, local| {
+                for (chunk, count) in local {
+                    *acc.entry(chunk).or_default() += count;
+                }
+                acc
+            })
+    }
+
     /// 保存分词器到文件
     ///
     /// # Errors
@@ -169,8 +330,7 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
         if let Some(Ok(line)) = lines.next() {
             if let Some(pattern_str) = line.strip_prefix("pattern: ") {
                 self.pattern = pattern_str.to_string();
-                self.compiled_pattern =
-                    Regex::new(&self.pattern).map_err(|e| format!("无效的正则表达式: {}", e))?;
+                self.compiled_pattern = compile_pattern(&self.pattern)?;
             }
         }
 
@@ -214,10 +374,10 @@ impl<Id: Clone + Serialize + for<'de> Deserialize<'de> + Eq + Hash + std::fmt::D
 }
 
 /// 词对计数映射类型：(Id, Id) -> 计数
-pub type PairCounts<Id> = HashMap<(Id, Id), i32>;
+pub type PairCounts<Id> = AHashMap<(Id, Id), i32>;
 
 /// 词对位置映射类型：(Id, Id) -> 词位置列表
-pub type PairPositions<Id> = HashMap<(Id, Id), Vec<usize>>;
+pub type PairPositions<Id> = AHashMap<(Id, Id), Vec<usize>>;
 
 /// 并行计算词对频率的通用函数
 pub fn count_pairs_parallel<Id: Clone + Eq + Hash + Send + Sync>(
@@ -230,20 +390,20 @@ pub fn count_pairs_parallel<Id: Clone + Eq + Hash + Send + Sync>(
         .par_iter()
         .enumerate()
         .map(|(i, word)| {
-            let mut local_counts = HashMap::new();
+            let mut local_counts = AHashMap::new();
             for pair in word.pairs() {
                 *local_counts.entry(pair).or_insert(0) += counts[i];
             }
             local_counts
         })
-        .reduce(HashMap::new, |mut acc, local_counts| {
+        .reduce(AHashMap::new, |mut acc, local_counts| {
             for (pair, count) in local_counts {
                 *acc.entry(pair).or_insert(0) += count;
             }
             acc
         });
 
-    let mut where_to_update: PairPositions<Id> = HashMap::new();
+    let mut where_to_update: PairPositions<Id> = AHashMap::new();
     for (i, word) in words.iter().enumerate() {
         for pair in word.pairs() {
             where_to_update.entry(pair).or_default().push(i);
@@ -1,5 +1,37 @@
 use std::collections::HashMap;
 
+use rayon::prelude::*;
+
+/// 批次文本总字节数低于该值时在当前线程串行编码
+///
+/// 短小批次的编码耗时不足以抵消rayon唤醒工作线程和拆分任务的开销
+pub const PARALLEL_MIN_BATCH_BYTES: usize = 16 * 1024;
+
+/// 批次token总数低于该值时在当前线程串行解码
+pub const PARALLEL_MIN_BATCH_TOKENS: usize = 4 * 1024;
+
+/// 批量编码是否值得分发到rayon线程池
+#[inline]
+pub fn should_parallelize_encode<S: AsRef<str>>(texts: &[S]) -> bool {
+    let mut total = 0;
+    texts.len() > 1
+        && texts.iter().any(|text| {
+            total += text.as_ref().len();
+            total >= PARALLEL_MIN_BATCH_BYTES
+        })
+}
+
+/// 批量解码是否值得分发到rayon线程池
+#[inline]
+pub fn should_parallelize_decode<T>(token_lists: &[Vec<T>]) -> bool {
+    let mut total = 0;
+    token_lists.len() > 1
+        && token_lists.iter().any(|tokens| {
+            total += tokens.len();
+            total >= PARALLEL_MIN_BATCH_TOKENS
+        })
+}
+
 /// 分词器基础接口，定义所有分词器必须实现的方法
 pub trait Tokenizer {
     /// 标记ID类型
@@ -19,6 +51,56 @@ pub trait Tokenizer {
     /// 当标记ID不在词汇表中时返回错误
     fn decode(&self, tokens: &[Self::TokenId]) -> Result<String, String>;
 
+    /// 并行批量编码文本（rayon）
+    ///
+    /// 接受任意 `AsRef<str>` 切片，调用方可直接传入借用的字符串而无需先复制为 `String`。
+    /// 总字节数不足 [`PARALLEL_MIN_BATCH_BYTES`] 的小批次直接在当前线程编码
+    ///
+    /// # Errors
+    ///
+    /// 任一文本编码失败时返回错误
+    fn encode_batch<S>(&self, texts: &[S]) -> Result<Vec<Vec<Self::TokenId>>, String>
+    where
+        Self: Sized + Sync,
+        Self::TokenId: Send,
+        S: AsRef<str> + Sync,
+    {
+        if !should_parallelize_encode(texts) {
+            return texts
+                .iter()
+                .map(|text| self.encode(text.as_ref()))
+                .collect();
+        }
+        texts
+            .par_iter()
+            .map(|text| self.encode(text.as_ref()))
+            .collect()
+    }
+
+    /// 并行批量解码标记ID序列（rayon）
+    ///
+    /// token总数不足 [`PARALLEL_MIN_BATCH_TOKENS`] 的小批次直接在当前线程解码
+    ///
+    /// # Errors
+    ///
+    /// 任一序列解码失败时返回错误
+    fn decode_batch(&self, token_lists: &[Vec<Self::TokenId>]) -> Result<Vec<String>, String>
+    where
+        Self: Sized + Sync,
+        Self::TokenId: Sync,
+    {
+        if !should_parallelize_decode(token_lists) {
+            return token_lists
+                .iter()
+                .map(|tokens| self.decode(tokens))
+                .collect();
+        }
+        token_lists
+            .par_iter()
+            .map(|tokens| self.decode(tokens))
+            .collect()
+    }
+
     /// 训练分词器
     ///
     /// # Errors
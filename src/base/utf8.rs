@@ -0,0 +1,21 @@
+use std::str::Utf8Error;
+
+/// 校验字节序列为合法UTF-8并借用为 `&str`
+///
+/// 使用 `simdutf8` 做SIMD加速校验（运行时检测AVX2/SSE4.2/NEON，不支持时退回标量实现），
+/// 校验失败时再用标准库重新校验，以保留带位置信息的错误
+#[inline]
+pub fn str_from_utf8(bytes: &[u8]) -> Result<&str, Utf8Error> {
+    match simdutf8::basic::from_utf8(bytes) {
+        Ok(s) => Ok(s),
+        Err(_) => std::str::from_utf8(bytes),
+    }
+}
+
+/// 校验字节序列为合法UTF-8并转换为 `String`，不复制缓冲区
+#[inline]
+pub fn string_from_utf8(bytes: Vec<u8>) -> Result<String, Utf8Error> {
+    str_from_utf8(&bytes)?;
+    // SAFETY: 上面已校验 `bytes` 为合法UTF-8
+    Ok(unsafe { String::from_utf8_unchecked(bytes) })
+}
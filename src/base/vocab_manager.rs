@@ -1,3 +1,4 @@
+use std::borrow::Borrow;
 use std::collections::HashMap;
 use std::fmt::Debug;
 use std::hash::Hash;
@@ -93,8 +94,14 @@ where
     }
 
     /// 根据值获取ID
+    ///
+    /// 可以用值的借用形式查找（如 `String` 词汇表用 `&str`），无需先分配
     #[inline]
-    pub fn get_by_value(&self, value: &V) -> Option<&K> {
+    pub fn get_by_value<Q>(&self, value: &Q) -> Option<&K>
+    where
+        V: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
         self.value_to_id.get(value)
     }
 
@@ -104,9 +111,13 @@ where
         self.id_to_value.contains_key(id)
     }
 
-    /// 检查值是否存在
+    /// 检查值是否存在，同样支持借用形式
     #[inline]
-    pub fn contains_value(&self, value: &V) -> bool {
+    pub fn contains_value<Q>(&self, value: &Q) -> bool
+    where
+        V: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
         self.value_to_id.contains_key(value)
     }
 
@@ -136,6 +147,12 @@ where
         }
     }
 
+    /// 为至少 `additional` 个新token预留空间，批量插入时避免反复扩容
+    pub fn reserve(&mut self, additional: usize) {
+        self.id_to_value.reserve(additional);
+        self.value_to_id.reserve(additional);
+    }
+
     /// 清空所有映射
     pub fn clear(&mut self) {
         self.id_to_value.clear();
@@ -287,6 +304,9 @@ mod tests {
         // 查询
         assert_eq!(vocab.get_by_id(&0), Some(&"hello".to_string()));
         assert_eq!(vocab.get_by_value(&"hello".to_string()), Some(&0));
+        assert_eq!(vocab.get_by_value("world"), Some(&1));
+        assert!(vocab.contains_value("hello"));
+        assert!(!vocab.contains_value("missing"));
 
         // 大小
         assert_eq!(vocab.len(), 2);
@@ -359,4 +379,18 @@ mod tests {
         assert_eq!(vocab.get_by_value(&vec![66, 121]), Some(&1));
         assert!(vocab.validate().is_ok());
     }
+
+    #[test]
+    fn test_with_shared_bytes() {
+        use std::sync::Arc;
+
+        let mut vocab = VocabManager::<u32, Arc<[u8]>>::new();
+        vocab.insert(0, Arc::from(&b"Hi"[..]));
+
+        // 正反两个映射共享同一份字节数据
+        let (value, _) = vocab.value_map().get_key_value(&b"Hi"[..]).unwrap();
+        assert!(Arc::ptr_eq(vocab.get_by_id(&0).unwrap(), value));
+        assert_eq!(vocab.get_by_value(&b"Hi"[..]), Some(&0));
+        assert!(vocab.validate().is_ok());
+    }
 }
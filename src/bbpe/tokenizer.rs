@@ -1,4 +1,6 @@
+use std::borrow::Cow;
 use std::collections::HashMap as StdHashMap;
+use std::sync::Arc;
 
 #[cfg(feature = "python")]
 use pyo3::prelude::*;
@@ -6,13 +8,29 @@ use pyo3::prelude::*;
 #[cfg(feature = "python")]
 use pyo3::exceptions::PyValueError;
 
+#[cfg(feature = "python")]
+use pyo3::pybacked::PyBackedStr;
+
+#[cfg(feature = "python")]
+use pyo3::types::PyBytes;
+
 use ahash::{AHashMap, AHashSet};
 use dary_heap::OctonaryHeap;
-use rayon::prelude::*;
 
+use crate::base::dict_file::DictFile;
+use crate::base::encode_cache::EncodeCache;
 use crate::base::merge_job::MergeJob;
+use crate::base::merge_table::{merge_by_rank, MergeTable};
+#[cfg(feature = "python")]
+use crate::base::packed::{flat_to_pybytes, ids_to_pybytes, unpack_ids};
+#[cfg(feature = "python")]
+use crate::base::py_input::TokenIds;
+#[cfg(feature = "python")]
+pub use crate::base::py_input::{BytesInput, EncodeInput};
+use crate::base::scratch::with_id_buffer;
 use crate::base::tokenizer_base::{count_pairs_parallel, TokenizerBase};
 use crate::base::traits::{MergeBasedTokenizer, Tokenizer};
+use crate::base::utf8::string_from_utf8;
 use crate::base::vocab_manager::VocabManager;
 use crate::base::word::Word;
 
@@ -22,14 +40,20 @@ use crate::base::word::Word;
 pub struct BBPETokenizer {
     /// 合并规则
     pub merges: StdHashMap<(u32, u32), u32>,
-    /// 词汇表管理器（管理 ID <-> Vec<u8> 的双向映射）
-    pub vocab: VocabManager<u32, Vec<u8>>,
+    /// 词汇表管理器（管理 ID <-> 字节序列 的双向映射）
+    ///
+    /// 字节序列以 `Arc<[u8]>` 存放，正反两个映射共享同一份数据，插入时只增加引用计数
+    pub vocab: VocabManager<u32, Arc<[u8]>>,
     /// 基础分词器
     pub base: TokenizerBase<u32>,
     /// 基础字符集合（用于初始化词汇表）
     pub base_chars: AHashSet<Vec<u8>>,
     /// 下一个可用的token ID
     pub next_token_id: u32,
+    /// 编译后的合并表（调用 `compile` 后用于编码）
+    pub compiled_merges: MergeTable,
+    /// 预分词片段的编码缓存
+    pub encode_cache: EncodeCache,
 }
 
 impl BBPETokenizer {
@@ -43,6 +67,8 @@ impl BBPETokenizer {
             base,
             base_chars: AHashSet::new(),
             next_token_id: 0,
+            compiled_merges: MergeTable::default(),
+            encode_cache: EncodeCache::default(),
         };
 
         // 初始化词汇表，添加所有字节值
@@ -61,6 +87,8 @@ impl BBPETokenizer {
             base,
             base_chars: AHashSet::new(),
             next_token_id: 0,
+            compiled_merges: MergeTable::default(),
+            encode_cache: EncodeCache::default(),
         };
 
         // 初始化词汇表，添加所有字节值
@@ -92,28 +120,20 @@ impl BBPETokenizer {
 
     /// 从dict目录加载初始化词表
     pub fn _load_vocab_from_dict(&mut self, dict_file: &str) -> Result<(), String> {
-        use std::fs::File;
-        use std::io::{self, BufRead};
-
+        // 内存映射词表文件，每行直接借用映射的文件内容
         let dict_path = format!("dict/{}", dict_file);
-        let file = File::open(&dict_path)
+        let dict = DictFile::open(&dict_path)
             .map_err(|e| format!("打开词表文件 {} 失败: {}", dict_path, e))?;
-        let reader = io::BufReader::new(file);
 
-        // 保留基础字符和字节值，添加新词汇
+        // 保留基础字符和字节值，添加新词汇；已存在的词汇保留原ID
         let base_vocab_size = self.next_token_id;
-
-        for line in reader.lines() {
-            let line = line.map_err(|e| format!("读取行失败: {}", e))?;
-            let token = line.trim();
-            if token.is_empty() {
-                continue;
+        self.vocab.reserve(dict.tokens().count());
+        for token in dict.tokens() {
+            let token_bytes = token.as_bytes();
+            if !self.vocab.contains_value(token_bytes) {
+                self.vocab.insert(self.next_token_id, token_bytes.into());
+                self.next_token_id += 1;
             }
-
-            // 添加新词汇到词汇表
-            let token_bytes = token.as_bytes().to_vec();
-            self.vocab.insert(self.next_token_id, token_bytes);
-            self.next_token_id += 1;
         }
 
         log::info!(
@@ -124,49 +144,31 @@ impl BBPETokenizer {
         Ok(())
     }
 
-    /// 应用合并规则到ID序列（优化版：贪心合并）
-    pub fn apply_merges(&self, ids: &mut Vec<u32>) {
-        // 持续应用合并规则，直到没有更多可能的合并
-        while ids.len() >= 2 {
-            // 在一次扫描中找到所有可以合并的位置
-            let mut merges_to_apply = Vec::new();
-            let mut i = 0;
-
-            while i < ids.len() - 1 {
-                if let Some(&new_id) = self.merges.get(&(ids[i], ids[i + 1])) {
-                    merges_to_apply.push((i, new_id));
-                    i += 2; // 跳过已合并的pair
-                } else {
-                    i += 1;
-                }
-            }
-
-            if merges_to_apply.is_empty() {
-                break;
-            }
-
-            // 应用所有合并，从后往前以避免索引偏移问题
-            let mut new_ids = Vec::with_capacity(ids.len());
-            let mut next_merge_idx = 0;
-            let mut i = 0;
-
-            while i < ids.len() {
-                if next_merge_idx < merges_to_apply.len() && merges_to_apply[next_merge_idx].0 == i
-                {
-                    // 这个位置需要合并
-                    new_ids.push(merges_to_apply[next_merge_idx].1);
-                    i += 2; // 跳过被合并的两个token
-                    next_merge_idx += 1;
-                } else {
-                    new_ids.push(ids[i]);
-                    i += 1;
-                }
-            }
+    /// 将当前合并规则编译为完美哈希合并表
+    ///
+    /// 训练或加载完成后调用一次，之后编码改用无冲突的完美哈希查找；
+    /// 重新训练、加载或替换合并规则时编译结果会被清空
+    pub fn compile_merges(&mut self) {
+        self.compiled_merges = MergeTable::from_merges(&self.merges);
+    }
 
-            *ids = new_ids;
+    /// 查找合并对对应的新token ID，已编译时使用合并表
+    #[inline]
+    fn lookup_merge(&self, pair: &(u32, u32)) -> Option<u32> {
+        if !self.compiled_merges.is_empty() && self.compiled_merges.len() == self.merges.len() {
+            self.compiled_merges.get(pair)
+        } else {
+            self.merges.get(pair).copied()
         }
     }
 
+    /// 按合并等级应用合并规则到ID序列
+    ///
+    /// 每次合并等级最低（最早学到）的相邻对，长片段使用堆和链表，复杂度为 O(n log n)
+    pub fn apply_merges(&self, ids: &mut Vec<u32>) {
+        merge_by_rank(ids, |pair| self.lookup_merge(pair));
+    }
+
     /// 给定唯一词的核心增量BPE训练
     fn train_core_incremental(
         &mut self,
@@ -177,6 +179,8 @@ impl BBPETokenizer {
         let num_merges = vocab_size - self.vocab.len() as u32;
         log::info!("开始增量BBPE训练: 需要计算 {} 次合并", num_merges);
         self.merges.clear();
+        self.compiled_merges.clear();
+        self.encode_cache.clear();
 
         // ---- 初始配对计数和更新位置（并行） ----
         log::info!("从 {} 个唯一序列计算初始配对计数", words.len());
@@ -233,14 +237,12 @@ impl BBPETokenizer {
                         .vocab
                         .get_by_id(&top.pair.1)
                         .ok_or_else(|| format!("词汇表中缺少token ID: {}", top.pair.1))?;
-                    let mut new_token_bytes = first.clone();
-                    new_token_bytes.extend(second);
-                    new_token_bytes
+                    [&first[..], &second[..]].concat()
                 };
-                self.vocab.insert(new_id, new_token_bytes);
+                self.vocab.insert(new_id, new_token_bytes.into());
 
                 // 更新受影响的词
-                let (updated_pairs, updated_where) = {
+                let (updated_pairs, mut updated_where) = {
                     let mut updated_pairs: AHashMap<(u32, u32), i32> = AHashMap::new();
                     let mut updated_where: AHashMap<(u32, u32), AHashSet<usize>> = AHashMap::new();
 
@@ -261,9 +263,10 @@ impl BBPETokenizer {
 
                     if *entry <= 0 {
                         pair_counts.remove(&pair);
-                    } else if let Some(pos_set) = updated_where.get(&pair) {
+                    } else if let Some(pos_set) = updated_where.remove(&pair) {
+                        // 位置集合直接移交给合并任务，无需复制
                         let mut merge_job = MergeJob::new(pair, *entry as u64);
-                        merge_job.add_positions(&pos_set.iter().cloned().collect::<Vec<_>>());
+                        merge_job.pos = pos_set;
                         heap.push(merge_job);
                     }
                 }
@@ -282,22 +285,81 @@ impl BBPETokenizer {
         Ok(())
     }
 
+    /// 使用去重后的文本及其出现次数训练分词器
+    ///
+    /// 每个文本只做一次正则分割，片段计数按文本出现次数加权，
+    /// 避免对重复语料反复预分词。
+    pub fn train_from_counts(
+        &mut self,
+        texts: &[String],
+        counts: &[i32],
+        vocab_size: u32,
+    ) -> Result<(), String> {
+        if texts.len() != counts.len() {
+            return Err(format!(
+                "文本数量 {} 与计数数量 {} 不一致",
+                texts.len(),
+                counts.len()
+            ));
+        }
+
+        // 验证词汇表大小
+        if vocab_size < 256 {
+            return Err("词汇表大小必须至少为256".to_string());
+        }
+
+        // 只有在词汇表为空时才初始化
+        if self.vocab.is_empty() {
+            self.init_vocab();
+        }
+
+        log::info!("从 {} 个唯一文本计算片段计数", texts.len());
+        let chunk_counts = self.base.count_chunks_parallel(texts, counts);
+
+        // 将片段转换为字节ID序列
+        let mut words = Vec::with_capacity(chunk_counts.len());
+        let mut cvec = Vec::with_capacity(chunk_counts.len());
+        for (piece, c) in chunk_counts {
+            let mut ids = Vec::with_capacity(piece.len());
+            for &byte in piece.as_bytes() {
+                let id = self
+                    .vocab
+                    .get_by_value(&[byte][..])
+                    .ok_or_else(|| format!("未找到字节 {} 对应的ID", byte))?;
+                ids.push(*id);
+            }
+            words.push(Word::new(ids));
+            cvec.push(c);
+        }
+
+        self.train_core_incremental(words, cvec, vocab_size)?;
+        log::info!("BBPE训练完成，最终词汇表大小: {}", self.vocab.len());
+
+        Ok(())
+    }
+
     /// 初始化词汇表
+    ///
+    /// 重新编号后字节ID会变化，引用旧ID的合并规则、合并表和编码缓存一并清空
     fn init_vocab(&mut self) {
         log::info!("初始化词汇表");
         self.vocab.clear();
+        self.merges.clear();
+        self.compiled_merges.clear();
+        self.encode_cache.clear();
 
         // 首先添加基础字符（如果有）
         for (i, char_bytes) in self.base_chars.iter().enumerate() {
-            self.vocab.insert(i as u32, char_bytes.clone());
+            self.vocab
+                .insert(i as u32, Arc::from(char_bytes.as_slice()));
         }
 
         // 然后添加所有字节值（从0到255）
         let mut next_id = self.base_chars.len() as u32;
         for byte in 0..=255u8 {
-            let byte_vec = vec![byte];
-            if !self.vocab.contains_value(&byte_vec) {
-                self.vocab.insert(next_id, byte_vec);
+            let byte_vec = [byte];
+            if !self.vocab.contains_value(&byte_vec[..]) {
+                self.vocab.insert(next_id, Arc::from(&byte_vec[..]));
                 next_id += 1;
             }
         }
@@ -362,19 +424,26 @@ impl BBPETokenizer {
     #[pyo3(name = "train_from_iterator")]
     pub fn py_train_from_iterator(
         &mut self,
+        py: Python<'_>,
         texts: Vec<String>,
         vocab_size: usize,
         _show_progress: bool,
     ) -> PyResult<()> {
-        self.train(texts, vocab_size as u32)
+        py.allow_threads(|| self.train(texts, vocab_size as u32))
             .map_err(|e| crate::error::TokenizerError::TrainingError { message: e }.into())
     }
 
     /// 从迭代器训练分词器
     #[cfg(feature = "python")]
     #[pyo3(name = "train")]
-    pub fn py_train(&mut self, texts: Vec<String>, vocab_size: usize) -> PyResult<()> {
-        self.train(texts, vocab_size as u32)
+    pub fn py_train(
+        &mut self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        vocab_size: usize,
+    ) -> PyResult<()> {
+        // 训练期间释放GIL，其他Python线程可继续运行
+        py.allow_threads(|| self.train(texts, vocab_size as u32))
             .map_err(|e| crate::error::TokenizerError::TrainingError { message: e }.into())
     }
 
@@ -383,11 +452,26 @@ impl BBPETokenizer {
     #[pyo3(name = "train_from_iterator_stream")]
     pub fn train_from_iterator(
         &mut self,
+        py: Python<'_>,
         texts: Vec<String>,
         vocab_size: usize,
         _show_progress: bool,
     ) -> PyResult<()> {
-        self.train(texts, vocab_size as u32)
+        py.allow_threads(|| self.train(texts, vocab_size as u32))
+            .map_err(|e| crate::error::TokenizerError::TrainingError { message: e }.into())
+    }
+
+    /// 使用去重文本及其出现次数训练分词器
+    #[cfg(feature = "python")]
+    #[pyo3(name = "train_from_counts")]
+    pub fn py_train_from_counts(
+        &mut self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        counts: Vec<i32>,
+        vocab_size: usize,
+    ) -> PyResult<()> {
+        py.allow_threads(|| self.train_from_counts(&texts, &counts, vocab_size as u32))
             .map_err(|e| crate::error::TokenizerError::TrainingError { message: e }.into())
     }
 
@@ -398,6 +482,20 @@ impl BBPETokenizer {
         self.base.pattern.clone()
     }
 
+    /// 编译合并规则，之后的编码使用完美哈希合并表
+    #[cfg(feature = "python")]
+    #[pyo3(name = "compile")]
+    pub fn py_compile(&mut self) {
+        self.compile_merges();
+    }
+
+    /// 清空编码缓存
+    #[cfg(feature = "python")]
+    #[pyo3(name = "cache_clear")]
+    pub fn py_cache_clear(&self) {
+        self.encode_cache.clear();
+    }
+
     /// 获取合并等级映射
     #[cfg(feature = "python")]
     #[pyo3(name = "get_mergeable_ranks")]
@@ -406,43 +504,114 @@ impl BBPETokenizer {
     }
 
     /// 将文本编码为token IDs
+    ///
+    /// 除 `str` 外也接受UTF-8编码的 `bytes`/`bytearray`/`memoryview`，
+    /// 已持有字节数据时无需先 `.decode('utf-8')`
     #[cfg(feature = "python")]
     #[pyo3(name = "encode")]
-    pub fn py_encode(&self, text: &str) -> PyResult<Vec<u32>> {
-        self.encode(text)
-            .map_err(|e| crate::error::TokenizerError::EncodingError { message: e }.into())
+    pub fn py_encode(&self, text: EncodeInput<'_>) -> PyResult<Vec<u32>> {
+        match text {
+            EncodeInput::Text(text) => self
+                .encode(&text)
+                .map_err(|e| crate::error::TokenizerError::EncodingError { message: e }.into()),
+            EncodeInput::Bytes(data) => self.py_encode_bytes(data),
+        }
+    }
+
+    /// 将UTF-8字节编码为token IDs
+    ///
+    /// 接受 `bytes`/`bytearray`/`memoryview`，`bytes` 直接借用其缓冲区，只做UTF-8校验而不复制字符串
+    #[cfg(feature = "python")]
+    #[pyo3(name = "encode_bytes")]
+    pub fn py_encode_bytes(&self, data: BytesInput<'_>) -> PyResult<Vec<u32>> {
+        data.with_text(|text| {
+            self.encode(text)
+                .map_err(|e| crate::error::TokenizerError::EncodingError { message: e }.into())
+        })
+    }
+
+    /// 将文本编码为小端u32打包的 `bytes`
+    ///
+    /// 返回单个 `bytes` 对象而不是逐个装箱的 `list[int]`，
+    /// Python端可用 `np.frombuffer(data, dtype="<u4")` 零拷贝得到数组
+    #[cfg(feature = "python")]
+    #[pyo3(name = "encode_packed")]
+    pub fn py_encode_packed<'py>(
+        &self,
+        py: Python<'py>,
+        text: &str,
+    ) -> PyResult<Bound<'py, PyBytes>> {
+        // 与BPE一致，编码期间释放GIL
+        let ids = py
+            .allow_threads(|| self.encode(text))
+            .map_err(|e| crate::error::TokenizerError::EncodingError { message: e })?;
+        ids_to_pybytes(py, &ids)
+    }
+
+    /// 将小端u32打包的token IDs解码为文本
+    ///
+    /// 与 [`encode_packed`](Self::py_encode_packed) 对应，避免先转换为 `list[int]`
+    #[cfg(feature = "python")]
+    #[pyo3(name = "decode_packed")]
+    pub fn py_decode_packed(&self, data: &[u8]) -> PyResult<String> {
+        let tokens = unpack_ids(data)
+            .map_err(|e| crate::error::TokenizerError::DecodingError { message: e })?;
+        self.decode(&tokens)
+            .map_err(|e| crate::error::TokenizerError::DecodingError { message: e }.into())
     }
 
     /// 将token IDs解码为文本
+    ///
+    /// 除 `list[int]` 外也接受u32数组（`numpy.ndarray`、`array.array("I")`），数组不会逐个元素转换为 `int`
     #[cfg(feature = "python")]
     #[pyo3(name = "decode")]
-    pub fn py_decode(&self, tokens: Vec<u32>) -> PyResult<String> {
-        self.decode(&tokens)
+    pub fn py_decode(&self, tokens: TokenIds) -> PyResult<String> {
+        self.decode(&tokens.into_vec())
             .map_err(|e| crate::error::TokenizerError::DecodingError { message: e }.into())
     }
 
-    /// 批量编码文本为token IDs（并行处理）
+    /// 批量编码文本为token IDs（释放GIL并行处理）
     #[cfg(feature = "python")]
     #[pyo3(name = "encode_batch")]
-    pub fn py_encode_batch(&self, texts: Vec<String>) -> PyResult<Vec<Vec<u32>>> {
-        // 使用rayon并行处理所有文本
-        let results: Result<Vec<Vec<u32>>, String> =
-            texts.par_iter().map(|text| self.encode(text)).collect();
-
-        results.map_err(|e| crate::error::TokenizerError::EncodingError { message: e }.into())
+    pub fn py_encode_batch(
+        &self,
+        py: Python<'_>,
+        texts: Vec<PyBackedStr>,
+    ) -> PyResult<Vec<Vec<u32>>> {
+        // 编码期间释放GIL，使用rayon并行处理所有文本
+        py.allow_threads(|| self.encode_batch(&texts))
+            .map_err(|e| crate::error::TokenizerError::EncodingError { message: e }.into())
     }
 
-    /// 批量解码token IDs为文本（并行处理）
+    /// 批量编码文本，返回Arrow风格的展平结果 `(values, offsets)`
+    ///
+    /// `values` 为所有token ID拼接后的小端u32 `bytes`，`offsets` 为小端u64 `bytes`，
+    /// 第i个文本的ID为 `values[offsets[i]:offsets[i + 1]]`；
+    /// 整个批次只创建两个Python对象，而不是每个token一个 `int`
+    #[cfg(feature = "python")]
+    #[pyo3(name = "encode_batch_flat")]
+    pub fn py_encode_batch_flat<'py>(
+        &self,
+        py: Python<'py>,
+        texts: Vec<PyBackedStr>,
+    ) -> PyResult<(Bound<'py, PyBytes>, Bound<'py, PyBytes>)> {
+        let batches = py
+            .allow_threads(|| self.encode_batch(&texts))
+            .map_err(|e| crate::error::TokenizerError::EncodingError { message: e })?;
+        flat_to_pybytes(py, &batches)
+    }
+
+    /// 批量解码token IDs为文本（释放GIL并行处理）
     #[cfg(feature = "python")]
     #[pyo3(name = "decode_batch")]
-    pub fn py_decode_batch(&self, token_lists: Vec<Vec<u32>>) -> PyResult<Vec<String>> {
-        // 使用rayon并行处理所有token列表
-        let results: Result<Vec<String>, String> = token_lists
-            .par_iter()
-            .map(|tokens| self.decode(tokens))
-            .collect();
-
-        results.map_err(|e| PyValueError::new_err(e.to_string()))
+    pub fn py_decode_batch(
+        &self,
+        py: Python<'_>,
+        token_lists: Vec<Vec<u32>>,
+    ) -> PyResult<Vec<String>> {
+        // 解码期间释放GIL，使用rayon并行处理所有token列表
+        py.allow_threads(|| self.decode_batch(&token_lists))
+            .map_err(|e| PyValueError::new_err(e.to_string()))
     }
 
     /// 获取词汇表大小
@@ -456,14 +625,31 @@ impl BBPETokenizer {
     #[cfg(feature = "python")]
     #[pyo3(name = "get_vocab")]
     pub fn py_get_vocab(&self) -> StdHashMap<u32, Vec<u8>> {
-        self.vocab.id_map().clone()
+        self.vocab
+            .iter()
+            .map(|(&id, bytes)| (id, bytes.to_vec()))
+            .collect()
+    }
+
+    /// 获取单个token ID对应的标记文本
+    ///
+    /// 字节序列是合法UTF-8时直接借用词汇表中的数据，否则做有损转换；ID不存在时返回 `None`
+    #[cfg(feature = "python")]
+    #[pyo3(name = "id_to_token")]
+    pub fn py_id_to_token(&self, token_id: u32) -> Option<Cow<'_, str>> {
+        self.vocab
+            .get_by_id(&token_id)
+            .map(|bytes| String::from_utf8_lossy(bytes))
     }
 
     /// 获取反向词汇表
     #[cfg(feature = "python")]
     #[pyo3(name = "get_vocab_rev")]
     pub fn py_get_vocab_rev(&self) -> StdHashMap<Vec<u8>, u32> {
-        self.vocab.value_map().clone()
+        self.vocab
+            .iter()
+            .map(|(&id, bytes)| (bytes.to_vec(), id))
+            .collect()
     }
 
     /// 获取合并规则
@@ -502,39 +688,50 @@ impl Tokenizer for BBPETokenizer {
 
     fn encode(&self, text: &str) -> Result<Vec<Self::TokenId>, String> {
         // 使用正则表达式分割文本
-        let parts = self.base.split_text(text)?;
+        let parts = self.base.split_pieces(text);
 
         let mut result = Vec::new();
+        let mut byte_vec = [0u8; 1];
 
-        for part in parts {
-            if part.is_empty() {
-                continue;
-            }
+        // 每个片段的字节ID写入线程局部缓冲区，避免逐片段分配
+        with_id_buffer(|ids| {
+            for part in parts {
+                if part.is_empty() {
+                    continue;
+                }
 
-            // 将每个部分转换为字节ID
-            let mut ids: Vec<u32> = Vec::new();
-            for &byte in part.as_bytes() {
-                let byte_vec = vec![byte];
-                if let Some(&id) = self.vocab.get_by_value(&byte_vec) {
-                    ids.push(id);
-                } else {
-                    // 这种情况不应该发生，因为我们已经初始化了所有可能的字节
-                    return Err(format!("未找到字节 {} 对应的ID", byte));
+                // 重复出现的片段直接使用缓存结果
+                if self.encode_cache.extend_into(part, &mut result) {
+                    continue;
                 }
-            }
 
-            // 应用合并规则
-            self.apply_merges(&mut ids);
-            result.extend(ids);
-        }
+                // 将每个部分转换为字节ID
+                ids.clear();
+                for &byte in part.as_bytes() {
+                    byte_vec[0] = byte;
+                    if let Some(&id) = self.vocab.get_by_value(&byte_vec[..]) {
+                        ids.push(id);
+                    } else {
+                        // 这种情况不应该发生，因为我们已经初始化了所有可能的字节
+                        return Err(format!("未找到字节 {} 对应的ID", byte));
+                    }
+                }
+
+                // 应用合并规则
+                self.apply_merges(ids);
+                self.encode_cache.insert(part, ids);
+                result.extend_from_slice(ids);
+            }
+            Ok(())
+        })?;
 
         // 如果没有匹配到任何内容，退回到简单分割
         if result.is_empty() {
             for word in text.split_whitespace() {
                 let mut ids: Vec<u32> = Vec::new();
                 for &byte in word.as_bytes() {
-                    let byte_vec = vec![byte];
-                    if let Some(&id) = self.vocab.get_by_value(&byte_vec) {
+                    byte_vec[0] = byte;
+                    if let Some(&id) = self.vocab.get_by_value(&byte_vec[..]) {
                         ids.push(id);
                     } else {
                         // 这种情况不应该发生，因为我们已经初始化了所有可能的字节
@@ -552,92 +749,27 @@ impl Tokenizer for BBPETokenizer {
     }
 
     fn decode(&self, tokens: &[Self::TokenId]) -> Result<String, String> {
-        let mut bytes = Vec::new();
-
-        for &id in tokens {
-            if let Some(token_bytes) = self.vocab.get_by_id(&id) {
-                bytes.extend_from_slice(token_bytes);
-            } else {
-                return Err(format!("未找到ID {} 对应的词汇", id));
-            }
-        }
+        // 先收集每个token的字节切片，`concat` 按总长度一次分配输出缓冲区
+        let pieces = tokens
+            .iter()
+            .map(|id| {
+                self.vocab
+                    .get_by_id(id)
+                    .map(|bytes| &bytes[..])
+                    .ok_or_else(|| format!("未找到ID {} 对应的词汇", id))
+            })
+            .collect::<Result<Vec<&[u8]>, String>>()?;
 
-        match String::from_utf8(bytes) {
-            Ok(s) => Ok(s),
-            Err(e) => Err(format!("UTF-8解码失败: {}", e)),
-        }
+        string_from_utf8(pieces.concat()).map_err(|e| format!("UTF-8解码失败: {}", e))
     }
 
     fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> Result<(), String> {
         log::info!("开始BBPE训练，目标词汇表大小: {}", vocab_size);
 
-        // 验证词汇表大小
-        if vocab_size < 256 {
-            return Err("词汇表大小必须至少为256".to_string());
-        }
-
-        // 只有在词汇表为空时才初始化
-        if self.vocab.is_empty() {
-            self.init_vocab();
-        }
-
-        // 将文本转换为词序列
+        // 每个文本只分割一次，相同片段聚合计数后进入增量训练核心
         log::info!("处理 {} 个文本样本", texts.len());
-        let (words, counts) = {
-            let mut words = Vec::new();
-            let mut counts = Vec::new();
-
-            for text in &texts {
-                // 使用正则表达式分割文本
-                let parts = self.base.split_text(text)?;
-
-                for part in parts {
-                    if part.is_empty() {
-                        continue;
-                    }
-
-                    // 将词转换为字节ID - 通过vocab查找每个字节对应的ID
-                    let ids: Vec<u32> = part
-                        .bytes()
-                        .map(|b| {
-                            let byte_vec = vec![b];
-                            *self
-                                .vocab
-                                .get_by_value(&byte_vec)
-                                .unwrap_or_else(|| panic!("字节 {} 在vocab中不存在", b))
-                        })
-                        .collect();
-                    words.push(Word::new(ids));
-                    counts.push(1);
-                }
-
-                // 如果没有匹配到任何内容，退回到简单分割
-                if words.is_empty() {
-                    log::warn!("正则表达式未匹配，使用简单分割");
-                    for word in text.split_whitespace() {
-                        let ids: Vec<u32> = word
-                            .bytes()
-                            .map(|b| {
-                                let byte_vec = vec![b];
-                                *self
-                                    .vocab
-                                    .get_by_value(&byte_vec)
-                                    .unwrap_or_else(|| panic!("字节 {} 在vocab中不存在", b))
-                            })
-                            .collect();
-                        words.push(Word::new(ids));
-                        counts.push(1);
-                    }
-                }
-            }
-            (words, counts)
-        };
-
-        // 使用增量训练核心
-        self.train_core_incremental(words, counts, vocab_size)?;
-        log::info!("BBPE训练完成，最终词汇表大小: {}", self.vocab.len());
-
-        Ok(())
+        let counts = vec![1; texts.len()];
+        self.train_from_counts(&texts, &counts, vocab_size)
     }
 
     fn vocab_size(&self) -> usize {
@@ -713,6 +845,8 @@ impl Tokenizer for BBPETokenizer {
         self.base_chars.clear();
         self.vocab.clear();
         self.merges.clear();
+        self.compiled_merges.clear();
+        self.encode_cache.clear();
 
         for line in lines {
             let line = line.map_err(|e| format!("读取行失败: {}", e))?;
@@ -751,7 +885,7 @@ impl Tokenizer for BBPETokenizer {
                                 parts[1..].iter().map(|s| s.parse::<u8>()).collect();
                             let bytes = bytes.map_err(|e| format!("解析字节失败: {}", e))?;
 
-                            self.vocab.insert(id, bytes);
+                            self.vocab.insert(id, bytes.into());
                         }
                     }
                 }
@@ -780,33 +914,8 @@ impl Tokenizer for BBPETokenizer {
 
 impl MergeBasedTokenizer for BBPETokenizer {
     fn apply_merges(&mut self, tokens: &mut Vec<Self::TokenId>) -> Result<(), String> {
-        // 应用合并规则，直到没有更多合并可以应用
-        let mut changed = true;
-        while changed {
-            changed = false;
-            let mut new_tokens = Vec::new();
-            let mut i = 0;
-
-            while i < tokens.len() {
-                if i + 1 < tokens.len() {
-                    // 检查当前token对是否可以合并
-                    if let Some(&new_id) = self.merges.get(&(tokens[i], tokens[i + 1])) {
-                        new_tokens.push(new_id);
-                        i += 2;
-                        changed = true;
-                    } else {
-                        new_tokens.push(tokens[i]);
-                        i += 1;
-                    }
-                } else {
-                    new_tokens.push(tokens[i]);
-                    i += 1;
-                }
-            }
-
-            *tokens = new_tokens;
-        }
-
+        // 按合并等级应用合并规则，直到没有更多合并可以应用
+        merge_by_rank(tokens, |pair| self.merges.get(pair).copied());
         Ok(())
     }
 
@@ -816,5 +925,7 @@ impl MergeBasedTokenizer for BBPETokenizer {
 
     fn set_merges(&mut self, merges: StdHashMap<(Self::TokenId, Self::TokenId), Self::TokenId>) {
         self.merges = merges;
+        self.compiled_merges.clear();
+        self.encode_cache.clear();
     }
 }
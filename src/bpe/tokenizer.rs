@@ -7,20 +7,44 @@ use dary_heap::OctonaryHeap;
 use pyo3::exceptions::PyValueError;
 #[cfg(feature = "python")]
 use pyo3::prelude::*;
+#[cfg(feature = "python")]
+use pyo3::pybacked::PyBackedStr;
+#[cfg(feature = "python")]
+use pyo3::types::PyBytes;
 
 #[cfg(feature = "python")]
 use ahash::{AHashMap, AHashSet};
 #[cfg(feature = "python")]
-use compact_str::CompactString;
+use compact_str::{CompactString, ToCompactString};
 #[cfg(feature = "python")]
 use rayon::prelude::*;
 
+#[cfg(feature = "python")]
+use crate::base::dict_file::DictFile;
+#[cfg(feature = "python")]
+use crate::base::encode_cache::EncodeCache;
 #[cfg(feature = "python")]
 use crate::base::merge_job::MergeJob;
 #[cfg(feature = "python")]
-use crate::base::tokenizer_base::{count_pairs_parallel, TokenizerBase, GPT4_PATTERN};
+use crate::base::merge_table::{merge_by_rank, MergeTable};
+#[cfg(feature = "python")]
+use crate::base::packed::{flat_to_pybytes, ids_to_pybytes, unpack_ids};
+#[cfg(feature = "python")]
+use crate::base::py_input::{BytesInput, TokenIds};
 #[cfg(feature = "python")]
-use crate::base::traits::{MergeBasedTokenizer, Tokenizer as TokenizerTrait};
+use crate::base::scratch::with_id_buffer;
+#[cfg(feature = "python")]
+use crate::base::token_table::TokenTable;
+#[cfg(feature = "python")]
+use crate::base::tokenizer_base::{
+    compile_pattern, count_pairs_parallel, find_pieces, find_pieces_lossy, TokenizerBase,
+    GPT4_PATTERN,
+};
+#[cfg(feature = "python")]
+use crate::base::traits::{
+    should_parallelize_decode, should_parallelize_encode, MergeBasedTokenizer,
+    Tokenizer as TokenizerTrait,
+};
 #[cfg(feature = "python")]
 use crate::base::vocab_manager::VocabManager;
 #[cfg(feature = "python")]
@@ -34,14 +58,21 @@ pub type WordId = u32;
 #[pyclass]
 pub struct Tokenizer {
     /// 合并规则：(token_a, token_b) -> new_token_id
-    #[pyo3(get, set)]
     pub merges: StdHashMap<(WordId, WordId), WordId>,
     /// 基础分词器，用于文本分割和基础功能
     pub base: TokenizerBase<u32>,
-    /// 词汇表管理器（管理 ID <-> String 的双向映射）
-    pub vocab: VocabManager<WordId, String>,
+    /// 词汇表管理器（管理 ID <-> 标记文本 的双向映射）
+    ///
+    /// 标记文本使用 `CompactString`，24字节以内（绝大多数标记）内联存放，不单独分配堆内存
+    pub vocab: VocabManager<WordId, CompactString>,
     /// 下一个可用的token ID
     pub next_token_id: WordId,
+    /// 编译后的合并表（调用 `compile` 后用于编码）
+    pub compiled_merges: MergeTable,
+    /// 按ID连续存放的标记表（调用 `compile` 后用于解码）
+    pub token_table: TokenTable,
+    /// 预分词片段的编码缓存
+    pub encode_cache: EncodeCache,
 }
 
 #[cfg(feature = "python")]
@@ -55,6 +86,9 @@ impl Tokenizer {
             base,
             vocab: VocabManager::new(),
             next_token_id: 0, // 从0开始，训练时动态分配
+            compiled_merges: MergeTable::default(),
+            token_table: TokenTable::default(),
+            encode_cache: EncodeCache::default(),
         };
 
         // vocab将在训练时按需初始化，无需预先分配所有Unicode字符
@@ -70,12 +104,20 @@ impl Tokenizer {
             base,
             vocab: VocabManager::new(),
             next_token_id: 0, // 从0开始，训练时动态分配
+            compiled_merges: MergeTable::default(),
+            token_table: TokenTable::default(),
+            encode_cache: EncodeCache::default(),
         };
 
         // vocab将在训练时按需初始化，无需预先分配所有Unicode字符
         Ok(tokenizer)
     }
 
+    /// 训练分词器（Rust端调用，Python端的 `train` 会释放GIL）
+    pub fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
+        TokenizerTrait::train(self, texts, vocab_size).map_err(PyValueError::new_err)
+    }
+
     /// 从常用汉字字表文件加载基础字符
     pub fn _load_base_chars(&mut self, file_path: &str) -> Result<(), std::io::Error> {
         use std::fs::File;
@@ -92,12 +134,15 @@ impl Tokenizer {
             self.vocab.remove_by_id(&id);
         }
         self.next_token_id = 256;
+        self.token_table.clear();
+        self.encode_cache.clear();
 
         for line in reader.lines() {
             let line = line?;
             let char_str = line.trim();
             if !char_str.is_empty() {
-                self.vocab.insert(self.next_token_id, char_str.to_string());
+                self.vocab
+                    .insert(self.next_token_id, CompactString::from(char_str));
                 self.next_token_id += 1;
             }
         }
@@ -108,13 +153,26 @@ impl Tokenizer {
 
     /// 从dict目录加载初始化词表
     pub fn _load_vocab_from_dict(&mut self, dict_file: &str) -> Result<(), String> {
-        use std::fs::File;
-        use std::io::{self, BufRead};
+        self._load_vocab_from_dicts(&[dict_file])
+    }
 
-        let dict_path = format!("dict/{}", dict_file);
-        let file = File::open(&dict_path)
-            .map_err(|e| format!("打开词表文件 {} 失败: {}", dict_path, e))?;
-        let reader = io::BufReader::new(file);
+    /// 从dict目录同时加载多个初始化词表
+    ///
+    /// 各文件的映射和UTF-8校验用rayon并行完成，全部成功后再按文件顺序依次插入，
+    /// 新标记的ID与逐个文件加载时一致；重复出现的标记只保留第一次的ID
+    pub fn _load_vocab_from_dicts<S: AsRef<str> + Sync>(
+        &mut self,
+        dict_files: &[S],
+    ) -> Result<(), String> {
+        // 内存映射词表文件，先确认全部可读且为合法UTF-8再修改词汇表
+        let dicts = dict_files
+            .par_iter()
+            .map(|dict_file| {
+                let dict_path = format!("dict/{}", dict_file.as_ref());
+                DictFile::open(&dict_path)
+                    .map_err(|e| format!("打开词表文件 {} 失败: {}", dict_path, e))
+            })
+            .collect::<Result<Vec<_>, String>>()?;
 
         // 清除现有词汇表中256以上的条目
         let ids_to_remove: Vec<WordId> =
@@ -124,20 +182,29 @@ impl Tokenizer {
             self.vocab.remove_by_id(&id);
         }
         self.next_token_id = 256;
-
-        for line in reader.lines() {
-            let line = line.map_err(|e| format!("读取行失败: {}", e))?;
-            let token = line.trim();
-            if token.is_empty() {
-                continue;
+        self.token_table.clear();
+        self.encode_cache.clear();
+
+        // 每行直接借用映射的文件内容，只为新标记分配字符串；
+        // 已存在的标记（如单字节字符）保留原ID，不会被重新映射
+        self.vocab
+            .reserve(dicts.iter().map(|dict| dict.tokens().count()).sum());
+        for (dict_file, dict) in dict_files.iter().zip(&dicts) {
+            let before = self.vocab.len();
+            for token in dict.tokens() {
+                if !self.vocab.contains_value(token) {
+                    self.vocab
+                        .insert(self.next_token_id, CompactString::from(token));
+                    self.next_token_id += 1;
+                }
             }
-
-            // 添加新词汇到词汇表
-            self.vocab.insert(self.next_token_id, token.to_string());
-            self.next_token_id += 1;
+            log::info!(
+                "已从 {} 加载 {} 个词汇",
+                dict_file.as_ref(),
+                self.vocab.len() - before
+            );
         }
 
-        log::info!("已从 {} 加载 {} 个词汇", dict_file, self.vocab.len() - 256);
         Ok(())
     }
 
@@ -160,50 +227,83 @@ impl Tokenizer {
 
     /// 应用合并规则到标记序列
     pub fn _apply_merges(&mut self, tokens: &mut Vec<u32>) -> Result<(), String> {
-        // 创建Word并应用合并规则
-        let mut word = Word::new(tokens.clone());
-
-        // 持续应用合并规则，直到没有更多可能的合并
-        let mut changed = true;
-        while changed {
-            changed = false;
-
-            // 查找可以合并的词对
-            for (pair, &new_id) in &self.merges {
-                let mut i = 0;
-                while i < word.ids().len() - 1 {
-                    if word.ids()[i] == pair.0 && word.ids()[i + 1] == pair.1 {
-                        // 执行合并
-                        word.merge_pair(*pair, new_id, |a, b| a == b);
-                        changed = true;
-                        break;
-                    }
-                    i += 1;
-                }
+        merge_by_rank(tokens, |pair| self.merges.get(pair).copied());
+        Ok(())
+    }
 
-                if changed {
-                    break;
+    /// 将文本片段计数物化为词序列和对应的计数
+    fn _words_from_chunk_counts(
+        &mut self,
+        chunk_counts: AHashMap<CompactString, i32>,
+    ) -> (Vec<Word<WordId>>, Vec<i32>) {
+        let mut words = Vec::with_capacity(chunk_counts.len());
+        let mut cvec = Vec::with_capacity(chunk_counts.len());
+        for (chunk, c) in chunk_counts.into_iter() {
+            // 将文本分割为字符序列
+            let mut ids = Vec::new();
+            for ch in chunk.chars() {
+                // 直接使用字符的Unicode码点作为token ID
+                let code_point = ch as u32;
+                // 确保字符在词汇表中
+                if !self.vocab.contains_id(&code_point) {
+                    self.vocab.insert(code_point, ch.to_compact_string());
+                    if code_point >= self.next_token_id {
+                        self.next_token_id = code_point + 1;
+                    }
                 }
+                ids.push(code_point);
             }
+
+            words.push(Word::new(ids));
+            cvec.push(c);
         }
+        (words, cvec)
+    }
 
-        // 更新tokens为合并后的结果
-        *tokens = word.ids().to_vec();
+    /// 使用去重后的文本及其出现次数训练分词器
+    ///
+    /// 每个文本只做一次正则分割，片段计数按文本出现次数加权，
+    /// 避免对重复语料反复预分词。
+    pub fn _train_from_counts_internal(
+        &mut self,
+        texts: Vec<String>,
+        counts: Vec<i32>,
+        vocab_size: u32,
+    ) -> Result<(), String> {
+        if texts.len() != counts.len() {
+            return Err(format!(
+                "文本数量 {} 与计数数量 {} 不一致",
+                texts.len(),
+                counts.len()
+            ));
+        }
+
+        log::info!("从 {} 个唯一文本计算片段计数", texts.len());
+        let chunk_counts = self.base.count_chunks_parallel(&texts, &counts);
 
+        let (words, cvec) = self._words_from_chunk_counts(chunk_counts);
+        self._train_core_incremental(words, cvec, vocab_size);
         Ok(())
     }
 
     /// 给定唯一词的核心增量BPE训练
-    fn _train_core_incremental(&mut self, mut words: Vec<Word<WordId>>, vocab_size: u32) {
+    fn _train_core_incremental(
+        &mut self,
+        mut words: Vec<Word<WordId>>,
+        counts: Vec<i32>,
+        vocab_size: u32,
+    ) {
         // 确保词汇表大小不小于基础字符数量
         let vocab_size = vocab_size.max(0x110000);
         let num_merges = vocab_size - 0x110000;
         log::info!("开始增量BPE训练: 需要计算 {} 次合并", num_merges);
         self.merges.clear();
+        self.compiled_merges.clear();
+        self.token_table.clear();
+        self.encode_cache.clear();
 
         // ---- 初始配对计数和更新位置（并行） ----
         log::info!("从 {} 个唯一序列计算初始配对计数", words.len());
-        let counts: Vec<i32> = vec![1; words.len()]; // 每个词的初始计数为1
         let (mut pair_counts, mut where_to_update) = count_pairs_parallel(&words, &counts);
 
         // ---- 构建堆 ----
@@ -254,8 +354,10 @@ impl Tokenizer {
                 self.vocab.get_by_id(&top.pair.1),
             ) {
                 // 直接合并文本，不进行字节转换
-                let merged_text = format!("{}{}", a_text, b_text);
-                self.vocab.insert(new_id, merged_text.clone());
+                let mut merged_text = CompactString::with_capacity(a_text.len() + b_text.len());
+                merged_text.push_str(a_text);
+                merged_text.push_str(b_text);
+                self.vocab.insert(new_id, merged_text);
             }
 
             // 更新受影响的词
@@ -265,7 +367,7 @@ impl Tokenizer {
             for &word_idx in &top.pos {
                 let deltas = words[word_idx].merge_pair(top.pair, new_id, |a, b| a == b);
                 for (pair, delta) in deltas {
-                    *updated_pairs.entry(pair).or_insert(0) += delta;
+                    *updated_pairs.entry(pair).or_insert(0) += delta * counts[word_idx];
                     updated_where.entry(pair).or_default().insert(word_idx);
                 }
             }
@@ -277,9 +379,10 @@ impl Tokenizer {
 
                 if *entry <= 0 {
                     pair_counts.remove(&pair);
-                } else if let Some(pos_set) = updated_where.get(&pair) {
+                } else if let Some(pos_set) = updated_where.remove(&pair) {
+                    // 位置集合直接移交给合并任务，无需复制
                     let mut merge_job = MergeJob::new(pair, *entry as u64);
-                    merge_job.add_positions(&pos_set.iter().cloned().collect::<Vec<_>>());
+                    merge_job.pos = pos_set;
                     heap.push(merge_job);
                 }
             }
@@ -300,6 +403,85 @@ impl Tokenizer {
             self.next_token_id
         );
     }
+
+    /// 批量编码文本，大批次使用rayon并行，小批次在当前线程串行
+    fn encode_texts<S: AsRef<str> + Sync>(
+        &self,
+        texts: &[S],
+    ) -> Result<Vec<Vec<u32>>, crate::error::TokenizerError> {
+        if !should_parallelize_encode(texts) {
+            return texts
+                .iter()
+                .map(|text| self._encode_internal(text.as_ref()))
+                .collect();
+        }
+        texts
+            .par_iter()
+            .map(|text| self._encode_internal(text.as_ref()))
+            .collect()
+    }
+
+    /// 查找合并对对应的新token ID，已编译时使用合并表
+    ///
+    /// `merges` 是公开字段，可能被直接修改，因此同时校验规则数量以免使用过期的合并表
+    #[inline]
+    fn lookup_merge(&self, pair: &(WordId, WordId)) -> Option<WordId> {
+        if !self.compiled_merges.is_empty() && self.compiled_merges.len() == self.merges.len() {
+            self.compiled_merges.get(pair)
+        } else {
+            self.merges.get(pair).copied()
+        }
+    }
+
+    /// 查找ID对应的标记，已编译时使用连续存放的标记表
+    ///
+    /// 与合并表一样校验标记数量，词汇表被直接修改或ID过于稀疏未建表时退回到哈希表查找
+    #[inline]
+    fn lookup_token(&self, token_id: WordId) -> Option<&str> {
+        if self.token_table_is_current() {
+            self.token_table.get(token_id)
+        } else {
+            self.vocab.get_by_id(&token_id).map(CompactString::as_str)
+        }
+    }
+
+    /// 标记表是否已编译且与词汇表一致
+    #[inline]
+    fn token_table_is_current(&self) -> bool {
+        !self.token_table.is_empty() && self.token_table.len() == self.vocab.len()
+    }
+}
+
+/// 将 (ID, 标记) 序列拼接为文本，词汇表中不存在的ID按Unicode码点解码
+///
+/// 先遍历一次算出准确的输出长度，一次分配后再遍历一次顺序拷贝，
+/// 因此 `pieces` 需可廉价克隆（每次遍历都会重新查找标记）
+#[cfg(feature = "python")]
+fn concat_tokens<'a>(pieces: impl Iterator<Item = (u32, Option<&'a str>)> + Clone) -> String {
+    let capacity = pieces
+        .clone()
+        .map(|(token, text)| text.map_or_else(|| fallback_char(token).len_utf8(), str::len))
+        .sum();
+    let mut result = String::with_capacity(capacity);
+
+    for (token, text) in pieces {
+        match text {
+            // 直接使用词汇表中的文本
+            Some(text) => result.push_str(text),
+            // 如果找不到对应的词汇，尝试作为Unicode字符处理
+            None => result.push(fallback_char(token)),
+        }
+    }
+
+    debug_assert_eq!(result.len(), capacity);
+    result
+}
+
+/// 不在词汇表中的ID对应的字符，不是有效的Unicode码点时为替换字符
+#[cfg(feature = "python")]
+#[inline]
+fn fallback_char(token: u32) -> char {
+    char::from_u32(token).unwrap_or('\u{FFFD}')
 }
 
 #[cfg(feature = "python")]
@@ -315,9 +497,9 @@ impl Tokenizer {
     #[staticmethod]
     pub fn with_pattern(pattern: String) -> PyResult<Self> {
         let mut tokenizer = Self::_new_internal().map_err(PyValueError::new_err)?;
-        tokenizer.base.pattern = pattern.clone();
-        tokenizer.base.compiled_pattern = fancy_regex::Regex::new(&pattern)
-            .map_err(|e| PyValueError::new_err(format!("无效的正则表达式: {}", e)))?;
+        tokenizer.base.compiled_pattern =
+            compile_pattern(&pattern).map_err(PyValueError::new_err)?;
+        tokenizer.base.pattern = pattern;
         Ok(tokenizer)
     }
 
@@ -332,48 +514,129 @@ impl Tokenizer {
         })
     }
 
+    /// 编码普通文本为token IDs，对应tiktoken的 `encode_ordinary`
+    ///
+    /// BPE分词器没有特殊标记，`encode` 也不会扫描特殊标记，两者结果相同；
+    /// 按tiktoken接口编写的调用方可以直接使用
+    pub fn encode_ordinary(&self, text: &str) -> PyResult<Vec<u32>> {
+        self.encode(text)
+    }
+
+    /// 将UTF-8字节编码为token IDs
+    ///
+    /// 接受 `bytes`/`bytearray`/`memoryview`，`bytes` 直接借用其缓冲区，只做UTF-8校验而不复制字符串
+    pub fn encode_bytes(&self, data: BytesInput<'_>) -> PyResult<Vec<u32>> {
+        data.with_text(|text| self.encode(text))
+    }
+
     /// 解码token IDs为文本
-    pub fn decode(&self, tokens: Vec<u32>) -> PyResult<String> {
+    ///
+    /// 除 `list[int]` 外也接受u32数组（如 `np.frombuffer(tokenizer.encode_packed(text), dtype=np.uint32)`），
+    /// 数组不会逐个元素转换为 `int`
+    pub fn decode(&self, tokens: TokenIds) -> PyResult<String> {
         // 实际的解码实现
-        self.decode_internal(tokens)
+        self.decode_internal(tokens.into_vec())
             .map_err(|e| PyValueError::new_err(e.to_string()))
     }
 
-    /// 批量编码文本为token IDs（并行处理）
-    pub fn encode_batch(&self, texts: Vec<String>) -> PyResult<Vec<Vec<u32>>> {
-        use rayon::prelude::*;
+    /// 将文本编码为小端u32打包的 `bytes`
+    ///
+    /// 返回单个 `bytes` 对象而不是逐个装箱的 `list[int]`，
+    /// Python端可用 `np.frombuffer(data, dtype="<u4")` 零拷贝得到数组
+    pub fn encode_packed<'py>(&self, py: Python<'py>, text: &str) -> PyResult<Bound<'py, PyBytes>> {
+        let ids = py
+            .allow_threads(|| self._encode_internal(text))
+            .map_err(|e| crate::error::TokenizerError::EncodingError {
+                message: e.to_string(),
+            })?;
+        ids_to_pybytes(py, &ids)
+    }
 
-        // 使用rayon并行处理所有文本
-        let results: Result<Vec<Vec<u32>>, _> = texts
-            .par_iter()
-            .map(|text| {
-                self._encode_internal(text).map_err(|e| {
-                    crate::error::TokenizerError::EncodingError {
-                        message: e.to_string(),
-                    }
-                })
-            })
-            .collect();
+    /// 将小端u32打包的token IDs解码为文本
+    pub fn decode_packed(&self, data: &[u8]) -> PyResult<String> {
+        let tokens = unpack_ids(data).map_err(PyValueError::new_err)?;
+        self.decode_internal(tokens)
+            .map_err(|e| PyValueError::new_err(e.to_string()))
+    }
 
-        results.map_err(|e| e.into())
+    /// 批量编码文本为token IDs（释放GIL并行处理）
+    pub fn encode_batch(&self, py: Python<'_>, texts: Vec<PyBackedStr>) -> PyResult<Vec<Vec<u32>>> {
+        // 编码期间释放GIL，大批次使用rayon并行处理所有文本
+        py.allow_threads(|| self.encode_texts(&texts))
+            .map_err(|e| e.into())
     }
 
-    /// 批量解码token IDs为文本（并行处理）
-    pub fn decode_batch(&self, token_lists: Vec<Vec<u32>>) -> PyResult<Vec<String>> {
-        use rayon::prelude::*;
+    /// 批量编码文本，每个文本返回一个小端u32打包的 `bytes`
+    pub fn encode_batch_packed<'py>(
+        &self,
+        py: Python<'py>,
+        texts: Vec<PyBackedStr>,
+    ) -> PyResult<Vec<Bound<'py, PyBytes>>> {
+        // 编码期间释放GIL，持有GIL时只需把ID直接写入新建的bytes对象
+        let batches = py.allow_threads(|| self.encode_texts(&texts))?;
+        batches.iter().map(|ids| ids_to_pybytes(py, ids)).collect()
+    }
 
-        // 使用rayon并行处理所有token列表
-        let results: Result<Vec<String>, _> = token_lists
-            .par_iter()
-            .map(|tokens| self.decode_internal(tokens.clone()))
-            .collect();
+    /// 批量编码文本，返回Arrow风格的展平结果 `(values, offsets)`
+    ///
+    /// `values` 为所有token ID拼接后的小端u32 `bytes`，`offsets` 为小端u64 `bytes`，
+    /// 第i个文本的ID为 `values[offsets[i]:offsets[i + 1]]`；
+    /// 整个批次只创建两个Python对象，而不是每个token一个 `int`
+    pub fn encode_batch_flat<'py>(
+        &self,
+        py: Python<'py>,
+        texts: Vec<PyBackedStr>,
+    ) -> PyResult<(Bound<'py, PyBytes>, Bound<'py, PyBytes>)> {
+        let batches = py.allow_threads(|| self.encode_texts(&texts))?;
+        flat_to_pybytes(py, &batches)
+    }
+
+    /// 批量解码token IDs为文本（释放GIL并行处理）
+    pub fn decode_batch(
+        &self,
+        py: Python<'_>,
+        token_lists: Vec<Vec<u32>>,
+    ) -> PyResult<Vec<String>> {
+        // 解码期间释放GIL，大批次使用rayon并行处理所有token列表（按值传入，无需克隆）
+        let results: Result<Vec<String>, _> = py.allow_threads(|| {
+            if !should_parallelize_decode(&token_lists) {
+                return token_lists
+                    .into_iter()
+                    .map(|tokens| self.decode_internal(tokens))
+                    .collect();
+            }
+            token_lists
+                .into_par_iter()
+                .map(|tokens| self.decode_internal(tokens))
+                .collect()
+        });
 
         results.map_err(|e| PyValueError::new_err(e.to_string()))
     }
 
-    /// 训练分词器
-    pub fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
-        TokenizerTrait::train(self, texts, vocab_size).map_err(PyValueError::new_err)
+    /// 训练分词器（释放GIL）
+    #[pyo3(name = "train")]
+    pub fn py_train(
+        &mut self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        vocab_size: u32,
+    ) -> PyResult<()> {
+        // 训练期间释放GIL，其他Python线程可继续运行
+        py.allow_threads(|| TokenizerTrait::train(self, texts, vocab_size))
+            .map_err(PyValueError::new_err)
+    }
+
+    /// 使用去重文本及其出现次数训练分词器（释放GIL）
+    pub fn train_from_counts(
+        &mut self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        counts: Vec<i32>,
+        vocab_size: u32,
+    ) -> PyResult<()> {
+        py.allow_threads(|| self._train_from_counts_internal(texts, counts, vocab_size))
+            .map_err(PyValueError::new_err)
     }
 
     /// 获取词汇表大小
@@ -384,7 +647,43 @@ impl Tokenizer {
     /// 获取词汇表
     pub fn get_vocab(&self) -> std::collections::HashMap<u32, String> {
         // 转换词汇表类型
-        self.vocab.iter().map(|(&k, v)| (k, v.clone())).collect()
+        self.vocab
+            .iter()
+            .map(|(&k, v)| (k, v.to_string()))
+            .collect()
+    }
+
+    /// 获取单个token ID对应的标记，直接借用词汇表中的字符串；ID不存在时返回 `None`
+    pub fn id_to_token(&self, token_id: u32) -> Option<&str> {
+        self.lookup_token(token_id)
+    }
+
+    /// 将当前合并规则编译为完美哈希合并表，并把词汇表按ID连续存放
+    ///
+    /// 训练或加载完成后调用一次，之后编码改用无冲突的完美哈希查找，
+    /// 解码按ID直接切片连续存放的标记文本；
+    /// 重新训练、加载词表或替换合并规则时编译结果会被清空
+    pub fn compile(&mut self) {
+        self.compiled_merges = MergeTable::from_merges(&self.merges);
+        self.token_table =
+            TokenTable::from_tokens(self.vocab.iter().map(|(&id, token)| (id, token.as_str())));
+    }
+
+    /// 清空编码缓存
+    pub fn cache_clear(&self) {
+        self.encode_cache.clear();
+    }
+
+    /// 合并规则：(token_a, token_b) -> new_token_id
+    #[getter(merges)]
+    pub fn py_get_merges(&self) -> StdHashMap<(WordId, WordId), WordId> {
+        self.merges.clone()
+    }
+
+    /// 替换合并规则，同时清空编译结果和编码缓存
+    #[setter(merges)]
+    pub fn py_set_merges(&mut self, merges: StdHashMap<(WordId, WordId), WordId>) {
+        MergeBasedTokenizer::set_merges(self, merges);
     }
 
     /// 获取正则表达式模式
@@ -429,11 +728,30 @@ impl Tokenizer {
             .map_err(|e| crate::error::TokenizerError::LoadError { message: e }.into())
     }
 
+    /// 从dict目录同时加载多个初始化词表（释放GIL，并行读取文件）
+    ///
+    /// 结果为所有文件词汇的并集，按文件顺序分配ID；
+    /// 而逐个调用 `load_vocab_from_dict` 时每次加载都会替换之前加载的词汇
+    #[pyo3(name = "load_vocab_from_dicts")]
+    pub fn py_load_vocab_from_dicts(
+        &mut self,
+        py: Python<'_>,
+        dict_files: Vec<String>,
+    ) -> PyResult<()> {
+        py.allow_threads(|| self._load_vocab_from_dicts(&dict_files))
+            .map_err(|e| crate::error::TokenizerError::LoadError { message: e }.into())
+    }
+
     /// 从Python迭代器训练分词器
     #[cfg(feature = "python")]
     #[pyo3(name = "train_from_iterator")]
-    pub fn py_train_from_iterator(&mut self, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
-        self.train(texts, vocab_size)
+    pub fn py_train_from_iterator(
+        &mut self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        vocab_size: u32,
+    ) -> PyResult<()> {
+        self.py_train(py, texts, vocab_size)
             .map_err(|e| PyValueError::new_err(format!("训练失败: {}", e)))
     }
 
@@ -455,11 +773,8 @@ impl Tokenizer {
 
         // 更新存储的模式并编译它
         self.base.pattern = pattern_str.clone();
-        self.base.compiled_pattern = fancy_regex::Regex::new(&pattern_str).map_err(|e| {
-            crate::error::TokenizerError::InvalidRegex {
-                message: e.to_string(),
-            }
-        })?;
+        self.base.compiled_pattern = compile_pattern(&pattern_str)
+            .map_err(|message| crate::error::TokenizerError::InvalidRegex { message })?;
 
         // 准备一个真正的Python迭代器对象 (使用安全的PyO3 API)
         let py_iter: pyo3::Py<pyo3::PyAny> = iterator
@@ -523,16 +838,12 @@ impl Tokenizer {
 
             total_sequences += buf.len() as u64;
 
-            let pattern = self.base.compiled_pattern.clone();
+            let pattern = &self.base.compiled_pattern;
             let local: AHashMap<CompactString, i32> = py.allow_threads(|| {
                 buf.par_iter()
                     .map(|s| {
                         let mut m: AHashMap<CompactString, i32> = AHashMap::new();
-                        for mat in pattern.find_iter(s) {
-                            let piece = match mat {
-                                Ok(m) => m.as_str(),
-                                Err(_) => continue,
-                            };
+                        for piece in find_pieces_lossy(pattern, s) {
                             *m.entry(CompactString::from(piece)).or_default() += 1;
                         }
                         m
@@ -561,29 +872,9 @@ impl Tokenizer {
         );
 
         // 物化词和计数
-        let mut words = Vec::with_capacity(counts.len());
-        let mut cvec = Vec::with_capacity(counts.len());
-        for (chunk, c) in counts.into_iter() {
-            // 将文本分割为字符序列
-            let mut ids = Vec::new();
-            for ch in chunk.chars() {
-                // 直接使用字符的Unicode码点作为token ID
-                let code_point = ch as u32;
-                // 确保字符在词汇表中
-                if !self.vocab.contains_id(&code_point) {
-                    self.vocab.insert(code_point, ch.to_string());
-                    if code_point >= self.next_token_id {
-                        self.next_token_id = code_point + 1;
-                    }
-                }
-                ids.push(code_point);
-            }
-
-            words.push(Word::new(ids));
-            cvec.push(c);
-        }
+        let (words, cvec) = self._words_from_chunk_counts(counts);
 
-        self._train_core_incremental(words, vocab_size);
+        self._train_core_incremental(words, cvec, vocab_size);
         Ok(())
     }
 
@@ -610,7 +901,10 @@ impl Tokenizer {
     /// 获取词汇表
     #[cfg(feature = "python")]
     pub fn _get_vocab(&self) -> StdHashMap<WordId, String> {
-        self.vocab.id_map().clone()
+        self.vocab
+            .iter()
+            .map(|(&k, v)| (k, v.to_string()))
+            .collect()
     }
 
     /// 将文本编码为token IDs
@@ -640,110 +934,71 @@ impl Tokenizer {
 
     /// 内部编码实现
     fn _encode_internal(&self, text: &str) -> Result<Vec<u32>, crate::error::TokenizerError> {
-        // 使用正则表达式分割文本
+        // 按预分词模式分割文本（纯ASCII快速路径、PCRE2 JIT或正则表达式）
+        let pieces = find_pieces(&self.base.compiled_pattern, text)
+            .map_err(|message| crate::error::TokenizerError::EncodingError { message })?;
         let mut result = Vec::new();
-        for mat in self.base.compiled_pattern.find_iter(text) {
-            let piece = match mat {
-                Ok(m) => m.as_str(),
-                Err(e) => {
-                    return Err(crate::error::TokenizerError::EncodingError {
-                        message: format!("正则表达式匹配失败: {}", e),
-                    })
-                }
-            };
-
-            if piece.is_empty() {
-                continue;
-            }
-
-            // 首先尝试直接匹配整个片段 - O(1)查找
-            let piece_string = piece.to_string();
-            if let Some(&id) = self.vocab.get_by_value(&piece_string) {
-                result.push(id);
-                continue;
-            }
+        let mut char_buf = [0u8; 4];
 
-            // 将文本转换为字符序列
-            let mut ids: Vec<WordId> = Vec::new();
-            for ch in piece.chars() {
-                let ch_str = ch.to_string();
-                // 使用反向映射进行O(1)查找
-                if let Some(&id) = self.vocab.get_by_value(&ch_str) {
-                    ids.push(id);
-                } else {
-                    // 如果找不到，使用字符的Unicode码点作为token ID
-                    ids.push(ch as u32);
+        // 每个片段的字符ID写入线程局部缓冲区，合并就地进行，避免逐片段分配
+        with_id_buffer(|ids| {
+            for piece in pieces {
+                if piece.is_empty() {
+                    continue;
                 }
-            }
 
-            // 应用合并规则 - 优化版本：贪心合并，避免重复扫描
-            // 持续合并直到没有更多可以合并的对
-            while ids.len() >= 2 {
-                // 在一次扫描中找到所有可以合并的位置
-                let mut merges_to_apply = Vec::new();
-                let mut i = 0;
-
-                while i < ids.len() - 1 {
-                    if let Some(&new_id) = self.merges.get(&(ids[i], ids[i + 1])) {
-                        merges_to_apply.push((i, new_id));
-                        i += 2; // 跳过已合并的pair
-                    } else {
-                        i += 1;
-                    }
+                // 重复出现的片段直接使用缓存结果
+                if self.encode_cache.extend_into(piece, &mut result) {
+                    continue;
                 }
 
-                if merges_to_apply.is_empty() {
-                    break;
+                // 首先尝试直接匹配整个片段 - O(1)查找
+                if let Some(&id) = self.vocab.get_by_value(piece) {
+                    result.push(id);
+                    continue;
                 }
 
-                // 应用所有合并，从后往前以避免索引偏移问题
-                let mut new_ids = Vec::with_capacity(ids.len());
-                let mut next_merge_idx = 0;
-                let mut i = 0;
-
-                while i < ids.len() {
-                    if next_merge_idx < merges_to_apply.len()
-                        && merges_to_apply[next_merge_idx].0 == i
-                    {
-                        // 这个位置需要合并
-                        new_ids.push(merges_to_apply[next_merge_idx].1);
-                        i += 2; // 跳过被合并的两个token
-                        next_merge_idx += 1;
+                // 将文本转换为字符序列
+                ids.clear();
+                for ch in piece.chars() {
+                    // 使用反向映射进行O(1)查找，字符编码到栈上缓冲区，无需分配
+                    let key: &str = ch.encode_utf8(&mut char_buf);
+                    if let Some(&id) = self.vocab.get_by_value(key) {
+                        ids.push(id);
                     } else {
-                        new_ids.push(ids[i]);
-                        i += 1;
+                        // 如果找不到，使用字符的Unicode码点作为token ID
+                        ids.push(ch as u32);
                     }
                 }
 
-                ids = new_ids;
-            }
+                // 按合并等级应用合并规则，长片段使用堆和链表
+                merge_by_rank(ids, |pair| self.lookup_merge(pair));
 
-            result.extend(ids);
-        }
+                self.encode_cache.insert(piece, ids);
+                result.extend_from_slice(ids);
+            }
+            Ok(())
+        })?;
 
         Ok(result)
     }
 
     /// 内部解码实现
     fn decode_internal(&self, tokens: Vec<u32>) -> Result<String, crate::error::TokenizerError> {
-        let mut result = String::new();
-
-        for token in tokens {
-            if let Some(text) = self.vocab.get_by_id(&token) {
-                // 直接使用词汇表中的文本
-                result.push_str(text);
-            } else {
-                // 如果找不到对应的词汇，尝试作为Unicode字符处理
-                if let Some(c) = char::from_u32(token) {
-                    result.push(c);
-                } else {
-                    // 如果不是有效的Unicode字符，使用替换字符
-                    result.push('�');
-                }
-            }
+        // 已编译时按ID直接切片标记表，两次遍历的查找代价都很低
+        if self.token_table_is_current() {
+            let table = &self.token_table;
+            return Ok(concat_tokens(
+                tokens.iter().map(|&token| (token, table.get(token))),
+            ));
         }
 
-        Ok(result)
+        // 未编译时先查出所有标记，避免计算长度和拷贝时重复查哈希表
+        let texts: Vec<Option<&str>> = tokens
+            .iter()
+            .map(|token| self.vocab.get_by_id(token).map(CompactString::as_str))
+            .collect();
+        Ok(concat_tokens(tokens.iter().copied().zip(texts)))
     }
 }
 
@@ -781,49 +1036,14 @@ impl TokenizerTrait for Tokenizer {
 
         // 初始化合并规则
         self.merges.clear();
+        self.compiled_merges.clear();
+        self.token_table.clear();
+        self.encode_cache.clear();
 
-        // 将文本转换为词序列
+        // 每个文本只分割一次，相同片段聚合计数后进入增量训练核心
         log::info!("处理 {} 个文本样本", texts.len());
-        let words: Vec<Word<WordId>> = {
-            let mut words = Vec::new();
-
-            for text in &texts {
-                // 使用正则表达式分割文本
-                let parts = self.base.split_text(text)?;
-
-                for part in parts {
-                    if part.is_empty() {
-                        continue;
-                    }
-
-                    // 将每个部分转换为字符序列
-                    let mut ids = Vec::new();
-                    for ch in part.chars() {
-                        // 直接使用字符的Unicode码点作为token ID
-                        let code_point = ch as u32;
-                        // 确保字符在词汇表中
-                        if !self.vocab.contains_id(&code_point) {
-                            let ch_str = ch.to_string();
-                            self.vocab.insert(code_point, ch_str);
-                            if code_point >= self.next_token_id {
-                                self.next_token_id = code_point + 1;
-                            }
-                        }
-                        ids.push(code_point);
-                    }
-
-                    if !ids.is_empty() {
-                        words.push(Word::new(ids));
-                    }
-                }
-            }
-            words
-        };
-
-        log::info!("已处理 {} 个词", words.len());
-
-        // 使用增量训练核心
-        self._train_core_incremental(words, vocab_size);
+        let counts = vec![1; texts.len()];
+        self._train_from_counts_internal(texts, counts, vocab_size)?;
         log::info!("BPE训练完成，最终合并规则数: {}", self.merges.len());
         log::info!(
             "训练后词汇表大小: {}, next_token_id: {}",
@@ -899,6 +1119,9 @@ impl TokenizerTrait for Tokenizer {
         // 清空当前数据
         self.vocab.clear();
         self.merges.clear();
+        self.compiled_merges.clear();
+        self.token_table.clear();
+        self.encode_cache.clear();
 
         for line in lines {
             let line = line.map_err(|e| format!("读取行失败: {}", e))?;
@@ -923,8 +1146,7 @@ impl TokenizerTrait for Tokenizer {
                         let id = parts[0]
                             .parse::<WordId>()
                             .map_err(|e| format!("解析词汇表ID失败: {}", e))?;
-                        let text = parts[1].to_string();
-                        self.vocab.insert(id, text);
+                        self.vocab.insert(id, CompactString::from(parts[1]));
                     }
                 }
             } else if line.starts_with("merge: ") && in_merges {
@@ -951,33 +1173,8 @@ impl TokenizerTrait for Tokenizer {
 #[cfg(feature = "python")]
 impl MergeBasedTokenizer for Tokenizer {
     fn apply_merges(&mut self, tokens: &mut Vec<Self::TokenId>) -> Result<(), String> {
-        // 应用合并规则，直到没有更多合并可以应用
-        let mut changed = true;
-        while changed {
-            changed = false;
-            let mut new_tokens = Vec::new();
-            let mut i = 0;
-
-            while i < tokens.len() {
-                if i + 1 < tokens.len() {
-                    // 检查当前token对是否可以合并
-                    if let Some(&new_id) = self.merges.get(&(tokens[i], tokens[i + 1])) {
-                        new_tokens.push(new_id);
-                        i += 2;
-                        changed = true;
-                    } else {
-                        new_tokens.push(tokens[i]);
-                        i += 1;
-                    }
-                } else {
-                    new_tokens.push(tokens[i]);
-                    i += 1;
-                }
-            }
-
-            *tokens = new_tokens;
-        }
-
+        // 按合并等级应用合并规则，直到没有更多合并可以应用
+        merge_by_rank(tokens, |pair| self.merges.get(pair).copied());
         Ok(())
     }
 
@@ -987,5 +1184,8 @@ impl MergeBasedTokenizer for Tokenizer {
 
     fn set_merges(&mut self, merges: StdHashMap<(Self::TokenId, Self::TokenId), Self::TokenId>) {
         self.merges = merges;
+        self.compiled_merges.clear();
+        self.token_table.clear();
+        self.encode_cache.clear();
     }
 }
@@ -2,10 +2,18 @@
 use pyo3::exceptions::PyValueError;
 #[cfg(feature = "python")]
 use pyo3::prelude::*;
+#[cfg(feature = "python")]
+use pyo3::pybacked::PyBackedStr;
 use std::collections::HashMap;
+use std::sync::OnceLock;
+
+use smallvec::smallvec;
 
+use crate::base::byte_trie::{token_to_bytes, ByteTrie, Segment, DENSE_TABLE_MAX_BYTES};
+use crate::base::dict_file::DictFile;
 use crate::base::tokenizer_base::TokenizerBase;
 use crate::base::traits::{SubwordTokenizer, Tokenizer};
+use crate::base::utf8::string_from_utf8;
 
 /// Unigram分词器
 #[cfg_attr(feature = "python", pyclass)]
@@ -18,6 +26,37 @@ pub struct UnigramTokenizer {
     pub unk_token_id: u32,
     /// 下一个可用的token ID
     pub next_token_id: u32,
+    /// 分段索引（词汇表前缀树 + 定点分数），首次分段时构建，词汇表或分数变化时清空
+    index: OnceLock<SegmentIndex>,
+}
+
+/// 分数定点化的缩放系数（精度约1e-3 nat）
+const SCORE_SCALE: f64 = 1024.0;
+
+/// Viterbi分段使用的只读索引
+struct SegmentIndex {
+    /// 词汇表字节前缀树
+    trie: ByteTrie,
+    /// 按token ID索引的 `i16` 定点分数
+    scores: Vec<i16>,
+}
+
+impl SegmentIndex {
+    /// 获取标记的定点分数，缺失时为0
+    #[inline]
+    fn score(&self, token_id: u32) -> i32 {
+        self.scores
+            .get(token_id as usize)
+            .copied()
+            .map_or(0, i32::from)
+    }
+}
+
+/// 将浮点分数量化为 `i16` 定点数
+fn quantize_score(score: f64) -> i16 {
+    (score * SCORE_SCALE)
+        .round()
+        .clamp(f64::from(i16::MIN), f64::from(i16::MAX)) as i16
 }
 
 impl UnigramTokenizer {
@@ -30,6 +69,7 @@ impl UnigramTokenizer {
             scores: Vec::new(),
             unk_token_id: 0,
             next_token_id: 0,
+            index: OnceLock::new(),
         };
 
         // 初始化字节词汇表和常用汉字
@@ -48,6 +88,7 @@ impl UnigramTokenizer {
             scores: Vec::new(),
             unk_token_id: 0,
             next_token_id: 0,
+            index: OnceLock::new(),
         };
 
         // 初始化字节词汇表和常用汉字
@@ -62,6 +103,7 @@ impl UnigramTokenizer {
         // 清空现有词汇表
         self.base.vocab.clear();
         self.scores.clear();
+        self.index.take();
 
         // 添加所有字节值
         for i in 0..=255 {
@@ -99,6 +141,7 @@ impl UnigramTokenizer {
         let file = File::open(file_path).map_err(|e| format!("无法打开常用汉字文件: {}", e))?;
 
         let reader = BufReader::new(file);
+        self.index.take();
 
         for line in reader.lines() {
             let line = line.map_err(|e| format!("读取常用汉字文件失败: {}", e))?;
@@ -119,12 +162,9 @@ impl UnigramTokenizer {
 
     /// 从dict目录加载初始化词表
     fn _load_vocab_from_dict(&mut self, dict_file: &str) -> Result<(), String> {
-        use std::fs::File;
-        use std::io::{BufRead, BufReader};
-
-        let file = File::open(dict_file).map_err(|e| format!("无法打开词表文件: {}", e))?;
-
-        let reader = BufReader::new(file);
+        // 内存映射词表文件，先确认可读且为合法UTF-8再修改词汇表
+        let dict = DictFile::open(dict_file)?;
+        self.index.take();
 
         // 清除256以上的条目，保留基础字节词汇表
         let ids_to_remove: Vec<u32> = self
@@ -143,19 +183,16 @@ impl UnigramTokenizer {
             }
         }
 
-        // 从文件加载新的词汇
-        for line in reader.lines() {
-            let line = line.map_err(|e| format!("读取词表文件失败: {}", e))?;
-            let token = line.trim();
-            if !token.is_empty() {
-                // 检查token是否已存在
-                if !self.base.vocab.contains_value(&token.to_string()) {
-                    self.base
-                        .vocab
-                        .insert(self.next_token_id, token.to_string());
-                    self.scores.push(0.0); // 初始分数为0
-                    self.next_token_id += 1;
-                }
+        // 从文件加载新的词汇，每行直接借用映射的文件内容，只为新标记分配字符串
+        self.base.vocab.reserve(dict.tokens().count());
+        for token in dict.tokens() {
+            // 检查token是否已存在
+            if !self.base.vocab.contains_value(token) {
+                self.base
+                    .vocab
+                    .insert(self.next_token_id, token.to_string());
+                self.scores.push(0.0); // 初始分数为0
+                self.next_token_id += 1;
             }
         }
 
@@ -207,79 +244,76 @@ impl UnigramTokenizer {
         result
     }
 
+    /// 为当前词汇表的前缀树生成稠密转移表，加速编码时的前缀匹配
+    ///
+    /// 适合词汇表已固定的部署场景；之后修改词汇表会使其失效，编码回到普通前缀树。
+    /// 转移表超过 [`DENSE_TABLE_MAX_BYTES`] 时不编译，返回 `false`
+    pub fn compile_trie(&mut self) -> bool {
+        self.index();
+        self.index
+            .get_mut()
+            .is_some_and(|index| index.trie.compile(DENSE_TABLE_MAX_BYTES))
+    }
+
+    /// 获取分段索引，首次使用时构建
+    fn index(&self) -> &SegmentIndex {
+        self.index.get_or_init(|| {
+            let mut trie = ByteTrie::new();
+            for (&token_id, token_str) in self.base.vocab.iter() {
+                if let Some(bytes) = token_to_bytes(token_str) {
+                    trie.insert(&bytes, token_id);
+                }
+            }
+            let scores = self.scores.iter().map(|&s| quantize_score(s)).collect();
+            SegmentIndex { trie, scores }
+        })
+    }
+
     /// 使用Viterbi算法对字节序列进行分段
-    fn segment(&self, bytes: &[u8]) -> Option<Vec<u32>> {
+    ///
+    /// 每个位置沿前缀树列出所有匹配的标记，分数以 `i32` 累加定点分数；
+    /// 结果内联存放在 [`Segment`] 中，短片段不单独分配堆内存
+    fn segment(&self, bytes: &[u8]) -> Option<Segment> {
         if bytes.is_empty() {
-            return Some(vec![]);
+            return Some(Segment::new());
         }
 
+        let index = self.index();
         let n = bytes.len();
-        // dp[i] = (best_score, best_token_id)
-        let mut dp: Vec<(f64, Option<u32>)> = vec![(f64::NEG_INFINITY, None); n + 1];
-        dp[0] = (0.0, None);
+        // best[i] = 到位置i的最佳累计分数，back[i] = (最后一个标记ID, 标记字节长度)
+        let mut best = vec![i32::MIN; n + 1];
+        let mut back = vec![(0u32, 0usize); n + 1];
+        best[0] = 0;
 
         for i in 0..n {
-            if dp[i].0 == f64::NEG_INFINITY {
+            if best[i] == i32::MIN {
                 continue;
             }
 
-            // 尝试所有可能的标记
-            for (token_id, token_str) in self.base.vocab.iter() {
-                // 将token字符串转换回字节序列
-                let token_bytes = if token_str.starts_with("<0x") && token_str.ends_with(">") {
-                    // 特殊字节表示
-                    if let Some(hex_str) = token_str
-                        .strip_prefix("<0x")
-                        .and_then(|s| s.strip_suffix(">"))
-                    {
-                        if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
-                            vec![byte_val]
-                        } else {
-                            continue;
-                        }
-                    } else {
-                        continue;
+            let prefix_score = best[i];
+            index
+                .trie
+                .for_each_prefix_match(&bytes[i..], |token_id, token_len| {
+                    let score = prefix_score.saturating_add(index.score(token_id));
+                    if score > best[i + token_len] {
+                        best[i + token_len] = score;
+                        back[i + token_len] = (token_id, token_len);
                     }
-                } else {
-                    // 普通字符串
-                    token_str.as_bytes().to_vec()
-                };
-
-                let token_len = token_bytes.len();
-                if i + token_len <= n && bytes[i..i + token_len] == token_bytes {
-                    let score_value = self.scores.get(*token_id as usize).copied().unwrap_or(0.0);
-                    let score = dp[i].0 + score_value;
-                    if score > dp[i + token_len].0 {
-                        dp[i + token_len] = (score, Some(*token_id));
-                    }
-                }
-            }
+                });
         }
 
         // 回溯以找到最佳分段
-        if dp[n].0 == f64::NEG_INFINITY {
+        if best[n] == i32::MIN {
             // 如果无法分段，返回未知标记
-            return Some(vec![self.unk_token_id]);
+            return Some(smallvec![self.unk_token_id]);
         }
 
-        let mut segmentation = Vec::new();
+        let mut segmentation = Segment::new();
         let mut i = n;
         while i > 0 {
-            if let Some(token_id) = dp[i].1 {
-                segmentation.push(token_id);
-                i -= if let Some(token_str) = self.base.vocab.get_by_id(&token_id) {
-                    if token_str.starts_with("<0x") && token_str.ends_with(">") {
-                        1 // 特殊字节表示长度为1
-                    } else {
-                        token_str.len()
-                    }
-                } else {
-                    1
-                };
-            } else {
-                // 如果dp[n].0 != NEG_INFINITY，这不应该发生
-                return Some(vec![self.unk_token_id]);
-            }
+            let (token_id, token_len) = back[i];
+            segmentation.push(token_id);
+            i -= token_len;
         }
 
         segmentation.reverse();
@@ -291,8 +325,8 @@ impl Tokenizer for UnigramTokenizer {
     type TokenId = u32;
 
     fn encode(&self, text: &str) -> Result<Vec<Self::TokenId>, String> {
-        // 使用基础分词器分割文本
-        let parts = self.base.split_text(text)?;
+        // 使用基础分词器分割文本（片段借用原文本，不逐个分配）
+        let parts = self.base.split_pieces(text);
 
         let mut result = Vec::new();
         for part in parts {
@@ -306,34 +340,42 @@ impl Tokenizer for UnigramTokenizer {
     }
 
     fn decode(&self, tokens: &[Self::TokenId]) -> Result<String, String> {
-        let mut bytes = Vec::new();
-        for &token_id in tokens {
-            if let Some(token_str) = self.base.vocab.get_by_id(&token_id) {
-                // 将token字符串转换回字节序列
-                if token_str.starts_with("<0x") && token_str.ends_with(">") {
-                    // 特殊字节表示
-                    if let Some(hex_str) = token_str
-                        .strip_prefix("<0x")
-                        .and_then(|s| s.strip_suffix(">"))
-                    {
-                        if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
-                            bytes.push(byte_val);
-                        } else {
-                            return Err("无效的字节表示".to_string());
-                        }
+        // 先查出所有标记，再按总长度一次分配输出缓冲区，避免拼接时反复扩容
+        let token_strs = tokens
+            .iter()
+            .map(|token_id| {
+                self.base
+                    .vocab
+                    .get_by_id(token_id)
+                    .ok_or_else(|| format!("无效的标记ID: {}", token_id))
+            })
+            .collect::<Result<Vec<&String>, String>>()?;
+        // 字节标记（<0xNN>）只解码为1个字节，因此字符串总长度是输出长度的上界
+        let mut bytes = Vec::with_capacity(token_strs.iter().map(|s| s.len()).sum());
+
+        for token_str in token_strs {
+            // 将token字符串转换回字节序列
+            if token_str.starts_with("<0x") && token_str.ends_with(">") {
+                // 特殊字节表示
+                if let Some(hex_str) = token_str
+                    .strip_prefix("<0x")
+                    .and_then(|s| s.strip_suffix(">"))
+                {
+                    if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
+                        bytes.push(byte_val);
                     } else {
                         return Err("无效的字节表示".to_string());
                     }
                 } else {
-                    // 普通字符串
-                    bytes.extend(token_str.as_bytes());
+                    return Err("无效的字节表示".to_string());
                 }
             } else {
-                return Err(format!("无效的标记ID: {}", token_id));
+                // 普通字符串
+                bytes.extend_from_slice(token_str.as_bytes());
             }
         }
 
-        String::from_utf8(bytes).map_err(|e| format!("UTF-8解码失败: {}", e))
+        string_from_utf8(bytes).map_err(|e| format!("UTF-8解码失败: {}", e))
     }
 
     fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> Result<(), String> {
@@ -342,6 +384,8 @@ impl Tokenizer for UnigramTokenizer {
             return Ok(());
         }
 
+        self.index.take();
+
         // 计算需要提取的子字符串数量
         let current_vocab_size = self.base.vocab.len() as u32;
         let substrings_needed = vocab_size - current_vocab_size;
@@ -410,6 +454,7 @@ impl Tokenizer for UnigramTokenizer {
     fn load(&mut self, path: &str) -> Result<(), String> {
         // 使用基础分词器的加载功能
         self.base.load(path)?;
+        self.index.take();
 
         // 加载分数
         let scores_path = format!("{}.scores", path);
@@ -440,6 +485,7 @@ impl SubwordTokenizer for UnigramTokenizer {
 
     fn set_scores(&mut self, scores: Vec<f64>) {
         self.scores = scores;
+        self.index.take();
     }
 }
 
@@ -465,8 +511,22 @@ impl UnigramTokenizer {
         Tokenizer::decode(self, &tokens).map_err(PyValueError::new_err)
     }
 
-    fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
-        Tokenizer::train(self, texts, vocab_size).map_err(PyValueError::new_err)
+    /// 批量编码文本为token IDs（释放GIL并行处理）
+    fn encode_batch(&self, py: Python<'_>, texts: Vec<PyBackedStr>) -> PyResult<Vec<Vec<u32>>> {
+        py.allow_threads(|| Tokenizer::encode_batch(self, &texts))
+            .map_err(PyValueError::new_err)
+    }
+
+    /// 批量解码token IDs为文本（释放GIL并行处理）
+    fn decode_batch(&self, py: Python<'_>, token_lists: Vec<Vec<u32>>) -> PyResult<Vec<String>> {
+        py.allow_threads(|| Tokenizer::decode_batch(self, &token_lists))
+            .map_err(PyValueError::new_err)
+    }
+
+    fn train(&mut self, py: Python<'_>, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
+        // 训练期间释放GIL，其他Python线程可继续运行
+        py.allow_threads(|| Tokenizer::train(self, texts, vocab_size))
+            .map_err(PyValueError::new_err)
     }
 
     fn vocab_size(&self) -> PyResult<usize> {
@@ -485,8 +545,23 @@ impl UnigramTokenizer {
         Ok(self.scores.clone())
     }
 
+    /// 获取词汇表快照（ID -> 标记）
+    fn get_vocab(&self) -> HashMap<u32, String> {
+        self.base.vocab.id_map().clone()
+    }
+
+    /// 为固定词汇表生成稠密转移表以加速编码，返回是否启用
+    fn compile(&mut self) -> bool {
+        self.compile_trie()
+    }
+
+    /// 获取单个token ID对应的标记，直接借用词汇表中的字符串；ID不存在时返回 `None`
+    fn id_to_token(&self, token_id: u32) -> Option<&str> {
+        self.base.vocab.get_by_id(&token_id).map(String::as_str)
+    }
+
     fn set_scores(&mut self, scores: Vec<f64>) -> PyResult<()> {
-        self.scores = scores;
+        SubwordTokenizer::set_scores(self, scores);
         Ok(())
     }
 
@@ -2,10 +2,16 @@
 use pyo3::exceptions::PyValueError;
 #[cfg(feature = "python")]
 use pyo3::prelude::*;
+#[cfg(feature = "python")]
+use pyo3::pybacked::PyBackedStr;
 use std::collections::HashMap;
+use std::sync::OnceLock;
 
+use crate::base::byte_trie::{token_to_bytes, ByteTrie, Segment, DENSE_TABLE_MAX_BYTES};
+use crate::base::dict_file::DictFile;
 use crate::base::tokenizer_base::TokenizerBase;
 use crate::base::traits::{SubwordTokenizer, Tokenizer};
+use crate::base::utf8::string_from_utf8;
 
 /// WordPiece分词器
 #[cfg_attr(feature = "python", pyclass)]
@@ -18,6 +24,8 @@ pub struct WordPieceTokenizer {
     pub unk_token_id: u32,
     /// 下一个可用的token ID
     pub next_token_id: u32,
+    /// 词汇表前缀树（编码时按需构建，词汇表变化时失效）
+    trie: OnceLock<ByteTrie>,
 }
 
 impl WordPieceTokenizer {
@@ -30,6 +38,7 @@ impl WordPieceTokenizer {
             scores: Vec::new(),
             unk_token_id: 0,
             next_token_id: 0,
+            trie: OnceLock::new(),
         };
 
         // 初始化字节词汇表和常用汉字
@@ -48,6 +57,7 @@ impl WordPieceTokenizer {
             scores: Vec::new(),
             unk_token_id: 0,
             next_token_id: 0,
+            trie: OnceLock::new(),
         };
 
         // 初始化字节词汇表和常用汉字
@@ -62,6 +72,7 @@ impl WordPieceTokenizer {
         // 清空现有词汇表
         self.base.vocab.clear();
         self.scores.clear();
+        self.trie.take();
 
         // 添加所有字节值
         for i in 0..=255 {
@@ -99,6 +110,7 @@ impl WordPieceTokenizer {
         let file = File::open(file_path).map_err(|e| format!("无法打开常用汉字文件: {}", e))?;
 
         let reader = BufReader::new(file);
+        self.trie.take();
 
         for line in reader.lines() {
             let line = line.map_err(|e| format!("读取常用汉字文件失败: {}", e))?;
@@ -119,12 +131,9 @@ impl WordPieceTokenizer {
 
     /// 从dict目录加载初始化词表
     fn _load_vocab_from_dict(&mut self, dict_file: &str) -> Result<(), String> {
-        use std::fs::File;
-        use std::io::{BufRead, BufReader};
-
-        let file = File::open(dict_file).map_err(|e| format!("无法打开词表文件: {}", e))?;
-
-        let reader = BufReader::new(file);
+        // 内存映射词表文件，先确认可读且为合法UTF-8再修改词汇表
+        let dict = DictFile::open(dict_file)?;
+        self.trie.take();
 
         // 清除256以上的条目，保留基础字节词汇表
         let ids_to_remove: Vec<u32> = self
@@ -143,19 +152,16 @@ impl WordPieceTokenizer {
             }
         }
 
-        // 从文件加载新的词汇
-        for line in reader.lines() {
-            let line = line.map_err(|e| format!("读取词表文件失败: {}", e))?;
-            let token = line.trim();
-            if !token.is_empty() {
-                // 检查token是否已存在
-                if !self.base.vocab.contains_value(&token.to_string()) {
-                    self.base
-                        .vocab
-                        .insert(self.next_token_id, token.to_string());
-                    self.scores.push(0.0); // 初始分数为0
-                    self.next_token_id += 1;
-                }
+        // 从文件加载新的词汇，每行直接借用映射的文件内容，只为新标记分配字符串
+        self.base.vocab.reserve(dict.tokens().count());
+        for token in dict.tokens() {
+            // 检查token是否已存在
+            if !self.base.vocab.contains_value(token) {
+                self.base
+                    .vocab
+                    .insert(self.next_token_id, token.to_string());
+                self.scores.push(0.0); // 初始分数为0
+                self.next_token_id += 1;
             }
         }
 
@@ -207,55 +213,47 @@ impl WordPieceTokenizer {
         result
     }
 
-    /// 使用贪婪算法对字节序列进行分段
-    fn segment(&self, bytes: &[u8]) -> Option<Vec<u32>> {
+    /// 为当前词汇表的前缀树生成稠密转移表，加速编码时的前缀匹配
+    ///
+    /// 适合词汇表已固定的部署场景；之后修改词汇表会使其失效，编码回到普通前缀树。
+    /// 转移表超过 [`DENSE_TABLE_MAX_BYTES`] 时不编译，返回 `false`
+    pub fn compile_trie(&mut self) -> bool {
+        self.trie();
+        self.trie
+            .get_mut()
+            .is_some_and(|trie| trie.compile(DENSE_TABLE_MAX_BYTES))
+    }
+
+    /// 获取词汇表前缀树，首次使用时构建
+    fn trie(&self) -> &ByteTrie {
+        self.trie.get_or_init(|| {
+            let mut trie = ByteTrie::new();
+            for (&token_id, token_str) in self.base.vocab.iter() {
+                if let Some(bytes) = token_to_bytes(token_str) {
+                    trie.insert(&bytes, token_id);
+                }
+            }
+            trie
+        })
+    }
+
+    /// 使用贪婪最长匹配对字节序列进行分段
+    ///
+    /// 结果内联存放在 [`Segment`] 中，短片段不单独分配堆内存
+    fn segment(&self, bytes: &[u8]) -> Option<Segment> {
         if bytes.is_empty() {
-            return Some(vec![]);
+            return Some(Segment::new());
         }
 
-        let mut result = Vec::new();
+        let trie = self.trie();
+        let mut result = Segment::new();
         let mut i = 0;
 
         while i < bytes.len() {
-            // 尝试找到最长的匹配
-            let mut longest_match = None;
-            let mut longest_len = 0;
-
-            // 尝试所有可能的标记
-            for (token_id, token_str) in self.base.vocab.iter() {
-                // 将token字符串转换回字节序列
-                let token_bytes = if token_str.starts_with("<0x") && token_str.ends_with(">") {
-                    // 特殊字节表示
-                    if let Some(hex_str) = token_str
-                        .strip_prefix("<0x")
-                        .and_then(|s| s.strip_suffix(">"))
-                    {
-                        if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
-                            vec![byte_val]
-                        } else {
-                            continue;
-                        }
-                    } else {
-                        continue;
-                    }
-                } else {
-                    // 普通字符串
-                    token_str.as_bytes().to_vec()
-                };
-
-                let token_len = token_bytes.len();
-                if i + token_len <= bytes.len()
-                    && bytes[i..i + token_len] == token_bytes
-                    && token_len > longest_len
-                {
-                    longest_len = token_len;
-                    longest_match = Some(*token_id);
-                }
-            }
-
-            if let Some(token_id) = longest_match {
+            // 沿前缀树找到最长的匹配
+            if let Some((token_id, len)) = trie.longest_match(&bytes[i..]) {
                 result.push(token_id);
-                i += longest_len;
+                i += len;
             } else {
                 // 如果没有匹配，添加未知标记
                 result.push(self.unk_token_id);
@@ -271,8 +269,8 @@ impl Tokenizer for WordPieceTokenizer {
     type TokenId = u32;
 
     fn encode(&self, text: &str) -> Result<Vec<Self::TokenId>, String> {
-        // 使用基础分词器分割文本
-        let parts = self.base.split_text(text)?;
+        // 使用基础分词器分割文本（片段借用原文本，不逐个分配）
+        let parts = self.base.split_pieces(text);
 
         let mut result = Vec::new();
         for part in parts {
@@ -286,34 +284,42 @@ impl Tokenizer for WordPieceTokenizer {
     }
 
     fn decode(&self, tokens: &[Self::TokenId]) -> Result<String, String> {
-        let mut bytes = Vec::new();
-        for &token_id in tokens {
-            if let Some(token_str) = self.base.vocab.get_by_id(&token_id) {
-                // 将token字符串转换回字节序列
-                if token_str.starts_with("<0x") && token_str.ends_with(">") {
-                    // 特殊字节表示
-                    if let Some(hex_str) = token_str
-                        .strip_prefix("<0x")
-                        .and_then(|s| s.strip_suffix(">"))
-                    {
-                        if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
-                            bytes.push(byte_val);
-                        } else {
-                            return Err("无效的字节表示".to_string());
-                        }
+        // 先查出所有标记，再按总长度一次分配输出缓冲区，避免拼接时反复扩容
+        let token_strs = tokens
+            .iter()
+            .map(|token_id| {
+                self.base
+                    .vocab
+                    .get_by_id(token_id)
+                    .ok_or_else(|| format!("无效的标记ID: {}", token_id))
+            })
+            .collect::<Result<Vec<&String>, String>>()?;
+        // 字节标记（<0xNN>）只解码为1个字节，因此字符串总长度是输出长度的上界
+        let mut bytes = Vec::with_capacity(token_strs.iter().map(|s| s.len()).sum());
+
+        for token_str in token_strs {
+            // 将token字符串转换回字节序列
+            if token_str.starts_with("<0x") && token_str.ends_with(">") {
+                // 特殊字节表示
+                if let Some(hex_str) = token_str
+                    .strip_prefix("<0x")
+                    .and_then(|s| s.strip_suffix(">"))
+                {
+                    if let Ok(byte_val) = u8::from_str_radix(hex_str, 16) {
+                        bytes.push(byte_val);
                     } else {
                         return Err("无效的字节表示".to_string());
                     }
                 } else {
-                    // 普通字符串
-                    bytes.extend(token_str.as_bytes());
+                    return Err("无效的字节表示".to_string());
                 }
             } else {
-                return Err(format!("无效的标记ID: {}", token_id));
+                // 普通字符串
+                bytes.extend_from_slice(token_str.as_bytes());
             }
         }
 
-        String::from_utf8(bytes).map_err(|e| format!("UTF-8解码失败: {}", e))
+        string_from_utf8(bytes).map_err(|e| format!("UTF-8解码失败: {}", e))
     }
 
     fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> Result<(), String> {
@@ -322,6 +328,8 @@ impl Tokenizer for WordPieceTokenizer {
             return Ok(());
         }
 
+        self.trie.take();
+
         // 计算需要提取的子字符串数量
         let current_vocab_size = self.base.vocab.len() as u32;
         let substrings_needed = vocab_size - current_vocab_size;
@@ -389,6 +397,7 @@ impl Tokenizer for WordPieceTokenizer {
 
     fn load(&mut self, path: &str) -> Result<(), String> {
         // 使用基础分词器的加载功能
+        self.trie.take();
         self.base.load(path)?;
 
         // 加载分数
@@ -445,8 +454,22 @@ impl WordPieceTokenizer {
         Tokenizer::decode(self, &tokens).map_err(PyValueError::new_err)
     }
 
-    fn train(&mut self, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
-        Tokenizer::train(self, texts, vocab_size).map_err(PyValueError::new_err)
+    /// 批量编码文本为token IDs（释放GIL并行处理）
+    fn encode_batch(&self, py: Python<'_>, texts: Vec<PyBackedStr>) -> PyResult<Vec<Vec<u32>>> {
+        py.allow_threads(|| Tokenizer::encode_batch(self, &texts))
+            .map_err(PyValueError::new_err)
+    }
+
+    /// 批量解码token IDs为文本（释放GIL并行处理）
+    fn decode_batch(&self, py: Python<'_>, token_lists: Vec<Vec<u32>>) -> PyResult<Vec<String>> {
+        py.allow_threads(|| Tokenizer::decode_batch(self, &token_lists))
+            .map_err(PyValueError::new_err)
+    }
+
+    fn train(&mut self, py: Python<'_>, texts: Vec<String>, vocab_size: u32) -> PyResult<()> {
+        // 训练期间释放GIL，其他Python线程可继续运行
+        py.allow_threads(|| Tokenizer::train(self, texts, vocab_size))
+            .map_err(PyValueError::new_err)
     }
 
     fn vocab_size(&self) -> PyResult<usize> {
@@ -465,6 +488,21 @@ impl WordPieceTokenizer {
         Ok(self.scores.clone())
     }
 
+    /// 获取词汇表快照（ID -> 标记）
+    fn get_vocab(&self) -> HashMap<u32, String> {
+        self.base.vocab.id_map().clone()
+    }
+
+    /// 为固定词汇表生成稠密转移表以加速编码，返回是否启用
+    fn compile(&mut self) -> bool {
+        self.compile_trie()
+    }
+
+    /// 获取单个token ID对应的标记，直接借用词汇表中的字符串；ID不存在时返回 `None`
+    fn id_to_token(&self, token_id: u32) -> Option<&str> {
+        self.base.vocab.get_by_id(&token_id).map(String::as_str)
+    }
+
     fn set_scores(&mut self, scores: Vec<f64>) -> PyResult<()> {
         self.scores = scores;
         Ok(())
@@ -0,0 +1,40 @@
+"""pytest共享配置
+
+需要预先加载词表的分词器在整个测试会话中只构建一次，各测试函数共享同一个实例，
+即 ``zero_tokenizer.get_tokenizer`` 返回的缓存实例。
+词表文件按相对路径 ``dict/`` 读取，会话开始时切换到项目根目录，
+因此在项目根目录或 ``tests/python`` 下运行均可。
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+# 项目根目录（dict/ 所在目录）
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# 化学符号表在前，两个词表中共有的标记保留符号表中的ID
+DICT_FILES = ["化学常用符号表.txt", "常用汉字字表.txt"]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def project_root_cwd():
+    """整个测试会话期间以项目根目录为工作目录，结束后恢复原目录"""
+    old_cwd = os.getcwd()
+    os.chdir(PROJECT_ROOT)
+    try:
+        yield PROJECT_ROOT
+    finally:
+        os.chdir(old_cwd)
+
+
+@pytest.fixture(scope="session")
+def dict_tokenizer():
+    """加载了化学符号表和常用汉字字表的BPE分词器（只读，测试中不要修改）
+
+    与调用方一样通过 ``get_tokenizer`` 取得缓存并已编译的共享实例
+    """
+    import zero_tokenizer
+
+    return zero_tokenizer.get_tokenizer(DICT_FILES)
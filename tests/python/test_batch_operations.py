@@ -49,6 +49,49 @@ def test_bbpe_decode_batch():
     assert decoded_texts == texts
 
 
+def test_bbpe_encode_bytes():
+    """测试BBPE直接编码UTF-8字节"""
+    from zero_tokenizer import BBPETokenizer
+
+    tokenizer = BBPETokenizer()
+    texts = ["Hello world!", "你好世界！"]
+
+    tokenizer.train(texts, 300)
+
+    for text in texts:
+        data = text.encode("utf-8")
+        expected = tokenizer.encode(text)
+        assert tokenizer.encode_bytes(data) == expected
+        # encode也直接接受字节类对象
+        assert tokenizer.encode(data) == expected
+        assert tokenizer.encode(bytearray(data)) == expected
+        assert tokenizer.encode(memoryview(data)) == expected
+
+    # 非法UTF-8字节应报错
+    with pytest.raises(Exception):
+        tokenizer.encode_bytes(b"\xff\xfe")
+
+
+def test_bbpe_encode_packed():
+    """测试BBPE打包编码与解码"""
+    from zero_tokenizer import BBPETokenizer
+
+    tokenizer = BBPETokenizer()
+    texts = ["Hello world!", "你好世界！"]
+
+    tokenizer.train(texts, 300)
+
+    for text in texts:
+        packed = tokenizer.encode_packed(text)
+        tokens = [int.from_bytes(packed[i:i + 4], "little") for i in range(0, len(packed), 4)]
+        assert tokens == tokenizer.encode(text)
+        assert tokenizer.decode_packed(packed) == text
+
+    # 长度不是4的倍数应报错
+    with pytest.raises(Exception):
+        tokenizer.decode_packed(b"\x01\x02\x03")
+
+
 def test_large_batch():
     """测试大批量处理"""
     from zero_tokenizer import BBPETokenizer
@@ -93,6 +136,20 @@ def test_unigram_encode_batch():
         assert decoded == texts[i]
 
 
+def test_unigram_wordpiece_decode_batch():
+    """测试Unigram和WordPiece批量解码"""
+    from zero_tokenizer import UnigramTokenizer, WordPieceTokenizer
+
+    texts = ["测试文本1", "测试文本2", "测试文本3"]
+
+    for tokenizer in (UnigramTokenizer(), WordPieceTokenizer()):
+        tokenizer.train(texts, 16000)
+        token_lists = [tokenizer.encode(text) for text in texts]
+
+        decoded_texts = tokenizer.decode_batch(token_lists)
+        assert decoded_texts == [tokenizer.decode(tokens) for tokens in token_lists]
+
+
 def test_wordpiece_encode_batch():
     """测试WordPiece批量编码"""
     from zero_tokenizer import WordPieceTokenizer
@@ -123,14 +180,110 @@ def test_bpe_encode_batch():
 
     tokenizer.train_from_iterator(texts, 300)
 
-    # BPE使用不同的方法名
-    batch_tokens = [tokenizer.py_encode(text) for text in texts]
+    # 一次调用完成批量编码（释放GIL并行处理）
+    batch_tokens = tokenizer.encode_batch(texts)
     assert len(batch_tokens) == len(texts)
+    assert batch_tokens == [tokenizer.encode(text) for text in texts]
 
     # 验证解码
-    for i, tokens in enumerate(batch_tokens):
-        decoded = tokenizer.py_decode(tokens)
-        assert decoded == texts[i]
+    assert tokenizer.decode_batch(batch_tokens) == texts
+
+
+def test_bpe_encode_ordinary():
+    """测试encode_ordinary与encode结果一致"""
+    from zero_tokenizer import Tokenizer
+
+    tokenizer = Tokenizer()
+    texts = ["H", "氢", "你好世界", "<|endoftext|>"]
+    tokenizer.train_from_iterator(texts, 300)
+
+    for text in texts:
+        assert tokenizer.encode_ordinary(text) == tokenizer.encode(text)
+
+
+def test_bpe_encode_bytes():
+    """测试BPE直接编码UTF-8字节"""
+    from zero_tokenizer import Tokenizer
+
+    tokenizer = Tokenizer()
+    texts = ["Hello world", "你好世界", ""]
+    tokenizer.train_from_iterator(texts, 300)
+
+    for text in texts:
+        data = text.encode("utf-8")
+        expected = tokenizer.encode(text)
+        assert tokenizer.encode_bytes(data) == expected
+        assert tokenizer.encode_bytes(bytearray(data)) == expected
+        assert tokenizer.encode_bytes(memoryview(data)) == expected
+
+    with pytest.raises(ValueError):
+        tokenizer.encode_bytes(b"\xff\xfe")
+
+
+def test_decode_u32_array():
+    """测试用u32数组解码"""
+    from array import array
+    from zero_tokenizer import Tokenizer, BBPETokenizer
+
+    texts = ["Hello world", "你好世界"]
+    for tokenizer in (Tokenizer(), BBPETokenizer()):
+        tokenizer.train(texts, 300)
+        for text in texts:
+            ids = array("I", tokenizer.encode(text))
+            assert tokenizer.decode(ids) == text
+            assert tokenizer.decode(memoryview(ids)) == text
+
+        # 元组、元素类型不是u32的数组和不连续的视图按整数序列处理
+        ids = tokenizer.encode(texts[0])
+        assert tokenizer.decode(tuple(ids)) == texts[0]
+        assert tokenizer.decode(array("q", ids)) == texts[0]
+        strided = memoryview(array("I", [x for i in ids for x in (i, 0)]))[::2]
+        assert tokenizer.decode(strided) == texts[0]
+
+
+def test_bpe_encode_packed():
+    """测试BPE打包编码与解码"""
+    from zero_tokenizer import Tokenizer
+
+    tokenizer = Tokenizer()
+    texts = ["Hello world", "Test text", ""]
+
+    tokenizer.train_from_iterator(texts, 300)
+
+    for text in texts:
+        packed = tokenizer.encode_packed(text)
+        tokens = [int.from_bytes(packed[i:i + 4], "little") for i in range(0, len(packed), 4)]
+        assert tokens == tokenizer.encode(text)
+        assert tokenizer.decode_packed(packed) == text
+
+    assert tokenizer.encode_batch_packed(texts) == [tokenizer.encode_packed(t) for t in texts]
+
+    # 长度不是4的倍数应报错
+    with pytest.raises(ValueError):
+        tokenizer.decode_packed(b"\x01\x02\x03")
+
+
+def test_encode_batch_flat():
+    """测试展平的批量编码结果 (values, offsets)"""
+    from zero_tokenizer import Tokenizer, BBPETokenizer
+
+    texts = ["Hello world", "", "你好世界", "Test text"]
+
+    for cls in (Tokenizer, BBPETokenizer):
+        tokenizer = cls()
+        if cls is Tokenizer:
+            tokenizer.train_from_iterator(texts, 300)
+        else:
+            tokenizer.train(texts, 300)
+
+        values, offsets = tokenizer.encode_batch_flat(texts)
+        values = [int.from_bytes(values[i:i + 4], "little") for i in range(0, len(values), 4)]
+        offsets = [int.from_bytes(offsets[i:i + 8], "little") for i in range(0, len(offsets), 8)]
+
+        assert len(offsets) == len(texts) + 1
+        assert offsets[0] == 0 and offsets[-1] == len(values)
+        flat = [values[offsets[i]:offsets[i + 1]] for i in range(len(texts))]
+        assert flat == tokenizer.encode_batch(texts)
 
 
 def test_empty_texts_in_batch():
@@ -197,6 +350,85 @@ def test_batch_with_unicode():
         assert decoded == texts[i]
 
 
+def test_id_to_token():
+    """测试按ID查询标记"""
+    from zero_tokenizer import Tokenizer, BBPETokenizer, UnigramTokenizer, WordPieceTokenizer
+
+    texts = ["Hello world", "你好世界"]
+
+    for cls in (Tokenizer, BBPETokenizer, UnigramTokenizer, WordPieceTokenizer):
+        tokenizer = cls()
+        if cls is Tokenizer:
+            tokenizer.train_from_iterator(texts, 300)
+        else:
+            tokenizer.train(texts, 300)
+
+        vocab = tokenizer.get_vocab()
+        for token_id in tokenizer.encode("Hello"):
+            expected = vocab[token_id]
+            if isinstance(expected, (bytes, list)):
+                expected = bytes(expected).decode("utf-8", "replace")
+            assert tokenizer.id_to_token(token_id) == expected
+
+        # 不存在的ID返回None
+        assert tokenizer.id_to_token(2**31) is None
+
+
+def test_compile_fixed_vocab():
+    """测试为固定词汇表生成稠密转移表"""
+    from zero_tokenizer import UnigramTokenizer, WordPieceTokenizer
+
+    texts = ["测试文本1", "Hello world"]
+
+    for cls in (UnigramTokenizer, WordPieceTokenizer):
+        tokenizer = cls()
+        tokenizer.train(texts, 16000)
+        expected = [tokenizer.encode(text) for text in texts]
+
+        assert tokenizer.compile()
+        assert [tokenizer.encode(text) for text in texts] == expected
+        assert tokenizer.encode_batch(texts) == expected
+
+
+def test_bpe_compile_decode():
+    """测试BPE编译后按连续存放的标记表解码"""
+    from zero_tokenizer import Tokenizer
+
+    texts = ["Hello world", "你好世界", "Test text"]
+
+    tokenizer = Tokenizer()
+    tokenizer.train_from_iterator(texts, 300)
+    batch_tokens = tokenizer.encode_batch(texts)
+    token_ids = sorted(tokenizer.get_vocab())
+
+    tokenizer.compile()
+    assert tokenizer.encode_batch(texts) == batch_tokens
+    assert tokenizer.decode_batch(batch_tokens) == texts
+    assert [tokenizer.id_to_token(i) for i in token_ids] == [
+        tokenizer.get_vocab()[i] for i in token_ids
+    ]
+    assert tokenizer.id_to_token(2**31) is None
+
+
+def test_get_tokenizer_cached(tmp_path, monkeypatch):
+    """测试按词表目录和词表文件缓存的共享分词器"""
+    import zero_tokenizer
+
+    tokenizer = zero_tokenizer.get_tokenizer(["化学常用符号表.txt"])
+    assert zero_tokenizer.get_tokenizer(("化学常用符号表.txt",)) is tokenizer
+    assert zero_tokenizer.get_tokenizer(["常用汉字字表.txt"]) is not tokenizer
+    assert tokenizer.decode(tokenizer.encode("氢")) == "氢"
+
+    # 加载失败不缓存
+    with pytest.raises(Exception):
+        zero_tokenizer.get_tokenizer(["不存在的词表.txt"])
+
+    # 缓存按解析后的dict目录区分，切换工作目录后不会取到其他目录下构建的实例
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(Exception):
+        zero_tokenizer.get_tokenizer(["化学常用符号表.txt"])
+
+
 def test_batch_performance_comparison():
     """比较批量处理和单独处理的性能"""
     from zero_tokenizer import BBPETokenizer
@@ -0,0 +1,55 @@
+"""基于pytest-benchmark的微基准测试
+
+对词表初始化测试中的两段热点（中文编码、编码解码往返）计时，
+分词器使用 conftest.py 中的 ``dict_tokenizer``。未安装pytest-benchmark时整个模块跳过。
+
+只运行基准测试并与上次保存的结果比较::
+
+    pytest tests/python/test_benchmark.py --benchmark-only --benchmark-autosave --benchmark-compare
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+CHINESE_INPUTS = ["你", "好", "你好", "世界", "你好世界"]
+ROUND_TRIP_INPUTS = ["氢", "Li", "氢Li", "你", "好", "你好"]
+
+# 被测函数只需几微秒，每轮重复多次以减小计时误差
+PEDANTIC = {"rounds": 100, "iterations": 10, "warmup_rounds": 10}
+
+
+@pytest.mark.benchmark(group="encode-chinese")
+def test_encode_chinese(benchmark, dict_tokenizer):
+    """逐条编码中文文本"""
+    encode = dict_tokenizer.encode
+    result = benchmark.pedantic(lambda: [encode(text) for text in CHINESE_INPUTS], **PEDANTIC)
+    assert all(result)
+
+
+@pytest.mark.benchmark(group="encode-chinese")
+def test_encode_batch_chinese(benchmark, dict_tokenizer):
+    """一次调用批量编码中文文本"""
+    result = benchmark.pedantic(dict_tokenizer.encode_batch, args=(CHINESE_INPUTS,), **PEDANTIC)
+    assert result == [dict_tokenizer.encode(text) for text in CHINESE_INPUTS]
+
+
+@pytest.mark.benchmark(group="round-trip")
+def test_round_trip(benchmark, dict_tokenizer):
+    """逐条编码后解码"""
+    encode, decode = dict_tokenizer.encode, dict_tokenizer.decode
+    result = benchmark.pedantic(
+        lambda: [decode(encode(text)) for text in ROUND_TRIP_INPUTS], **PEDANTIC
+    )
+    assert result == ROUND_TRIP_INPUTS
+
+
+@pytest.mark.benchmark(group="round-trip")
+def test_round_trip_batch(benchmark, dict_tokenizer):
+    """批量编码后批量解码"""
+
+    def round_trip():
+        return dict_tokenizer.decode_batch(dict_tokenizer.encode_batch(ROUND_TRIP_INPUTS))
+
+    result = benchmark.pedantic(round_trip, **PEDANTIC)
+    assert result == ROUND_TRIP_INPUTS
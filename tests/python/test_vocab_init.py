@@ -1,150 +1,64 @@
 #!/usr/bin/env python3
 """
 测试从dict目录加载初始化词表的功能
+
+加载了词表的分词器由 conftest.py 中的会话级夹具 ``dict_tokenizer`` 提供，只构建一次
 """
 
-import sys
-import os
+import pytest
+
+ELEMENT_TEXTS = ["H", "氢", "Li", "锂", "氢Li"]
+CHINESE_TEXTS = ["你", "好", "你好", "世界", "你好世界"]
 
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 def test_load_vocab_from_dict():
-    """测试从dict目录加载初始化词表"""
-    print("测试从dict目录加载初始化词表...")
-    
-    try:
-        import zero_tokenizer
-        print("✓ zero_tokenizer模块导入成功")
-    except ImportError as e:
-        print(f"✗ zero_tokenizer模块导入失败: {e}")
-        return False
-    
-    # 创建BPE分词器
-    try:
-        tokenizer = zero_tokenizer.Tokenizer()
-        print("✓ BPE分词器创建成功")
-    except Exception as e:
-        print(f"✗ BPE分词器创建失败: {e}")
-        return False
-    
-    # 获取初始词汇表大小
+    """测试加载单个词表后词汇表增大"""
+    import zero_tokenizer
+
+    tokenizer = zero_tokenizer.Tokenizer()
     initial_vocab_size = tokenizer.get_vocab_size()
-    print(f"初始词汇表大小: {initial_vocab_size}")
-    
-    # 测试加载化学基本元素表
-    try:
-        tokenizer.load_vocab_from_dict("化学基本元素表.txt")
-        print("✓ 成功加载化学基本元素表")
-    except Exception as e:
-        print(f"✗ 加载化学基本元素表失败: {e}")
-        return False
-    
-    # 检查词汇表是否增加
-    after_elements_vocab_size = tokenizer.get_vocab_size()
-    print(f"加载化学元素后词汇表大小: {after_elements_vocab_size}")
-    
-    if after_elements_vocab_size <= initial_vocab_size:
-        print("✗ 词汇表大小没有增加")
-        return False
-    
-    # 测试编码化学元素
-    test_cases = [
-        ("H", True),  # 应该能编码
-        ("氢", True),  # 应该能编码
-        ("Li", True),  # 应该能编码
-        ("锂", True),  # 应该能编码
-        ("氢Li", True),  # 应该能编码
-        ("未知元素", False),  # 可能无法编码
-    ]
-    
-    print("\n编码测试:")
-    for text, should_succeed in test_cases:
-        try:
-            tokens = tokenizer.encode(text)
-            if should_succeed:
-                print(f"✓ 文本 '{text}' 编码成功: {tokens}")
-            else:
-                print(f"? 文本 '{text}' 编码成功（可能失败）: {tokens}")
-        except Exception as e:
-            if should_succeed:
-                print(f"✗ 文本 '{text}' 编码失败: {e}")
-                return False
-            else:
-                print(f"? 文本 '{text}' 编码失败（预期）: {e}")
-    
-    # 测试加载常用汉字字表
-    try:
-        tokenizer.load_vocab_from_dict("常用汉字字表.txt")
-        print("\n✓ 成功加载常用汉字字表")
-    except Exception as e:
-        print(f"\n✗ 加载常用汉字字表失败: {e}")
-        return False
-    
-    # 检查词汇表是否进一步增加
-    final_vocab_size = tokenizer.get_vocab_size()
-    print(f"加载常用汉字后词汇表大小: {final_vocab_size}")
-    
-    if final_vocab_size <= after_elements_vocab_size:
-        print("✗ 词汇表大小没有增加")
-        return False
-    
-    # 测试编码中文文本
-    chinese_test_cases = [
-        ("你", True),  # 应该能编码
-        ("好", True),  # 应该能编码
-        ("你好", True),  # 应该能编码
-        ("世界", True),  # 应该能编码
-        ("你好世界", True),  # 应该能编码
-    ]
-    
-    print("\n中文编码测试:")
-    for text, should_succeed in chinese_test_cases:
-        try:
-            tokens = tokenizer.encode(text)
-            if should_succeed:
-                print(f"✓ 文本 '{text}' 编码成功: {tokens}")
-            else:
-                print(f"? 文本 '{text}' 编码成功（可能失败）: {tokens}")
-        except Exception as e:
-            if should_succeed:
-                print(f"✗ 文本 '{text}' 编码失败: {e}")
-                return False
-            else:
-                print(f"? 文本 '{text}' 编码失败（预期）: {e}")
-    
-    # 测试编码解码往返
-    print("\n编码解码往返测试:")
-    test_texts = ["氢", "Li", "氢Li", "你", "好", "你好"]
-    for text in test_texts:
-        try:
-            tokens = tokenizer.encode(text)
-            decoded = tokenizer.decode(tokens)
-            if decoded == text:
-                print(f"✓ '{text}' -> {tokens} -> '{decoded}' (往返成功)")
-            else:
-                print(f"✗ '{text}' -> {tokens} -> '{decoded}' (往返失败)")
-                return False
-        except Exception as e:
-            print(f"✗ '{text}' 往返测试失败: {e}")
-            return False
-    
-    print("\n✓ 所有测试通过!")
-    return True
-
-def main():
-    """运行所有测试"""
-    print("开始测试初始化词表功能...")
-    print("=" * 50)
-    
-    if test_load_vocab_from_dict():
-        print("\n" + "=" * 50)
-        print("🎉 所有测试通过！")
-        return 0
-    else:
-        print("\n" + "=" * 50)
-        print("❌ 部分测试失败")
-        return 1
+
+    tokenizer.load_vocab_from_dict("化学常用符号表.txt")
+    assert tokenizer.get_vocab_size() > initial_vocab_size
+
+
+def test_load_vocab_from_dicts(dict_tokenizer):
+    """测试同时加载多个词表得到各词表的并集"""
+    import zero_tokenizer
+
+    symbols_only = zero_tokenizer.Tokenizer()
+    symbols_only.load_vocab_from_dict("化学常用符号表.txt")
+    assert dict_tokenizer.get_vocab_size() > symbols_only.get_vocab_size()
+
+    vocab = set(dict_tokenizer.get_vocab().values())
+    assert {"H", "氢", "你", "好"} <= vocab
+
+
+@pytest.mark.parametrize("text", ELEMENT_TEXTS)
+def test_encode_elements(dict_tokenizer, text):
+    """测试编码化学元素"""
+    assert dict_tokenizer.encode(text)
+
+
+@pytest.mark.parametrize("text", CHINESE_TEXTS)
+def test_encode_chinese(dict_tokenizer, text):
+    """测试编码中文文本"""
+    assert dict_tokenizer.encode(text)
+
+
+def test_encode_unknown(dict_tokenizer):
+    """测试编码词表之外的文本不报错"""
+    dict_tokenizer.encode("未知元素")
+
+
+def test_round_trip(dict_tokenizer):
+    """测试编码解码往返"""
+    texts = ["氢", "Li", "氢Li", "你", "好", "你好"]
+    # 一次调用完成整批编码和解码
+    tokens_list = dict_tokenizer.encode_batch(texts)
+    assert dict_tokenizer.decode_batch(tokens_list) == texts
+
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    # 支持直接运行
+    pytest.main([__file__, "-v"])
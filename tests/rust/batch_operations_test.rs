@@ -131,6 +131,55 @@ fn test_wordpiece_parallel_encode() {
     }
 }
 
+#[test]
+fn test_trait_encode_decode_batch() {
+    let texts = vec![
+        "Hello world!".to_string(),
+        "你好世界！".to_string(),
+        "".to_string(),
+    ];
+
+    let mut bbpe = zero_tokenizer::prelude::bbpe().unwrap();
+    bbpe.train(texts.clone(), 300).unwrap();
+    let batch_results = bbpe.encode_batch(&texts).unwrap();
+    for (text, tokens) in texts.iter().zip(batch_results.iter()) {
+        assert_eq!(*tokens, bbpe.encode(text).unwrap());
+    }
+    assert_eq!(bbpe.decode_batch(&batch_results).unwrap(), texts);
+
+    let mut unigram = zero_tokenizer::prelude::unigram().unwrap();
+    unigram.train(texts.clone(), 16000).unwrap();
+    let batch_results = unigram.encode_batch(&texts).unwrap();
+    assert_eq!(unigram.decode_batch(&batch_results).unwrap(), texts);
+}
+
+#[test]
+fn test_batch_parallel_threshold() {
+    use zero_tokenizer::base::traits::{should_parallelize_encode, PARALLEL_MIN_BATCH_BYTES};
+
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    let small = vec!["Hello world!".to_string(), "你好世界！".to_string()];
+    tokenizer.train(small.clone(), 300).unwrap();
+
+    // 小批次串行编码，超过阈值的批次并行编码，结果应一致
+    let large: Vec<String> = small
+        .iter()
+        .cycle()
+        .take(PARALLEL_MIN_BATCH_BYTES / 8)
+        .cloned()
+        .collect();
+    assert!(!should_parallelize_encode(&small));
+    assert!(should_parallelize_encode(&large));
+
+    for texts in [&small, &large] {
+        let batch_results = tokenizer.encode_batch(texts).unwrap();
+        for (text, tokens) in texts.iter().zip(batch_results.iter()) {
+            assert_eq!(*tokens, tokenizer.encode(text).unwrap());
+        }
+        assert_eq!(tokenizer.decode_batch(&batch_results).unwrap(), *texts);
+    }
+}
+
 #[cfg(feature = "python")]
 #[test]
 fn test_bpe_parallel_encode() {
@@ -33,3 +33,155 @@ fn test_bbpe_default() {
 
     test_utils::test_default_constructor(&tokenizer, 256); // BBPE初始化时包含所有字节值
 }
+
+/// 测试BBPE按文本计数训练
+#[test]
+fn test_bbpe_train_from_counts() {
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    let texts = vec!["hello world".to_string(), "hello there".to_string()];
+    let counts = vec![3, 1];
+
+    tokenizer.train_from_counts(&texts, &counts, 300).unwrap();
+    assert!(!tokenizer.merges.is_empty());
+
+    // 计数不一致时应返回错误
+    assert!(tokenizer.train_from_counts(&texts, &[1], 300).is_err());
+
+    let tokens = tokenizer.encode("hello world").unwrap();
+    assert_eq!(tokenizer.decode(&tokens).unwrap(), "hello world");
+}
+
+/// 测试编译合并表后编码结果不变
+#[test]
+fn test_bbpe_compile_merges() {
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    let texts = vec!["hello world".to_string(), "hello there 你好".to_string()];
+    tokenizer.train(texts, 300).unwrap();
+
+    let text = "hello world, hello there 你好";
+    let expected = tokenizer.encode(text).unwrap();
+
+    tokenizer.compile_merges();
+    assert_eq!(tokenizer.compiled_merges.len(), tokenizer.merges.len());
+    assert_eq!(tokenizer.encode(text).unwrap(), expected);
+
+    // 重新训练后编译结果被清空
+    tokenizer
+        .train(vec!["other text".to_string()], 300)
+        .unwrap();
+    assert!(tokenizer.compiled_merges.is_empty());
+}
+
+/// 测试编码缓存命中后结果不变，重新训练后缓存被清空
+#[test]
+fn test_bbpe_encode_cache() {
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    let texts = vec!["hello world".to_string(), "hello there".to_string()];
+    tokenizer.train(texts, 300).unwrap();
+
+    let text = "hello hello world";
+    let first = tokenizer.encode(text).unwrap();
+    assert!(!tokenizer.encode_cache.is_empty());
+    assert_eq!(tokenizer.encode(text).unwrap(), first);
+
+    tokenizer
+        .train(vec!["other text".to_string()], 300)
+        .unwrap();
+    assert!(tokenizer.encode_cache.is_empty());
+}
+
+/// 测试加载基础字符重新编号后不再使用旧ID的缓存和合并规则
+#[cfg(feature = "python")]
+#[test]
+fn test_bbpe_load_base_chars_resets_cache() {
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    tokenizer
+        .train(vec!["hello world 你好".to_string()], 300)
+        .unwrap();
+    tokenizer.compile_merges();
+
+    let text = "hello 你好";
+    let before = tokenizer.encode(text).unwrap();
+    assert!(!tokenizer.encode_cache.is_empty());
+
+    tokenizer
+        .py_load_base_chars("dict/常用汉字字表.txt".to_string())
+        .unwrap();
+    assert!(tokenizer.merges.is_empty());
+    assert!(tokenizer.compiled_merges.is_empty());
+    assert!(tokenizer.encode_cache.is_empty());
+
+    let after = tokenizer.encode(text).unwrap();
+    assert_ne!(after, before);
+    assert_eq!(tokenizer.decode(&after).unwrap(), text);
+}
+
+/// 测试编码缓存满后淘汰最近未被访问的片段
+#[test]
+fn test_encode_cache_eviction() {
+    use zero_tokenizer::base::encode_cache::EncodeCache;
+
+    let cache = EncodeCache::new(2);
+    let mut out = Vec::new();
+    cache.insert("a", &[1]);
+    cache.insert("b", &[2]);
+
+    // "a" 被再次访问，插入 "c" 时淘汰 "b"
+    assert!(cache.extend_into("a", &mut out));
+    cache.insert("c", &[3]);
+    assert_eq!(cache.len(), 2);
+    assert!(cache.extend_into("a", &mut out));
+    assert!(!cache.extend_into("b", &mut out));
+    assert!(cache.extend_into("c", &mut out));
+    assert_eq!(out, vec![1, 1, 3]);
+}
+
+/// 测试按合并等级应用合并规则：等级低的先合并，长序列与短序列结果一致
+#[test]
+fn test_merge_by_rank() {
+    use std::collections::HashMap;
+    use zero_tokenizer::base::merge_table::merge_by_rank;
+
+    // (b, c) 先于 (a, b) 学到，"abc" 应合并为 [a, bc]
+    let merges: HashMap<(u32, u32), u32> = [((2, 3), 10), ((1, 2), 11), ((10, 10), 12)]
+        .into_iter()
+        .collect();
+    let lookup = |pair: &(u32, u32)| merges.get(pair).copied();
+
+    let mut ids = vec![1, 2, 3];
+    merge_by_rank(&mut ids, lookup);
+    assert_eq!(ids, vec![1, 10]);
+
+    // 相同等级从左到右合并
+    let mut ids = vec![2, 3, 2, 3, 2, 3];
+    merge_by_rank(&mut ids, lookup);
+    assert_eq!(ids, vec![12, 10]);
+
+    // 超过线性扫描阈值的长序列
+    let mut ids: Vec<u32> = [2, 3].repeat(21);
+    merge_by_rank(&mut ids, lookup);
+    let mut expected = vec![12; 10];
+    expected.push(10);
+    assert_eq!(ids, expected);
+}
+
+/// 测试打包键合并表的查找
+#[test]
+fn test_merge_table_lookup() {
+    use std::collections::HashMap;
+    use zero_tokenizer::base::merge_table::MergeTable;
+
+    let mut merges: HashMap<(u32, u32), u32> =
+        (0..1000u32).map(|i| ((i, i + 1), 256 + i)).collect();
+    // 打包后与空槽位标记相同的合并对
+    merges.insert((u32::MAX, u32::MAX), 5000);
+
+    let table = MergeTable::from_merges(&merges);
+    assert_eq!(table.len(), merges.len());
+    for (pair, &id) in &merges {
+        assert_eq!(table.get(pair), Some(id));
+    }
+    assert_eq!(table.get(&(1, 0)), None);
+    assert_eq!(table.get(&(0, u32::MAX)), None);
+    assert_eq!(MergeTable::default().get(&(0, 1)), None);
+}
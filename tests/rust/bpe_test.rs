@@ -67,3 +67,58 @@ fn test_word_merge_pair() {
     let word = tokenizer.encode(text).unwrap();
     assert!(!word.is_empty());
 }
+
+/// 测试从dict目录加载词表时已存在的标记保留原ID
+#[cfg(feature = "python")]
+#[test]
+fn test_load_vocab_from_dict_keeps_existing_ids() {
+    let mut tokenizer = zero_tokenizer::prelude::bpe().unwrap();
+    tokenizer.vocab.insert(72, "H".into());
+
+    tokenizer
+        ._load_vocab_from_dict("化学常用符号表.txt")
+        .unwrap();
+    let loaded = tokenizer.vocab.len();
+    assert_eq!(tokenizer.vocab.get_by_value("H"), Some(&72));
+    assert_eq!(tokenizer.next_token_id as usize, 256 + loaded - 1);
+    assert!(tokenizer.vocab.validate().is_ok());
+
+    // 重复加载替换之前加载的词汇，词汇表大小不变
+    tokenizer
+        ._load_vocab_from_dict("化学常用符号表.txt")
+        .unwrap();
+    assert_eq!(tokenizer.vocab.len(), loaded);
+    assert_eq!(tokenizer.vocab.get_by_value("H"), Some(&72));
+}
+
+/// 测试同时加载多个词表得到按文件顺序编号的并集
+#[cfg(feature = "python")]
+#[test]
+fn test_load_vocab_from_dicts() {
+    let mut tokenizer = zero_tokenizer::prelude::bpe().unwrap();
+    tokenizer
+        ._load_vocab_from_dict("化学常用符号表.txt")
+        .unwrap();
+    let symbols: Vec<(u32, String)> = tokenizer
+        .vocab
+        .iter()
+        .map(|(&id, token)| (id, token.to_string()))
+        .collect();
+
+    tokenizer
+        ._load_vocab_from_dicts(&["化学常用符号表.txt", "常用汉字字表.txt"])
+        .unwrap();
+    for (id, token) in &symbols {
+        assert_eq!(tokenizer.vocab.get_by_value(token.as_str()), Some(id));
+    }
+    assert!(tokenizer.vocab.contains_value("你"));
+    assert!(tokenizer.vocab.len() > symbols.len());
+    assert!(tokenizer.vocab.validate().is_ok());
+
+    // 任一文件无法打开时不修改词汇表
+    let loaded = tokenizer.vocab.len();
+    assert!(tokenizer
+        ._load_vocab_from_dicts(&["常用汉字字表.txt", "不存在的词表.txt"])
+        .is_err());
+    assert_eq!(tokenizer.vocab.len(), loaded);
+}
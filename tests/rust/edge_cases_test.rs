@@ -225,3 +225,56 @@ fn test_binary_like_text() {
     let decoded = tokenizer.decode(&tokens).unwrap();
     assert_eq!(decoded, text);
 }
+
+#[test]
+fn test_id_buffer_reuse() {
+    use zero_tokenizer::base::scratch::with_id_buffer;
+
+    // 缓冲区传入前已清空
+    with_id_buffer(|ids| ids.extend_from_slice(&[1, 2, 3]));
+    with_id_buffer(|ids| assert!(ids.is_empty()));
+
+    // 重入时使用独立的临时缓冲区
+    with_id_buffer(|outer| {
+        outer.push(1);
+        with_id_buffer(|inner| {
+            assert!(inner.is_empty());
+            inner.push(2);
+        });
+        assert_eq!(*outer, vec![1]);
+    });
+
+    // 超长片段前后的编码结果一致
+    let mut tokenizer = zero_tokenizer::prelude::bbpe().unwrap();
+    tokenizer.train(vec!["abab".to_string()], 300).unwrap();
+    let before = tokenizer.encode("abab").unwrap();
+    let text = "ab".repeat(50_000);
+    let tokens = tokenizer.encode(&text).unwrap();
+    assert_eq!(tokenizer.decode(&tokens).unwrap(), text);
+    assert_eq!(tokenizer.encode("abab").unwrap(), before);
+}
+
+#[test]
+fn test_token_table_sparse_ids() {
+    use zero_tokenizer::base::token_table::TokenTable;
+
+    // ID不连续时缺失的ID返回None，空标记与缺失的ID可以区分
+    let table = TokenTable::from_tokens([(5, "氢"), (0, "a"), (2, ""), (3, "Li")]);
+    assert_eq!(table.len(), 4);
+    assert_eq!(table.get(0), Some("a"));
+    assert_eq!(table.get(1), None);
+    assert_eq!(table.get(2), Some(""));
+    assert_eq!(table.get(3), Some("Li"));
+    assert_eq!(table.get(4), None);
+    assert_eq!(table.get(5), Some("氢"));
+    assert_eq!(table.get(6), None);
+    assert_eq!(table.get(u32::MAX), None);
+
+    // 基本多文种平面内的码点ID照常建表
+    let table = TokenTable::from_tokens([(0x4E00, "一"), (0x9FA5, "龥")]);
+    assert_eq!(table.get(0x9FA5), Some("龥"));
+
+    // 只有少数辅助平面码点时ID过于稀疏，不建表
+    let table = TokenTable::from_tokens([(0, "a"), (0x2A6D6, "𪛖")]);
+    assert!(table.is_empty());
+}
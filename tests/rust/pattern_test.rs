@@ -176,3 +176,82 @@ fn test_pattern_persistence() {
     let tokens = tokenizer.encode(text).unwrap();
     assert!(!tokens.is_empty());
 }
+
+#[test]
+fn test_compile_pattern_cache() {
+    use zero_tokenizer::base::tokenizer_base::compile_pattern;
+
+    // 同一模式重复编译应得到行为一致的正则
+    let first = compile_pattern(r"\d+").unwrap();
+    let second = compile_pattern(r"\d+").unwrap();
+    let text = "a1 b22 c333";
+    let matches = |re: &fancy_regex::Regex| -> Vec<String> {
+        re.find_iter(text)
+            .map(|m| m.unwrap().as_str().to_string())
+            .collect()
+    };
+    assert_eq!(matches(&first), vec!["1", "22", "333"]);
+    assert_eq!(matches(&first), matches(&second));
+
+    // 无效模式不会被缓存，每次都返回错误
+    assert!(compile_pattern(r"(unclosed").is_err());
+    assert!(compile_pattern(r"(unclosed").is_err());
+}
+
+#[test]
+fn test_ascii_fast_path_matches_regex() {
+    use zero_tokenizer::base::ascii_split::split_gpt4_ascii;
+    use zero_tokenizer::base::tokenizer_base::{compile_pattern, GPT4_PATTERN};
+
+    let regex = compile_pattern(GPT4_PATTERN).unwrap();
+    let texts = [
+        "Hello, world!",
+        "I'll be there's 12345 they'RE",
+        "   \n\n  indented\tline\r\n",
+        "trailing spaces   ",
+        "a  b",
+        " !!! ?? ...\n\nnext",
+        "x'LL ''s '",
+        "numbers 1234567 and 3.14159",
+        "\x0b\x0cform feed\x00\x7f",
+        "",
+    ];
+    for text in texts {
+        let expected: Vec<&str> = regex.find_iter(text).map(|m| m.unwrap().as_str()).collect();
+        assert_eq!(
+            split_gpt4_ascii(text),
+            expected,
+            "切分结果不一致: {:?}",
+            text
+        );
+    }
+}
+
+#[test]
+fn test_cjk_fast_path_matches_regex() {
+    use zero_tokenizer::base::ascii_split::split_gpt4_cjk;
+    use zero_tokenizer::base::tokenizer_base::{compile_pattern, GPT4_PATTERN};
+
+    let regex = compile_pattern(GPT4_PATTERN).unwrap();
+    let texts = [
+        "你好世界",
+        "氢Li",
+        "Hello 你好 world",
+        "'你's好'll",
+        "  世界\n\n一鿿 123你",
+        "!!你好?? ",
+    ];
+    for text in texts {
+        let expected: Vec<&str> = regex.find_iter(text).map(|m| m.unwrap().as_str()).collect();
+        assert_eq!(
+            split_gpt4_cjk(text),
+            Some(expected),
+            "切分结果不一致: {:?}",
+            text
+        );
+    }
+
+    // 全角标点、假名等其他非ASCII字符不走快速路径
+    assert_eq!(split_gpt4_cjk("你好，世界"), None);
+    assert_eq!(split_gpt4_cjk("こんにちは"), None);
+}
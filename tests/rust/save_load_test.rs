@@ -191,3 +191,28 @@ fn test_save_multiple_times() {
 
     cleanup_test_file(model_path);
 }
+
+#[test]
+fn test_dict_file_tokens() {
+    use zero_tokenizer::base::dict_file::DictFile;
+
+    let dict_path = "test_dict_file.txt";
+    cleanup_test_file(dict_path);
+
+    // 去除首尾空白并跳过空行，兼容CRLF换行
+    fs::write(dict_path, "氢\r\n  氦 \n\n锂\n").unwrap();
+    let dict = DictFile::open(dict_path).unwrap();
+    assert_eq!(dict.tokens().collect::<Vec<_>>(), vec!["氢", "氦", "锂"]);
+    drop(dict);
+
+    // 空文件没有标记
+    fs::write(dict_path, "").unwrap();
+    assert_eq!(DictFile::open(dict_path).unwrap().tokens().count(), 0);
+
+    // 非法UTF-8在打开时即报错
+    fs::write(dict_path, [0xff, 0xfe, b'\n']).unwrap();
+    assert!(DictFile::open(dict_path).is_err());
+
+    cleanup_test_file(dict_path);
+    assert!(DictFile::open(dict_path).is_err());
+}
@@ -43,3 +43,25 @@ fn test_unigram_default() {
     // Unigram特定的验证 - 初始词汇表大小应为256+15001
     assert_eq!(tokenizer.vocab_size(), 256 + 15001); // 256个字节 + 15001个常用汉字
 }
+
+/// 测试Viterbi分段按分数选择路径，且修改分数后重新生效
+#[test]
+fn test_unigram_segment_follows_scores() {
+    let mut tokenizer = zero_tokenizer::prelude::unigram().unwrap();
+    tokenizer.train(vec!["ab".to_string()], 16000).unwrap();
+
+    let id_a = *tokenizer.base.get_token_id("a").unwrap();
+    let id_b = *tokenizer.base.get_token_id("b").unwrap();
+    let id_ab = *tokenizer.base.get_token_id("ab").unwrap();
+    let len = *tokenizer.base.vocab.ids().max().unwrap() as usize + 1;
+
+    // 所有标记分数相同时，标记数最少的分段最优
+    tokenizer.set_scores(vec![-1.0; len]);
+    assert_eq!(tokenizer.encode("ab").unwrap(), vec![id_ab]);
+
+    // 降低 "ab" 的分数后应拆分为两个单字节标记
+    let mut scores = vec![-1.0; len];
+    scores[id_ab as usize] = -3.0;
+    tokenizer.set_scores(scores);
+    assert_eq!(tokenizer.encode("ab").unwrap(), vec![id_a, id_b]);
+}
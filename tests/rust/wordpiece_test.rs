@@ -62,3 +62,49 @@ fn test_wordpiece_default() {
     // WordPiece特定的验证 - 初始词汇表大小应为256+15001
     assert_eq!(tokenizer.vocab_size(), 256 + 15001); // 256个字节 + 15001个常用汉字
 }
+
+/// 测试前缀树的最长匹配
+#[test]
+fn test_byte_trie_longest_match() {
+    use zero_tokenizer::base::byte_trie::ByteTrie;
+
+    let mut trie = ByteTrie::new();
+    trie.insert("氢".as_bytes(), 1);
+    trie.insert("氢氧".as_bytes(), 2);
+    trie.insert("氢氧化锂".as_bytes(), 3);
+    // 相同字节序列保留较小的ID
+    trie.insert("氢氧".as_bytes(), 5);
+    assert_eq!(trie.len(), 3);
+
+    assert_eq!(trie.longest_match("氢氧化锂".as_bytes()), Some((3, 12)));
+    assert_eq!(trie.longest_match("氢氧化钠".as_bytes()), Some((2, 6)));
+    assert_eq!(trie.longest_match("水".as_bytes()), None);
+
+    // 不同首字节分派到各自的子树
+    trie.insert(b"a", 6);
+    trie.insert(&[0xff, 0x01], 7);
+    assert_eq!(trie.longest_match(b"ab"), Some((6, 1)));
+    assert_eq!(trie.longest_match(&[0xff, 0x01, 0x02]), Some((7, 2)));
+    assert_eq!(trie.longest_match(&[0xff]), None);
+
+    let mut matches = Vec::new();
+    trie.for_each_prefix_match("氢氧化锂".as_bytes(), |id, len| matches.push((id, len)));
+    assert_eq!(matches, vec![(1, 3), (2, 6), (3, 12)]);
+
+    // 稠密转移表与普通前缀树的匹配结果一致，插入新标记后失效
+    let mut compiled = trie.clone();
+    assert!(compiled.compile(usize::MAX));
+    for text in ["氢氧化锂", "氢氧化钠", "水", "ab", "\u{ff}"] {
+        assert_eq!(
+            compiled.longest_match(text.as_bytes()),
+            trie.longest_match(text.as_bytes())
+        );
+    }
+    assert_eq!(compiled.longest_match(&[0xff, 0x01, 0x02]), Some((7, 2)));
+    compiled.insert(b"ab", 8);
+    assert!(!compiled.is_compiled());
+    assert_eq!(compiled.longest_match(b"ab"), Some((8, 2)));
+
+    // 超过大小上限时不编译
+    assert!(!trie.clone().compile(0));
+}